@@ -0,0 +1,454 @@
+"""
+Benchmark suite.
+
+    python -m benchmarks.run [-o results.json] [--suite startup import thumbs world gl]
+                             [--sizes 1000 10000 100000] [--faces 2000 20000 100000]
+                             [--compare baseline.json] [--fail-above 1.25]
+
+Synthetic tiles and dungeons are generated in a scratch folder, which is
+also used as the cache root so every run starts cold. Results are written
+as JSON: one row per (benchmark, parameters) with all repeat timings in
+seconds, so two runs can be diffed with --compare.
+
+The gl suite (TileData upload, importPaths, paintGL) needs a display or
+Qt's offscreen platform with a working OpenGL implementation.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SUITES = ("startup", "import", "thumbs", "world", "gl")
+
+
+class Results:
+    def __init__(self):
+        self.rows: list[dict] = []
+
+    def add(self, name: str, params: dict, times: list[float], **extra) -> None:
+        row = {
+            "name": name,
+            "params": params,
+            "times": times,
+            "median": statistics.median(times),
+            "min": min(times),
+            **extra,
+        }
+        self.rows.append(row)
+        shown = ", ".join(f"{k}={v}" for k, v in params.items())
+        print(
+            f"{name:<32} {shown:<24} median {row['median'] * 1e3:10.3f} ms"
+            f"  min {row['min'] * 1e3:10.3f} ms",
+            file=sys.stderr,
+        )
+
+    def measure(self, name: str, params: dict, fn, repeat: int, setup=None, **extra):
+        """
+        Time fn() `repeat` times; setup() runs untimed before each call and
+        its result is passed to fn.
+        """
+        times = []
+        result = None
+        for _ in range(repeat):
+            arg = setup() if setup is not None else None
+            gc.collect()
+            start = time.perf_counter()
+            result = fn(arg) if setup is not None else fn()
+            times.append(time.perf_counter() - start)
+        self.add(name, params, times, **extra)
+        return result
+
+
+def metadata() -> dict:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "git": rev,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# -- startup -----------------------------------------------------------------
+
+
+def benchStartup(results: Results, repeat: int) -> None:
+    from .startup import measure
+
+    result = measure(repeat)
+    for stage in ("shown", "view"):
+        results.add(
+            f"startup.{stage}",
+            {},
+            [s[f"{stage}_ms"] / 1e3 for s in result["samples"]],
+            heavy=result["heavy"],
+        )
+
+
+# -- import -----------------------------------------------------------------
+
+
+def benchImport(
+    results: Results, scratch: str, faces_list: list[int], repeat: int
+) -> None:
+    from src.resources import meshlogic
+    from src.resources.meshcache import MeshCache
+
+    from .synthetic import writeTiles
+
+    cache = MeshCache(os.path.join(scratch, "bench_meshcache"))
+    for faces in faces_list:
+        path = writeTiles(os.path.join(scratch, "tiles"), faces, 1)[0]
+        p = {"faces": faces}
+
+        raw = results.measure(
+            "import.loadMesh", p, lambda: meshlogic.loadMesh(path), repeat
+        )
+        bb = results.measure(
+            "import.boundingBox", p, lambda: meshlogic.createBoundingBox(raw), repeat
+        )
+        dims = meshlogic.createDims(bb)
+        max_faces = meshlogic.faceBudget(dims)
+        mesh = results.measure(
+            "import.reduceMesh",
+            p | {"max_faces": max_faces},
+            lambda: meshlogic.reduceMesh(raw, max_faces),
+            repeat,
+        )
+        results.measure(
+            "import.buildLods", p, lambda: meshlogic.buildLods(mesh), repeat
+        )
+        processed = results.measure(
+            "import.processMesh", p, lambda: meshlogic.processMesh(path), repeat
+        )
+        results.measure(
+            "import.meshcache.store", p, lambda: cache.store(processed), repeat
+        )
+        results.measure("import.meshcache.load", p, lambda: cache.load(path), repeat)
+
+
+# -- thumbnails --------------------------------------------------------------
+
+
+def benchThumbs(
+    results: Results, scratch: str, faces_list: list[int], repeat: int
+) -> None:
+    from src.resources import meshlogic
+    from src.thumbnails.raster import render_rgba
+
+    from .synthetic import writeTiles
+
+    for faces in faces_list:
+        mesh = meshlogic.loadMesh(
+            writeTiles(os.path.join(scratch, "tiles"), faces, 1)[0]
+        )
+        for size in (32, 64, 256):
+            results.measure(
+                "thumbs.render_rgba",
+                {"faces": faces, "size": size},
+                lambda: render_rgba(mesh.vertices, mesh.faces, size),
+                repeat,
+            )
+
+        if _qtApp() is not None:
+            from src.thumbnails.thumbgen import make_thumbnail
+
+            results.measure(
+                "thumbs.make_thumbnail",
+                {"faces": faces, "size": 64},
+                lambda: make_thumbnail(mesh, 64),
+                repeat,
+            )
+
+
+# -- world: save/load and delete lookups --------------------------------------
+
+
+def benchWorld(results: Results, scratch: str, sizes: list[int], repeat: int) -> None:
+    from src.world.projectfile import (
+        BINARY_EXT,
+        fromSerial,
+        readProject,
+        toSerial,
+        writeProject,
+    )
+
+    from .synthetic import syntheticWorld
+
+    rng = np.random.default_rng(1)
+    for count in sizes:
+        p = {"objects": count}
+        world = results.measure("world.build", p, lambda: syntheticWorld(count), 1)
+
+        for ext, binary in ((".json", False), (BINARY_EXT, True)):
+            path = os.path.join(scratch, f"bench_world_{count}{ext}")
+            fmt = p | {"format": ext.lstrip(".")}
+            results.measure(
+                "world.save",
+                fmt,
+                lambda: writeProject(
+                    path, fromSerial(world.serializeWorld()), binary=binary
+                ),
+                repeat,
+            )
+            results.rows[-1]["bytes"] = os.path.getsize(path)
+
+            def load(target):
+                target.loadWorld(toSerial(readProject(path)))
+
+            results.measure(
+                "world.load", fmt, load, repeat, setup=lambda: syntheticWorld(0)
+            )
+
+        # delete mode: one cell lookup per click, then the remove itself
+        probes = [
+            world.objects[i].pos for i in rng.integers(0, count, size=min(count, 1000))
+        ]
+        queries = len(probes)
+
+        def lookups():
+            for pos in probes:
+                world.objectsInCell(world.toGrid([pos[0] + 1, pos[1] + 1, pos[2] + 1]))
+
+        results.measure(
+            "world.delete_lookup", p | {"queries": queries}, lookups, repeat
+        )
+
+        def removeAndPlace():
+            for pos in probes:
+                obj = world.removeAt([pos[0] + 1, pos[1] + 1, pos[2] + 1])
+                if obj is not None:
+                    world.selected_mesh = obj.mesh_id
+                    world.placeObject(
+                        [pos[0] + 1, pos[1] + 1, pos[2] + 1], obj.rotation
+                    )
+
+        results.measure(
+            "world.remove_place", p | {"ops": queries}, removeAndPlace, repeat
+        )
+
+
+# -- gl: upload, import and frame time ---------------------------------------
+
+_app = None
+
+
+def _qtApp():
+    global _app
+    if _app is None:
+        try:
+            from PyQt5.QtWidgets import QApplication
+        except ImportError:
+            return None
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _app
+
+
+def benchGl(
+    results: Results, scratch: str, sizes: list[int], faces_list: list[int], repeat: int
+) -> None:
+    from OpenGL.GL import glFinish
+
+    from src.resources import meshlogic
+    from src.resources.stlloader import STLLoader
+    from src.resources.tilemesh import TileData
+    from src.window.worldwidget import WorldWidget
+    from src.world.world import World, WorldSerial
+    from src.world.worldcamera import WorldCamera
+
+    from .synthetic import syntheticObjects, writeTiles
+
+    app = _qtApp()
+    if app is None:
+        raise ImportError("PyQt5 is required for the gl suite")
+
+    view = WorldWidget(World())
+    view.resize(1280, 720)
+    view.show()
+    app.processEvents()
+    view.makeCurrent()
+
+    for faces in faces_list:
+        path = writeTiles(os.path.join(scratch, "tiles"), faces, 1)[0]
+        processed = meshlogic.processMesh(path)
+        mesh = processed.toMesh()
+
+        def upload(tile):
+            tile._regGl(processed.lods)
+            glFinish()
+
+        def emptyTile():
+            tile = TileData(path, "bench", mesh, processed.bb, processed.dims, None)
+            tile.dispose()
+            return tile
+
+        results.measure(
+            "gl.TileData._regGl", {"faces": faces}, upload, repeat, setup=emptyTile
+        )
+
+    # whole imports, cold (empty caches) and warm
+    tile_paths = writeTiles(os.path.join(scratch, "tiles"), faces_list[0], 8)
+    for label in ("cold", "warm"):
+
+        def importAll(loader):
+            loader.importPaths(None, tile_paths)
+            glFinish()
+            return loader
+
+        def freshLoader():
+            if label == "cold":
+                shutil.rmtree(os.environ["DUNGEONBUILDER_CACHE"], ignore_errors=True)
+            view.world.resetWorld()
+            return STLLoader(view.world)
+
+        results.measure(
+            "gl.importPaths",
+            {"files": len(tile_paths), "faces": faces_list[0], "cache": label},
+            importAll,
+            repeat,
+            setup=freshLoader,
+        )
+
+    tiles = dict(view.world.tile_meshes)
+    for count in sizes:
+        camera = WorldCamera()
+        camera.dist = max(camera.dist, count**0.5 * 50)
+        view.world.loadWorld(
+            WorldSerial(
+                tile_meshes={tid: tile.filepath for tid, tile in tiles.items()},
+                objects=syntheticObjects(list(tiles), count, view.world.grid_size),
+                camera=camera,
+                tile_id_counter=len(tiles),
+            )
+        )
+
+        def frame():
+            view.paintGL()
+            glFinish()
+
+        results.measure("gl.paintGL.first", {"objects": count}, frame, 1)
+        results.measure("gl.paintGL", {"objects": count}, frame, max(repeat, 10))
+
+    view.doneCurrent()
+
+
+# -- comparison ---------------------------------------------------------------
+
+
+def _key(row: dict) -> tuple:
+    return row["name"], json.dumps(row["params"], sort_keys=True)
+
+
+def compare(rows: list[dict], baseline_path: str, fail_above: float | None) -> bool:
+    with open(baseline_path, "r") as f:
+        baseline = {_key(row): row for row in json.load(f)["results"]}
+
+    ok = True
+    print(f"\n{'benchmark':<32} {'params':<40} {'ratio':>7}")
+    for row in rows:
+        old = baseline.get(_key(row))
+        if old is None or old["median"] <= 0:
+            continue
+        ratio = row["median"] / old["median"]
+        flag = ""
+        if fail_above is not None and ratio > fail_above:
+            flag = "  REGRESSION"
+            ok = False
+        shown = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+        print(f"{row['name']:<32} {shown:<40} {ratio:7.2f}{flag}")
+    return ok
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark import, rendering and save/load."
+    )
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1000, 10000, 100000],
+        help="objects per world",
+    )
+    parser.add_argument(
+        "--faces",
+        nargs="+",
+        type=int,
+        default=[2000, 20000, 100000],
+        help="faces per tile",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scratch", help="folder for generated files (default: a temporary folder)"
+    )
+    parser.add_argument("--compare", help="earlier results to compare medians against")
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        help="exit non-zero when a median ratio exceeds this",
+    )
+    args = parser.parse_args(argv)
+
+    scratch = args.scratch or tempfile.mkdtemp(prefix="dungeonbench_")
+    os.makedirs(scratch, exist_ok=True)
+    os.environ["DUNGEONBUILDER_CACHE"] = os.path.join(scratch, "cache")
+
+    results = Results()
+    runs = {
+        "startup": lambda: benchStartup(results, args.repeat),
+        "import": lambda: benchImport(results, scratch, args.faces, args.repeat),
+        "thumbs": lambda: benchThumbs(results, scratch, args.faces, args.repeat),
+        "world": lambda: benchWorld(results, scratch, args.sizes, args.repeat),
+        "gl": lambda: benchGl(results, scratch, args.sizes, args.faces, args.repeat),
+    }
+    skipped = {}
+    try:
+        for suite in args.suite:
+            try:
+                runs[suite]()
+            except (ImportError, RuntimeError) as e:
+                print(f"Skipping {suite}: {e}", file=sys.stderr)
+                skipped[suite] = str(e)
+    finally:
+        if not args.scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "meta": metadata() | {"skipped": skipped, "repeat": args.repeat},
+                "results": results.rows,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Wrote {len(results.rows)} results to {args.output}", file=sys.stderr)
+
+    if args.compare and not compare(results.rows, args.compare, args.fail_above):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cold-start check.
+
+    python -m benchmarks.startup [--runs 5] [--target-ms 1500] [--view-target-ms 3000]
+
+Starts the application in fresh interpreters and measures the wall time
+until the main window is shown and until the OpenGL view has replaced
+its placeholder. Fails when the median exceeds the targets, or when any
+of HEAVY_MODULES was imported before the window appeared.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("trimesh", "OpenGL", "PIL", "scipy", "fast_simplification")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, sys
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+from src.main import createWindow
+w = createWindow(app)
+app.processEvents()
+heavy = sorted({m.split('.')[0] for m in sys.modules} & set(%r))
+print(json.dumps({"stage": "shown", "heavy": heavy}), flush=True)
+w.loadView()
+app.processEvents()
+print(json.dumps({"stage": "view"}), flush=True)
+"""
+
+
+def measureOnce(env: dict) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _CHILD % (HEAVY_MODULES,)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    result = {}
+    for line in proc.stdout:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue  # stray prints from the application
+        result[msg["stage"] + "_ms"] = (time.perf_counter() - start) * 1e3
+        if msg["stage"] == "shown":
+            result["heavy"] = msg["heavy"]
+    proc.wait()
+    if proc.returncode != 0 or "view_ms" not in result:
+        raise RuntimeError(f"startup run failed with exit code {proc.returncode}")
+    return result
+
+
+def measure(runs: int) -> dict:
+    env = dict(os.environ)
+    if (
+        sys.platform.startswith("linux")
+        and not env.get("DISPLAY")
+        and not env.get("WAYLAND_DISPLAY")
+    ):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env.setdefault(
+        "DUNGEONBUILDER_CACHE",
+        os.path.join(tempfile.gettempdir(), "dungeonbuilder-startup"),
+    )
+
+    samples = [measureOnce(env) for _ in range(runs)]
+    return {
+        "shown_ms": statistics.median(s["shown_ms"] for s in samples),
+        "view_ms": statistics.median(s["view_ms"] for s in samples),
+        "heavy": sorted({m for s in samples for m in s["heavy"]}),
+        "samples": samples,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure time to first window.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1500.0, help="window shown")
+    parser.add_argument(
+        "--view-target-ms", type=float, default=3000.0, help="3D view ready"
+    )
+    parser.add_argument("-o", "--output", help="write the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(
+        f"window shown {result['shown_ms']:.0f} ms (target {args.target_ms:.0f}), "
+        f"view ready {result['view_ms']:.0f} ms (target {args.view_target_ms:.0f})"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    failed = False
+    if result["heavy"]:
+        print(f"Imported before the window was shown: {', '.join(result['heavy'])}")
+        failed = True
+    if result["shown_ms"] > args.target_ms or result["view_ms"] > args.view_target_ms:
+        print("Startup slower than target")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
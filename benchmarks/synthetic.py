@@ -0,0 +1,168 @@
+"""
+Synthetic tiles and dungeons for the benchmarks.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from src.resources import meshlogic
+from src.resources.stlio import STL_RECORD
+from src.world.worldobject import WorldObject
+
+# footprint of a generated tile in world units (one 50 unit grid cell)
+TILE_SIZE = (50.0, 50.0, 20.0)
+
+
+def boxTriangles(faces: int, size=TILE_SIZE, bumps: float = 2.0) -> np.ndarray:
+    """
+    (F, 3, 3) triangles of a closed box whose sides are split into an n x n
+    grid, with F >= faces. The top is rippled so decimation has real work.
+    """
+    n = max(math.ceil(math.sqrt(faces / 12)), 1)
+    t = np.linspace(0.0, 1.0, n + 1)
+    u, v = np.meshgrid(t, t, indexing='ij')
+    quads = np.stack(
+        (
+            u[:-1, :-1],
+            v[:-1, :-1],
+            u[1:, :-1],
+            v[1:, :-1],
+            u[1:, 1:],
+            v[1:, 1:],
+            u[:-1, 1:],
+            v[:-1, 1:],
+        ),
+        axis=-1,
+    ).reshape(-1, 4, 2)
+    # two triangles per quad in the (u, v) plane, counter-clockwise
+    uv = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+
+    sx, sy, sz = size
+    sides = []
+    # (axis mapping, fixed coordinate, flip) for the six sides, normals outward
+    for axes, fixed, flip in (
+        ((0, 1), (2, 0.0), True),
+        ((0, 1), (2, 1.0), False),
+        ((0, 2), (1, 0.0), False),
+        ((0, 2), (1, 1.0), True),
+        ((1, 2), (0, 0.0), True),
+        ((1, 2), (0, 1.0), False),
+    ):
+        tri = np.zeros(uv.shape[:2] + (3,))
+        tri[..., axes[0]] = uv[..., 0]
+        tri[..., axes[1]] = uv[..., 1]
+        tri[..., fixed[0]] = fixed[1]
+        if flip:
+            tri = tri[:, ::-1]
+        sides.append(tri)
+    tris = np.concatenate(sides) * (sx, sy, sz)
+
+    top = np.isclose(tris[..., 2], sz)
+    ripple = (
+        bumps
+        * np.sin(tris[..., 0] / sx * 6 * np.pi)
+        * np.sin(tris[..., 1] / sy * 6 * np.pi)
+    )
+    tris[..., 2] += np.where(top, ripple, 0.0)
+    return tris
+
+
+def writeStl(path: str, faces: int, size=TILE_SIZE) -> int:
+    """
+    Write a binary STL with at least `faces` triangles; returns the count.
+    """
+    tris = boxTriangles(faces, size)
+    records = np.zeros(len(tris), dtype=STL_RECORD)
+    records['vertices'] = tris
+    e1, e2 = tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]
+    normal = np.cross(e1, e2)
+    records['normal'] = normal / np.maximum(
+        np.linalg.norm(normal, axis=1, keepdims=True), 1e-12
+    )
+    with open(path, "wb") as f:
+        f.write(b'synthetic benchmark tile'.ljust(80, b' '))
+        f.write(np.uint32(len(records)).tobytes())
+        f.write(records.tobytes())
+    return len(records)
+
+
+def writeTiles(folder: str, faces: int, count: int) -> list[str]:
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"tile_{faces}_{i}.stl")
+        if not os.path.exists(path):
+            writeStl(path, faces)
+        paths.append(path)
+    return paths
+
+
+class BenchTile:
+    """
+    Just enough of TileData for World bookkeeping, save and load without a
+    GL context.
+    """
+
+    def __init__(self, filepath: str, size=TILE_SIZE):
+        self.filepath = filepath
+        self.name = os.path.basename(filepath)
+        self.bb = meshlogic.boundingBoxFromCorners(np.zeros(3), np.array(size))
+        self.dims = meshlogic.createDims(self.bb)
+        self.levels = []
+
+    def dispose(self) -> None:
+        pass
+
+
+def syntheticObjects(
+    mesh_ids: list[int], count: int, grid: int = 50, seed: int = 0
+) -> list[WorldObject]:
+    """
+    count objects in distinct grid cells of a square floor, random tile
+    types and rotations.
+    """
+    rng = np.random.default_rng(seed)
+    side = math.ceil(math.sqrt(count))
+    cells = rng.permutation(side * side)[:count]
+    ids = rng.choice(mesh_ids, size=count)
+    rotations = rng.integers(0, 4, size=count) * 90
+
+    objects = []
+    for cell, mesh_id, rotation in zip(
+        cells.tolist(), ids.tolist(), rotations.tolist()
+    ):
+        obj = WorldObject(mesh_id)
+        obj.pos = [
+            (cell % side - side // 2) * grid,
+            (cell // side - side // 2) * grid,
+            0,
+        ]
+        obj.rotation = rotation
+        objects.append(obj)
+    return objects
+
+
+def syntheticWorld(
+    count: int, tiles: dict | None = None, tile_types: int = 8, seed: int = 0
+):
+    """
+    World with `count` placed objects. Without tiles, BenchTile stand-ins
+    are registered so no GL context is needed.
+    """
+    from src.world.world import World, WorldSerial
+
+    world = World()
+    if tiles is None:
+        tiles = {i: BenchTile(f"bench_tile_{i}.stl") for i in range(tile_types)}
+    for tile_id, tile in tiles.items():
+        world.registerTile(tile, tile_id)
+    world.loadWorld(
+        WorldSerial(
+            tile_meshes={tid: tile.filepath for tid, tile in tiles.items()},
+            objects=syntheticObjects(list(tiles), count, world.grid_size, seed),
+            tile_id_counter=len(tiles),
+        )
+    )
+    return world
@@ -1,4 +1,7 @@
+import multiprocessing
+
 from src.main import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()  # import workers in the frozen build
+    main()
@@ -1,18 +1,44 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from PyQt5.QtWidgets import QWidget
 
-from .world.world import World
-from .window.worldwidget import WorldWidget
 from .resources.stlloader import STLLoader
+from .window.loadingview import LoadingView
+from .world.history import EditHistory
+from .world.journal import Journal
+from .world.world import World
+
+if TYPE_CHECKING:
+    from .window.worldwidget import WorldWidget
+
 
 @dataclass
 class AppState:
     world: World
-    view: WorldWidget
-    stlloader: STLLoader 
+    view: WorldWidget | QWidget  # LoadingView until createView()
+    stlloader: STLLoader
+    journal: Journal
+    history: EditHistory
+
 
 def newAppState() -> AppState:
     world: World = World()
-    view: WorldWidget = WorldWidget(world)
+    view: QWidget = LoadingView()
     stlloader: STLLoader = STLLoader(world)
+    journal: Journal = Journal()
+    history: EditHistory = EditHistory(world)
+    world.addListener(journal.onWorldEdit)
+    world.addListener(history.onWorldEdit)
+
+    return AppState(world, view, stlloader, journal, history)
+
+
+def createView(state: AppState) -> WorldWidget:
+    # OpenGL is imported here, after the window is already on screen
+    from .window.worldwidget import WorldWidget
 
-    return AppState(world, view, stlloader)
\ No newline at end of file
+    state.view = WorldWidget(state.world)
+    return state.view
@@ -0,0 +1,24 @@
+import os
+import sys
+
+APP_NAME = "dungeonbuilder"
+
+
+def cacheRoot() -> str:
+    override = os.environ.get("DUNGEONBUILDER_CACHE")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+    return os.path.join(base, APP_NAME)
+
+
+def cacheDir(name: str) -> str:
+    """
+    Per-user cache folder, independent of the working directory.
+    """
+    return os.path.join(cacheRoot(), name)
@@ -0,0 +1,167 @@
+"""
+Headless bill of materials over project files.
+
+    python -m src.controllers.bom PROJECT_OR_DIR [...] [--format csv|json] [-o FILE]
+
+Counts placed tiles per name for each project and in total. Only NumPy is
+needed: projects are read through world.projectfile and tile names come
+from the cached STL bounding boxes in resources.tilemeta, so no Qt, GL or
+trimesh is imported and no mesh is decimated.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..resources import stlio
+from ..resources.tilemeta import TileMetaCache, tileNameFromBounds
+from ..world.projectfile import BINARY_EXT, readProject
+from .exporter import count_mesh_ids
+
+PROJECT_EXTS = (".json", BINARY_EXT)
+
+
+def findProjects(paths: list[str], recursive: bool) -> list[str]:
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        walker = os.walk(path) if recursive else [(path, [], os.listdir(path))]
+        for folder, _, files in walker:
+            found.extend(
+                os.path.join(folder, f)
+                for f in sorted(files)
+                if f.lower().endswith(PROJECT_EXTS)
+            )
+    return found
+
+
+def readPlacements(
+    path: str,
+) -> tuple[str, dict[int, str], np.ndarray, np.ndarray] | None:
+    """
+    Worker: (project, tile paths by id, unique mesh ids, their counts).
+    """
+    try:
+        data = readProject(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Skipping {path}: {e}", file=sys.stderr)
+        return None
+
+    base = os.path.dirname(os.path.abspath(path))
+    tiles = {
+        int(k): os.path.join(base, v)
+        for k, v in data.header.get("tile_meshes", {}).items()
+    }
+    ids, counts = np.unique(data.mesh_id, return_counts=True)
+    return path, tiles, ids, counts
+
+
+def readBoundsOrNone(path: str) -> tuple[np.ndarray, np.ndarray] | None:
+    try:
+        return stlio.readBounds(path)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read {path}: {e}", file=sys.stderr)
+        return None
+
+
+def tileNames(paths: set[str], executor: ProcessPoolExecutor) -> dict[str, str]:
+    cache = TileMetaCache()
+    bounds = {path: cache.lookup(path) for path in paths}
+    misses = [path for path, b in bounds.items() if b is None]
+    for path, b in zip(misses, executor.map(readBoundsOrNone, misses, chunksize=16)):
+        bounds[path] = b
+        if b is not None:
+            cache.store(path, b)
+    cache.save()
+    return {path: tileNameFromBounds(path, b) for path, b in bounds.items()}
+
+
+def billOfMaterials(
+    projects: list[str], workers: int | None = None
+) -> tuple[dict[str, Counter], Counter]:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        placements = [
+            p
+            for p in executor.map(readPlacements, projects, chunksize=8)
+            if p is not None
+        ]
+        names = tileNames(
+            {tile for _, tiles, _, _ in placements for tile in tiles.values()}, executor
+        )
+
+    per_project = {}
+    totals = Counter()
+    for path, tiles, ids, counts in placements:
+        by_id = {mesh_id: names[tile] for mesh_id, tile in tiles.items()}
+        counter = count_mesh_ids(np.repeat(ids, counts), by_id)
+        per_project[path] = counter
+        totals.update(counter)
+    return per_project, totals
+
+
+def writeCsv(out, per_project: dict[str, Counter], totals: Counter) -> None:
+    writer = csv.writer(out)
+    writer.writerow(["project", "tile", "count"])
+    for path, counter in per_project.items():
+        for name, count in sorted(counter.items()):
+            writer.writerow([path, name, count])
+    for name, count in sorted(totals.items()):
+        writer.writerow(["TOTAL", name, count])
+
+
+def writeJson(out, per_project: dict[str, Counter], totals: Counter) -> None:
+    json.dump(
+        {
+            "projects": {
+                path: dict(sorted(c.items())) for path, c in per_project.items()
+            },
+            "totals": dict(sorted(totals.items())),
+        },
+        out,
+        indent=2,
+    )
+    out.write("\n")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Count placed tiles in dungeon project files."
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="project files or directories of projects"
+    )
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="search directories recursively"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: all cores)",
+    )
+    args = parser.parse_args(argv)
+
+    projects = findProjects(args.paths, args.recursive)
+    per_project, totals = billOfMaterials(projects, args.workers)
+
+    write = writeCsv if args.format == "csv" else writeJson
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write(out, per_project, totals)
+    else:
+        write(sys.stdout, per_project, totals)
+
+
+if __name__ == "__main__":
+    main()
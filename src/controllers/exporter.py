@@ -1,26 +1,39 @@
-
 import json
 from collections import Counter
 
-from OpenGL.GL import GL_RGBA, GL_UNSIGNED_BYTE, glReadPixels
-from PIL import Image
+import numpy as np
 
 
 def count_tiles(placed_tiles):
     """
     Retourneer Counter: { tile_name: aantal }.
     """
-    print(type(placed_tiles[0]))
     names = [t['tile'].name for t in placed_tiles]
     return Counter(names)
 
+
+def count_mesh_ids(mesh_ids, names):
+    """
+    Tel geplaatste tiles per naam vanuit een mesh_id kolom.
+    names: { mesh_id: tile_name }
+    """
+    ids, counts = np.unique(np.asarray(mesh_ids, dtype=np.int64), return_counts=True)
+    result = Counter()
+    for mesh_id, count in zip(ids.tolist(), counts.tolist()):
+        result[names.get(mesh_id, f"<missing tile {mesh_id}>")] += count
+    return result
+
+
 def capture_topdown(width, height, filename="dungeon_map.png"):
     """
     Lees de hele buffer uit (RGBA), flip vertically en sla op als PNG.
     """
+    from OpenGL.GL import GL_RGBA, GL_UNSIGNED_BYTE, glReadPixels
+    from PIL import Image
+
     data = glReadPixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
     img = Image.frombytes("RGBA", (width, height), data)
     # OpenGL is bottom-up, dus we flippen
     img = img.transpose(Image.FLIP_TOP_BOTTOM)
     img.save(filename)
-    return filename
\ No newline at end of file
+    return filename
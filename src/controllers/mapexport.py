@@ -0,0 +1,501 @@
+"""
+High-resolution top-down map export.
+
+    python -m src.controllers.mapexport PROJECT OUT.png
+        [--scale PX_PER_UNIT] [--pyramid DIR]
+
+The world is rendered with an orthographic camera, tile by tile, into an
+offscreen framebuffer. Each row of tiles is read back and appended to a
+PNG as it is produced, so memory is bounded by one band of the image
+rather than the whole map. Optionally the same rows feed a zoomable
+{z}/{x}/{y}.png tile pyramid.
+
+From the command line a hidden OpenGL context is used; with --software
+(the default when no display is available) Qt's offscreen platform and a
+software rasterizer are requested so it also runs on headless machines.
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PYRAMID_TILE = 256
+
+DEFAULT_SCALE = 1.0  # pixels per world unit; a grid square of 50 is 50 px
+DEFAULT_TILE = 1024  # framebuffer size in pixels
+MAX_SIDE = 1 << 20  # sanity limit on output width/height
+
+
+class PngStreamWriter:
+    """
+    RGBA8 PNG written a band of rows at a time. Rows use the Up filter and
+    are deflated incrementally, one IDAT chunk per band.
+    """
+
+    def __init__(self, path: str, width: int, height: int, level: int = 6):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._z = zlib.compressobj(level)
+        self._prev = np.zeros(width * 4, dtype=np.uint8)
+        self._f = open(path, "wb")
+        self._f.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self._f.write(struct.pack('>I', len(data)))
+        self._f.write(kind)
+        self._f.write(data)
+        self._f.write(
+            struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF)
+        )
+
+    def writeRows(self, rows: np.ndarray) -> None:
+        """
+        rows: (n, width, 4) uint8, top to bottom.
+        """
+        n = len(rows)
+        if self.rows_written + n > self.height:
+            raise ValueError("more rows than the image height")
+        flat = rows.reshape(n, -1)
+        filtered = np.empty((n, flat.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up
+        filtered[:, 1:] = flat
+        filtered[0, 1:] -= self._prev
+        filtered[1:, 1:] -= flat[:-1]
+        self._prev = flat[-1].copy()
+        self.rows_written += n
+
+        data = self._z.compress(filtered.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        if self.rows_written != self.height:
+            self._f.close()
+            raise ValueError(f"PNG incomplete: {self.rows_written}/{self.height} rows")
+        self._chunk(b'IDAT', self._z.flush())
+        self._chunk(b'IEND', b'')
+        self._f.close()
+
+    def abort(self) -> None:
+        self._f.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def writePng(path: str, rgba: np.ndarray) -> None:
+    writer = PngStreamWriter(path, rgba.shape[1], rgba.shape[0])
+    writer.writeRows(rgba)
+    writer.close()
+
+
+def _halve(rows: np.ndarray) -> np.ndarray:
+    """
+    2x2 box filter of an even number of rows, alpha-weighted so colour
+    does not bleed in from transparent background.
+    """
+    if rows.shape[1] % 2:
+        rows = np.concatenate(
+            (rows, np.zeros((len(rows), 1, 4), dtype=rows.dtype)), axis=1
+        )
+    n, w = len(rows) // 2, rows.shape[1] // 2
+    px = rows.reshape(n, 2, w, 2, 4).astype(np.float32)
+    alpha = px[..., 3:].sum(axis=(1, 3))
+    rgb = (px[..., :3] * px[..., 3:]).sum(axis=(1, 3)) / np.maximum(alpha, 1)
+    out = np.concatenate((rgb, alpha / 4), axis=-1)
+    return np.round(out).astype(np.uint8)
+
+
+class TilePyramid:
+    """
+    Streams image bands into {folder}/{z}/{x}/{y}.png tiles of
+    PYRAMID_TILE pixels, z = 0 being the whole map in one tile. Each level
+    keeps at most one band of rows, handing halved rows to the level
+    below. Fully transparent tiles are not written.
+    """
+
+    def __init__(self, folder: str, width: int, height: int, tile: int = PYRAMID_TILE):
+        self.folder = folder
+        self.tile = tile
+        self.top = max(math.ceil(math.log2(max(width, height) / tile)), 0)
+        self.sizes = []
+        w, h = width, height
+        for _ in range(self.top + 1):
+            self.sizes.append((w, h))
+            w, h = (w + 1) // 2, (h + 1) // 2
+        self.sizes.reverse()  # index by z
+        self._bands = [np.zeros((0, w, 4), dtype=np.uint8) for w, _ in self.sizes]
+        self._carry = [np.zeros((0, w, 4), dtype=np.uint8) for w, _ in self.sizes]
+        self._band_row = [0] * (self.top + 1)
+
+    def addRows(self, rows: np.ndarray) -> None:
+        self._push(self.top, rows)
+
+    def _push(self, z: int, rows: np.ndarray) -> None:
+        band = np.concatenate((self._bands[z], rows))
+        while len(band) >= self.tile:
+            self._emit(z, band[: self.tile])
+            band = band[self.tile :]
+        self._bands[z] = band
+
+        if z > 0:
+            carry = np.concatenate((self._carry[z], rows))
+            even = len(carry) // 2 * 2
+            self._carry[z] = carry[even:]
+            if even:
+                self._push(z - 1, _halve(carry[:even]))
+
+    def _emit(self, z: int, band: np.ndarray) -> None:
+        y = self._band_row[z]
+        self._band_row[z] += 1
+        t = self.tile
+        for x in range(0, band.shape[1], t):
+            tile = band[:, x : x + t]
+            if not tile[..., 3].any():
+                continue
+            if tile.shape[:2] != (t, t):
+                padded = np.zeros((t, t, 4), dtype=np.uint8)
+                padded[: tile.shape[0], : tile.shape[1]] = tile
+                tile = padded
+            folder = os.path.join(self.folder, str(z), str(x // t))
+            os.makedirs(folder, exist_ok=True)
+            writePng(os.path.join(folder, f"{y}.png"), tile)
+
+    def close(self, meta: dict | None = None) -> None:
+        for z in range(self.top, -1, -1):
+            carry = self._carry[z]
+            if z > 0 and len(carry):
+                pad = np.zeros((1,) + carry.shape[1:], dtype=np.uint8)
+                self._push(z - 1, _halve(np.concatenate((carry, pad))))
+                self._carry[z] = carry[:0]
+            if len(self._bands[z]):
+                self._emit(z, self._bands[z])
+                self._bands[z] = self._bands[z][:0]
+
+        os.makedirs(self.folder, exist_ok=True)
+        with open(os.path.join(self.folder, "tiles.json"), "w") as f:
+            json.dump(
+                {
+                    "tile_size": self.tile,
+                    "min_zoom": 0,
+                    "max_zoom": self.top,
+                    "levels": [{"width": w, "height": h} for w, h in self.sizes],
+                    **(meta or {}),
+                },
+                f,
+                indent=2,
+            )
+
+
+def worldExtent(
+    instances: dict[int, np.ndarray], tiles: dict
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    (min, max) corners of all placed objects, using each tile's rotated
+    bounding box the same way the instancing shader places it.
+    """
+    lo, hi = [], []
+    for mesh_id, data in instances.items():
+        tile = tiles.get(mesh_id)
+        sx, sy, sz = tile.bb.size if tile is not None else (0.0, 0.0, 0.0)
+        r = np.radians(data[:, 3])
+        c, s = np.cos(r), np.sin(r)
+        corners_x = np.stack(
+            [
+                data[:, 0] + c * px - s * py
+                for px, py in ((0, 0), (sx, 0), (0, sy), (sx, sy))
+            ]
+        )
+        corners_y = np.stack(
+            [
+                data[:, 1] + s * px + c * py
+                for px, py in ((0, 0), (sx, 0), (0, sy), (sx, sy))
+            ]
+        )
+        lo.append((corners_x.min(), corners_y.min(), data[:, 2].min()))
+        hi.append((corners_x.max(), corners_y.max(), (data[:, 2] + sz).max()))
+    if not lo:
+        return None
+    return np.min(lo, axis=0), np.max(hi, axis=0)
+
+
+def exportMap(
+    world,
+    renderer,
+    path: str | None,
+    scale: float = DEFAULT_SCALE,
+    tile_px: int = DEFAULT_TILE,
+    margin: float = 0.0,
+    pyramid: str | None = None,
+    background=(0.0, 0.0, 0.0, 0.0),
+    samples: int = 4,
+    progress=None,
+) -> tuple[int, int] | None:
+    """
+    Render every placed object on the shown floors top-down at `scale`
+    pixels per world unit into a PNG at path and/or a tile pyramid folder.
+    Needs a current GL context that owns the world's tile VBOs and the
+    renderer; GL state is restored afterwards. progress(done, total) may
+    return False to abort. Returns the image size, or None when the world
+    is empty or aborted.
+    """
+    from OpenGL.GL import (
+        GL_COLOR_BUFFER_BIT,
+        GL_COLOR_CLEAR_VALUE,
+        GL_DEPTH_BUFFER_BIT,
+        GL_MODELVIEW,
+        GL_PROJECTION,
+        GL_RGBA,
+        GL_UNSIGNED_BYTE,
+        GL_VIEWPORT,
+        glClear,
+        glClearColor,
+        glGetFloatv,
+        glGetIntegerv,
+        glLoadIdentity,
+        glMatrixMode,
+        glOrtho,
+        glPopMatrix,
+        glPushMatrix,
+        glReadPixels,
+        glViewport,
+    )
+    from PyQt5.QtCore import QSize
+    from PyQt5.QtGui import QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+
+    extent = worldExtent(renderer.instances(world), world.tile_meshes)
+    if extent is None:
+        return None
+    lo, hi = extent
+    lo = lo - (margin, margin, 1.0)
+    hi = hi + (margin, margin, 1.0)
+
+    width = max(int(math.ceil((hi[0] - lo[0]) * scale)), 1)
+    height = max(int(math.ceil((hi[1] - lo[1]) * scale)), 1)
+    if max(width, height) > MAX_SIDE:
+        raise ValueError(f"map of {width}x{height} px is too large, lower the scale")
+    if pyramid:
+        tile_px = (
+            max(tile_px // PYRAMID_TILE, 1) * PYRAMID_TILE
+        )  # bands must align with pyramid tiles
+    tile_px = min(tile_px, max(width, height))
+    step = tile_px / scale
+    cols, rows = math.ceil(width / tile_px), math.ceil(height / tile_px)
+
+    # LOD by true on-screen size: an eye far above makes the perspective
+    # estimate in planLevels match the orthographic pixel size
+    distance = 1e6
+    eye = np.array([(lo[0] + hi[0]) / 2, (lo[1] + hi[1]) / 2, hi[2] + distance])
+    pixel_scale = scale * distance
+
+    fmt = QOpenGLFramebufferObjectFormat()
+    fmt.setAttachment(QOpenGLFramebufferObject.CombinedDepthStencil)
+    fmt.setSamples(samples)
+    target = QOpenGLFramebufferObject(QSize(tile_px, tile_px), fmt)
+    resolve = QOpenGLFramebufferObject(QSize(tile_px, tile_px)) if samples > 0 else None
+
+    writer = PngStreamWriter(path, width, height) if path else None
+    tiles = TilePyramid(pyramid, width, height) if pyramid else None
+
+    old_viewport = glGetIntegerv(GL_VIEWPORT)
+    old_clear = glGetFloatv(GL_COLOR_CLEAR_VALUE)
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+    glClearColor(*background)
+    glViewport(0, 0, tile_px, tile_px)
+
+    done = False
+    try:
+        for row in range(rows):
+            band_h = min(tile_px, height - row * tile_px)
+            band = np.empty((band_h, width, 4), dtype=np.uint8)
+            top = hi[1] - row * step
+            for col in range(cols):
+                if (
+                    progress is not None
+                    and progress(row * cols + col, rows * cols) is False
+                ):
+                    return None
+                left = lo[0] + col * step
+
+                target.bind()
+                glMatrixMode(GL_PROJECTION)
+                glLoadIdentity()
+                glOrtho(left, left + step, top - step, top, -hi[2], -lo[2])
+                glMatrixMode(GL_MODELVIEW)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                renderer.drawObjects(world, eye, pixel_scale, budget=sys.maxsize)
+                target.release()
+
+                source = target
+                if resolve is not None:
+                    QOpenGLFramebufferObject.blitFramebuffer(resolve, target)
+                    source = resolve
+                source.bind()
+                data = glReadPixels(0, 0, tile_px, tile_px, GL_RGBA, GL_UNSIGNED_BYTE)
+                source.release()
+
+                # GL rows are bottom-up; keep the top band_h rows
+                pixels = np.frombuffer(data, dtype=np.uint8).reshape(
+                    tile_px, tile_px, 4
+                )[::-1]
+                band_w = min(tile_px, width - col * tile_px)
+                band[:, col * tile_px : col * tile_px + band_w] = pixels[
+                    :band_h, :band_w
+                ]
+
+            if writer is not None:
+                writer.writeRows(band)
+            if tiles is not None:
+                tiles.addRows(band)
+
+        if writer is not None:
+            writer.close()
+        if tiles is not None:
+            tiles.close(
+                {"units_per_pixel": 1 / scale, "origin": [float(lo[0]), float(hi[1])]}
+            )
+        if progress is not None:
+            progress(rows * cols, rows * cols)
+        done = True
+        return width, height
+    finally:
+        if not done and writer is not None:
+            writer.abort()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopMatrix()
+        glViewport(*old_viewport)
+        glClearColor(*old_clear)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Render a dungeon project to a top-down PNG map."
+    )
+    parser.add_argument("project", help="project file (.json or binary)")
+    parser.add_argument("output", nargs="?", help="PNG to write")
+    parser.add_argument(
+        "-s", "--scale", type=float, default=DEFAULT_SCALE, help="pixels per world unit"
+    )
+    parser.add_argument(
+        "-t",
+        "--tile",
+        type=int,
+        default=DEFAULT_TILE,
+        help="offscreen framebuffer size",
+    )
+    parser.add_argument(
+        "-m",
+        "--margin",
+        type=float,
+        default=0.0,
+        help="border around the map, world units",
+    )
+    parser.add_argument(
+        "-p", "--pyramid", help="also write a zoomable tile pyramid to this folder"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=4, help="multisample anti-aliasing (0 disables)"
+    )
+    parser.add_argument(
+        "--background", default="00000000", help="RRGGBBAA background colour"
+    )
+    parser.add_argument(
+        "--software",
+        action="store_true",
+        help="offscreen platform and software OpenGL (default without a display)",
+    )
+    args = parser.parse_args(argv)
+    if not args.output and not args.pyramid:
+        parser.error("give an output PNG and/or --pyramid")
+
+    if args.software or (
+        sys.platform.startswith("linux")
+        and not os.environ.get("DISPLAY")
+        and not os.environ.get("WAYLAND_DISPLAY")
+    ):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+        from PyQt5.QtCore import QCoreApplication, Qt
+
+        QCoreApplication.setAttribute(Qt.AA_UseSoftwareOpenGL)
+
+    from PyQt5.QtGui import QOffscreenSurface, QOpenGLContext, QSurfaceFormat
+    from PyQt5.QtWidgets import QApplication
+
+    from ..render.instancing import InstanceRenderer
+    from ..render.scene import initSceneState
+    from ..resources.stlloader import STLLoader
+    from ..world.projectfile import readProject, toSerial
+    from ..world.world import World
+
+    app = QApplication(sys.argv[:1])
+
+    fmt = QSurfaceFormat()
+    fmt.setDepthBufferSize(24)
+    context = QOpenGLContext()
+    context.setFormat(fmt)
+    surface = QOffscreenSurface()
+    surface.setFormat(fmt)
+    surface.create()
+    if not context.create() or not context.makeCurrent(surface):
+        sys.exit("Could not create an OpenGL context")
+
+    world = World()
+    loader = STLLoader(world)
+    serial = toSerial(readProject(args.project))
+    loader.importPaths(
+        None, serial.tile_meshes
+    )  # uploads VBOs into the current context
+    world.loadWorld(serial)
+
+    initSceneState()
+    renderer = InstanceRenderer()
+    background = tuple(
+        int(args.background[i : i + 2], 16) / 255 for i in range(0, 8, 2)
+    )
+
+    def report(done, total):
+        print(f"\rRendering tile {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    size = exportMap(
+        world,
+        renderer,
+        args.output,
+        args.scale,
+        args.tile,
+        args.margin,
+        args.pyramid,
+        background,
+        args.samples,
+        report,
+    )
+    print(file=sys.stderr)
+    renderer.dispose()
+    context.doneCurrent()
+    del app
+    if size is None:
+        sys.exit("Nothing placed in this project")
+    print(f"{size[0]}x{size[1]} px")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from PyQt5.QtCore import QEvent, QObject, pyqtSignal, QTime
+from PyQt5.QtCore import QEvent, QObject, QTime, pyqtSignal
+
 
 class KeyFilter(QObject):
     def __init__(self):
@@ -25,8 +26,12 @@ class KeyFilter(QObject):
             event_bus.keyPressed.emit(key)
         return False
 
+
 class EventBus(QObject):
     keyPressed = pyqtSignal(int)
     tilesChanged = pyqtSignal()
+    tileIconChanged = pyqtSignal(int)  # tile id; the tile's icon was replaced
+    viewReady = pyqtSignal()  # the world view has a GL context
+
 
 event_bus = EventBus()
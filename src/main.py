@@ -1,26 +1,38 @@
 import sys
 
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication
 
 from .appstate import newAppState
 from .events import KeyFilter
 from .window.mainwindow import MainWindow
 
-def main():
-    app = QApplication(sys.argv)
+
+def createWindow(app: QApplication) -> MainWindow:
+    """
+    Build and show the main window with only Qt and NumPy loaded; the
+    OpenGL view follows via MainWindow.loadView.
+    """
     app.setWindowIcon(QIcon("res/icons/favicon.ico"))
-    key_filter = KeyFilter()
-    app.installEventFilter(key_filter)
+    app.key_filter = KeyFilter()
+    app.installEventFilter(app.key_filter)
     state = newAppState()
 
     w = MainWindow(state)
     # w.resize(2560, 1440)
     w.resize(1920, 1080)
     w.show()
+    return w
+
+
+def main():
+    app = QApplication(sys.argv)
+    w = createWindow(app)
+    QTimer.singleShot(0, w.loadView)
 
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
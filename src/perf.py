@@ -0,0 +1,191 @@
+"""
+Opt-in performance instrumentation.
+
+Everything is gated on the module-level `enabled` flag: hot paths test
+`perf.enabled` before touching any counter, and stage() hands back a
+shared no-op context manager, so a disabled build pays one attribute
+lookup per call site. Enable with F3 in the world view or by setting
+DUNGEONBUILDER_PERF=1.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+
+from .cachedirs import cacheDir
+
+enabled: bool = bool(os.environ.get("DUNGEONBUILDER_PERF"))
+
+_NULL = nullcontext()
+
+
+class FrameStats:
+    """
+    Counters of the frame being drawn plus a window of recent frame times.
+    """
+
+    def __init__(self, window: int = 120):
+        self.times: deque[float] = deque(maxlen=window)
+        self.draw_calls = 0
+        self.triangles = 0
+        self.objects = 0
+        self.last: tuple[int, int, int] = (0, 0, 0)
+        self._start = 0.0
+
+    def begin(self) -> None:
+        self.draw_calls = self.triangles = self.objects = 0
+        self._start = time.perf_counter()
+
+    def end(self) -> None:
+        self.times.append(time.perf_counter() - self._start)
+        self.last = (self.draw_calls, self.triangles, self.objects)
+
+    def count(self, draw_calls: int, triangles: int, objects: int = 0) -> None:
+        self.draw_calls += draw_calls
+        self.triangles += triangles
+        self.objects += objects
+
+
+class StageStats:
+    """
+    Call count, total and worst time per named stage.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, list[float]] = {}  # name -> [count, total, max]
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def clear(self) -> None:
+        self.stages.clear()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stages.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+frame = FrameStats()
+stages = StageStats()
+
+
+def stage(name: str):
+    """
+    with perf.stage("import.load"): ... records the block's wall time.
+    """
+    return _Stage(name) if enabled else _NULL
+
+
+def log(message: str) -> None:
+    if enabled:
+        print(message)
+
+
+def setEnabled(on: bool) -> None:
+    global enabled
+    enabled = on
+    if on:
+        frame.times.clear()
+
+
+def tileMemory(tiles) -> tuple[int, int]:
+    """
+    (cpu, gpu) bytes held by TileData meshes and their vertex buffers.
+    """
+    cpu = gpu = 0
+    for tile in tiles:
+        cpu += tile.cpu_bytes
+        gpu += tile.gpu_bytes
+    return cpu, gpu
+
+
+def hudLines(world) -> list[str]:
+    times = frame.times
+    lines = []
+    if times:
+        avg = sum(times) / len(times)
+        lines.append(
+            f"frame {times[-1] * 1e3:6.2f} ms  avg {avg * 1e3:6.2f}"
+            f"  max {max(times) * 1e3:6.2f}"
+        )
+    draws, tris, objects = frame.last
+    lines.append(f"draws {draws}  triangles {tris:,}  objects {objects:,}")
+
+    cpu, gpu = tileMemory(world.tile_meshes.values())
+    lines.append(
+        f"tiles {len(world.tile_meshes)}  cpu {cpu / 2**20:.1f} MB"
+        f"  gpu {gpu / 2**20:.1f} MB"
+    )
+
+    for name, (count, total, worst) in sorted(stages.stages.items()):
+        lines.append(
+            f"{name:<18} {count:5d}x  {total * 1e3:9.1f} ms  max {worst * 1e3:8.1f}"
+        )
+
+    lines.append("F4 stop capture" if capturing() else "F4 capture profile")
+    return lines
+
+
+# on-demand cProfile + tracemalloc capture
+
+_profiler: cProfile.Profile | None = None
+
+
+def capturing() -> bool:
+    return _profiler is not None
+
+
+def startCapture() -> None:
+    global _profiler
+    if _profiler is not None:
+        return
+    tracemalloc.start(25)
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stopCapture(folder: str | None = None) -> str | None:
+    """
+    Stop the running capture and write <stamp>.prof (load with pstats or
+    snakeviz) and <stamp>.txt (top functions and allocation sites).
+    Returns the .prof path.
+    """
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    folder = folder or cacheDir("profiles")
+    os.makedirs(folder, exist_ok=True)
+    base = os.path.join(folder, time.strftime("profile-%Y%m%d-%H%M%S"))
+    profiler.dump_stats(base + ".prof")
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    out.write("\nTop allocation sites\n")
+    for stat in snapshot.statistics("lineno")[:40]:
+        out.write(f"{stat}\n")
+    with open(base + ".txt", "w") as f:
+        f.write(out.getvalue())
+    return base + ".prof"
@@ -0,0 +1,131 @@
+import math
+
+import numpy as np
+
+FOV_Y = 45
+NEAR = 0.1
+FAR = 2000.0
+
+
+def lookAt(eye, target, up=(0.0, 0.0, 1.0)) -> np.ndarray:
+    """
+    4x4 view matrix (row-major, column vectors) equal to gluLookAt.
+    """
+    eye = np.asarray(eye, dtype=np.float64)
+    f = np.asarray(target, dtype=np.float64) - eye
+    f /= np.linalg.norm(f)
+    s = np.cross(f, up)
+    s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+
+    m = np.identity(4)
+    m[0, :3] = s
+    m[1, :3] = u
+    m[2, :3] = -f
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+def perspective(fov_y: float, aspect: float, near: float, far: float) -> np.ndarray:
+    """
+    4x4 projection matrix equal to gluPerspective.
+    """
+    f = 1.0 / math.tan(math.radians(fov_y) / 2)
+    m = np.zeros((4, 4))
+    m[0, 0] = f / aspect
+    m[1, 1] = f
+    m[2, 2] = (far + near) / (near - far)
+    m[2, 3] = 2 * far * near / (near - far)
+    m[3, 2] = -1.0
+    return m
+
+
+class CameraFrame:
+    """
+    View and projection of a WorldCamera for one viewport, plus the camera
+    basis for picking. width and height are in the same units as mouse
+    event coordinates; device_height (framebuffer pixels) only feeds
+    pixel_scale for level-of-detail selection.
+    """
+
+    def __init__(
+        self,
+        camera,
+        width: int,
+        height: int,
+        device_height: int | None = None,
+        fov_y: float = FOV_Y,
+        near: float = NEAR,
+        far: float = FAR,
+    ):
+        self.width = max(width, 1)
+        self.height = max(height, 1)
+
+        phi = math.radians(camera.elev)
+        th = math.radians(camera.azim)
+        px, py = camera.pan.x(), camera.pan.y()
+        self.target = np.array([px, py, 0.0])
+        self.eye = np.array(
+            [
+                px + camera.dist * math.cos(phi) * math.cos(th),
+                py + camera.dist * math.cos(phi) * math.sin(th),
+                camera.dist * math.sin(phi),
+            ]
+        )
+
+        self.view = lookAt(self.eye, self.target)
+        aspect = self.width / self.height
+        self.projection = perspective(fov_y, aspect, near, far)
+
+        # camera basis as plain floats: a pick is a handful of multiplies
+        tan_half = math.tan(math.radians(fov_y) / 2)
+        self._right = tuple((self.view[0, :3] * tan_half * aspect).tolist())
+        self._up = tuple((self.view[1, :3] * tan_half).tolist())
+        self._forward = tuple((-self.view[2, :3]).tolist())
+        self._origin = tuple(self.eye.tolist())
+        self.pixel_scale = (device_height or self.height) / (2 * tan_half)
+
+    def ray(self, x: float, y: float) -> tuple[tuple, tuple]:
+        """
+        (origin, direction) through window position x, y (origin top-left).
+        """
+        nx = 2.0 * x / self.width - 1.0
+        ny = 1.0 - 2.0 * y / self.height
+        r, u, f = self._right, self._up, self._forward
+        direction = (
+            f[0] + nx * r[0] + ny * u[0],
+            f[1] + nx * r[1] + ny * u[1],
+            f[2] + nx * r[2] + ny * u[2],
+        )
+        return self._origin, direction
+
+    def pickPlane(self, x: float, y: float, z: float = 0.0) -> list[float] | None:
+        """
+        Point where the ray through x, y meets the horizontal plane at
+        height z, or None when it points away from it.
+        """
+        (ox, oy, oz), (dx, dy, dz) = self.ray(x, y)
+        if abs(dz) < 1e-12:
+            return None
+        t = (z - oz) / dz
+        if t <= 0:
+            return None
+        return [ox + t * dx, oy + t * dy, z]
+
+    def visible(self, points: np.ndarray, margin: float = 0.0) -> np.ndarray:
+        """
+        Bool mask of the (N, 3) world points inside the view frustum, with
+        the screen edges widened by margin in NDC units.
+        """
+        pts = np.asarray(points, dtype=np.float64)
+        clip = (
+            np.hstack((pts, np.ones((len(pts), 1)))) @ (self.projection @ self.view).T
+        )
+        w = clip[:, 3]
+        lim = w * (1.0 + margin)
+        return (
+            (w > 0)
+            & (np.abs(clip[:, 0]) <= lim)
+            & (np.abs(clip[:, 1]) <= lim)
+            & (np.abs(clip[:, 2]) <= w)
+        )
@@ -0,0 +1,440 @@
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from .. import perf
+from ..resources.tilemesh import BOX_FACES, VERTEX_STRIDE
+from ..world.world import LAYER_GHOST, LAYER_SHOWN, World
+from .lod import TRIANGLE_BUDGET, LevelPlan, planLevels
+
+ROOT_MARKER_SIZE = 5
+
+GHOST_COLOR = (0.6, 0.75, 1.0, 0.15)
+
+_VERTEX_SHADER = """
+#version 120
+attribute vec3 a_position;
+attribute vec3 a_normal;
+attribute vec4 a_instance;  // x, y, z, rotation in degrees
+uniform vec2 u_half_size;   // bb.size.xy / 2, same shift as the ghost cursor
+varying vec3 v_normal;
+varying vec4 v_color;
+
+void main() {
+    float r = radians(a_instance.w);
+    float c = cos(r);
+    float s = sin(r);
+    mat3 rot = mat3(c, s, 0.0, -s, c, 0.0, 0.0, 0.0, 1.0);
+    vec3 world = rot * (a_position + vec3(u_half_size, 0.0)) + a_instance.xyz;
+
+    v_normal = gl_NormalMatrix * (rot * a_normal);
+    v_color = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(world, 1.0);
+}
+"""
+
+# Matches the fixed-function setup in scene.initSceneState: one
+# directional light, colour material driving ambient and diffuse.
+_FRAGMENT_SHADER = """
+#version 120
+varying vec3 v_normal;
+varying vec4 v_color;
+
+void main() {
+    vec3 n = normalize(v_normal);
+    vec3 l = normalize(gl_LightSource[0].position.xyz);
+    float diffuse = max(dot(n, l), 0.0);
+    vec3 light = gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+               + gl_LightSource[0].diffuse.rgb * diffuse;
+    gl_FragColor = vec4(v_color.rgb * light, v_color.a);
+}
+"""
+
+_ATTR_POSITION = 0
+_ATTR_NORMAL = 1
+_ATTR_INSTANCE = 2
+
+
+class InstanceBatches:
+    """
+    Per-mesh_id instance arrays (x, y, z, rotation) and the vertices of all
+    root markers, rebuilt from World.objects only when World.revision moves.
+    With a layer, only that floor's objects are kept and only edits on that
+    floor (World.layerRevision) trigger a rebuild.
+    """
+
+    def __init__(self, layer: int | None = None):
+        self.layer = layer
+        self.revision = None
+        self.instances: dict[int, np.ndarray] = {}  # mesh_id -> (N, 4) float32
+        self.roots: np.ndarray = np.empty((0, 3), dtype=np.float32)
+
+    def sync(self, world: World) -> bool:
+        revision = (
+            world.revision if self.layer is None else world.layerRevision(self.layer)
+        )
+        if self.revision == revision:
+            return False
+        self.revision = revision
+
+        objects = world.objects
+        rows = np.column_stack((objects.mesh_id, objects.pos, objects.rotation)).astype(
+            np.float64
+        )
+        if self.layer is not None:
+            rows = rows[np.round(rows[:, 3] / world.layer_height) == self.layer]
+
+        # group rows by mesh_id
+        order = np.argsort(rows[:, 0], kind='stable')
+        rows = rows[order]
+        mesh_ids, starts = np.unique(rows[:, 0], return_index=True)
+        groups = (
+            np.split(rows[:, 1:].astype(np.float32), starts[1:]) if len(rows) else []
+        )
+        self.instances = {
+            int(mesh_id): group for mesh_id, group in zip(mesh_ids, groups)
+        }
+
+        # one quad per object, slightly below the floor
+        h = ROOT_MARKER_SIZE / 2
+        quad = np.array(
+            [[-h, -h, -0.1], [h, -h, -0.1], [h, h, -0.1], [-h, h, -0.1]],
+            dtype=np.float32,
+        )
+        self.roots = (rows[:, None, 1:4].astype(np.float32) + quad).reshape(-1, 3)
+        return True
+
+
+def ghostBoxes(instances: dict[int, np.ndarray], tiles: dict) -> np.ndarray:
+    """
+    Bounding-box triangles of every instance, already placed in the world,
+    so a whole floor draws as one translucent vertex array.
+    """
+    parts = []
+    for mesh_id, data in instances.items():
+        tile = tiles.get(mesh_id)
+        if tile is None or not len(data):
+            continue
+        box = np.asarray(tile.bb.vertices, dtype=np.float32)[BOX_FACES].reshape(-1, 3)
+        box = box + (tile.bb.size[0] / 2, tile.bb.size[1] / 2, 0)
+        r = np.radians(data[:, 3])
+        c, s = np.cos(r)[:, None], np.sin(r)[:, None]
+        x = c * box[None, :, 0] - s * box[None, :, 1] + data[:, 0:1]
+        y = s * box[None, :, 0] + c * box[None, :, 1] + data[:, 1:2]
+        z = np.broadcast_to(box[None, :, 2], x.shape) + data[:, 2:3]
+        parts.append(np.stack((x, y, z), axis=2).reshape(-1, 3))
+    if not parts:
+        return np.empty((0, 3), dtype=np.float32)
+    return np.concatenate(parts).astype(np.float32)
+
+
+class _LayerDraw:
+    """
+    GL buffers for one floor. Each floor syncs, plans and uploads on its
+    own, so editing one leaves every other floor's buffers untouched.
+    """
+
+    def __init__(self, layer: int):
+        self.batches = InstanceBatches(layer)
+        self.plans: dict[int, LevelPlan] = {}
+        self.plan_key = None
+        self.instance_vbos: dict[int, int] = {}
+        self.root_vbo: int = int(glGenBuffers(1))
+        self.ghost_vbo: int = int(glGenBuffers(1))
+        self.ghost_key = None
+        self.ghost_count = 0
+
+    def dispose(self) -> None:
+        for vbo in self.instance_vbos.values():
+            glDeleteBuffers(1, [vbo])
+        self.instance_vbos.clear()
+        glDeleteBuffers(1, [self.root_vbo])
+        glDeleteBuffers(1, [self.ghost_vbo])
+
+
+class InstanceRenderer:
+    """
+    Draws placed objects with one instanced call per tile type and level of
+    detail, and all root markers with a single draw. Every floor keeps its
+    own batches and buffers: hidden floors cost nothing, ghosted ones a
+    single translucent draw. Needs a current GL context; falls back to
+    per-object drawing when instancing or shaders are unavailable.
+    """
+
+    def __init__(self):
+        self.layers: dict[int, _LayerDraw] = {}
+        self._program: int | None = None
+        self._half_size_loc: int = -1
+
+        if bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor):
+            try:
+                self._program = self._buildProgram()
+            except RuntimeError as e:
+                print(f"Instanced rendering disabled: {e}")
+        self._half_size_loc = (
+            glGetUniformLocation(self._program, "u_half_size") if self._program else -1
+        )
+
+    def dispose(self) -> None:
+        for draw in self.layers.values():
+            draw.dispose()
+        self.layers.clear()
+        if self._program:
+            glDeleteProgram(self._program)
+            self._program = None
+
+    def sync(self, world: World) -> None:
+        ids = world.layerIds()
+        for layer in list(self.layers):
+            if layer not in ids:
+                self.layers.pop(layer).dispose()
+
+        for layer in ids:
+            draw = self.layers.get(layer)
+            if draw is None:
+                draw = self.layers[layer] = _LayerDraw(layer)
+            if not draw.batches.sync(world):
+                continue
+
+            for mesh_id in list(draw.instance_vbos):
+                if mesh_id not in draw.batches.instances:
+                    glDeleteBuffers(1, [draw.instance_vbos.pop(mesh_id)])
+
+            roots = draw.batches.roots
+            glBindBuffer(GL_ARRAY_BUFFER, draw.root_vbo)
+            glBufferData(GL_ARRAY_BUFFER, roots.nbytes, roots, GL_DYNAMIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def instances(self, world: World) -> dict[int, np.ndarray]:
+        """
+        Instance arrays of the shown floors merged per mesh_id.
+        """
+        self.sync(world)
+        merged: dict[int, list[np.ndarray]] = {}
+        for layer, draw in self.layers.items():
+            if world.layerMode(layer) == LAYER_SHOWN:
+                for mesh_id, data in draw.batches.instances.items():
+                    merged.setdefault(mesh_id, []).append(data)
+        return {mesh_id: np.concatenate(parts) for mesh_id, parts in merged.items()}
+
+    def _syncPlans(
+        self,
+        draw: _LayerDraw,
+        world: World,
+        eye: np.ndarray,
+        pixel_scale: float,
+        budget: int,
+    ) -> None:
+        # re-pick levels only when the floor's placement or the view changed
+        key = (
+            draw.batches.revision,
+            tuple(np.round(eye, 3)),
+            round(pixel_scale, 3),
+            budget,
+        )
+        if key == draw.plan_key:
+            return
+        draw.plan_key = key
+
+        draw.plans = planLevels(
+            draw.batches.instances, world.tile_meshes, eye, pixel_scale, budget
+        )
+        for mesh_id, plan in draw.plans.items():
+            vbo = draw.instance_vbos.get(mesh_id)
+            if vbo is None:
+                vbo = draw.instance_vbos[mesh_id] = int(glGenBuffers(1))
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBufferData(
+                GL_ARRAY_BUFFER, plan.instances.nbytes, plan.instances, GL_DYNAMIC_DRAW
+            )
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def drawObjects(
+        self,
+        world: World,
+        eye: np.ndarray,
+        pixel_scale: float,
+        budget: int = TRIANGLE_BUDGET,
+    ) -> None:
+        """
+        eye is the camera position; pixel_scale converts a world-space size
+        at distance 1 into pixels (viewport height / (2 tan(fov / 2))).
+        The triangle budget is shared by the shown floors in proportion to
+        their object counts.
+        """
+        self.sync(world)
+        shown = [
+            draw
+            for layer, draw in self.layers.items()
+            if world.layerMode(layer) == LAYER_SHOWN
+        ]
+        counts = [
+            sum(len(data) for data in draw.batches.instances.values()) for draw in shown
+        ]
+        total = max(sum(counts), 1)
+        for draw, count in zip(shown, counts):
+            if count:
+                self._syncPlans(
+                    draw, world, eye, pixel_scale, max(budget * count // total, 1)
+                )
+                self._drawPlans(draw, world)
+
+        ghosts = [
+            draw
+            for layer, draw in self.layers.items()
+            if world.layerMode(layer) == LAYER_GHOST
+        ]
+        if ghosts:
+            self._drawGhosts(ghosts, world)
+
+    def _drawPlans(self, draw: _LayerDraw, world: World) -> None:
+        if perf.enabled:
+            for plan in draw.plans.values():
+                perf.frame.count(len(plan.ranges), plan.triangles, len(plan.instances))
+        if self._program is None:
+            self._drawObjectsFallback(draw, world)
+            return
+
+        glUseProgram(self._program)
+        glEnableVertexAttribArray(_ATTR_POSITION)
+        glEnableVertexAttribArray(_ATTR_NORMAL)
+        glEnableVertexAttribArray(_ATTR_INSTANCE)
+        glVertexAttribDivisor(_ATTR_INSTANCE, 1)
+
+        for mesh_id, plan in draw.plans.items():
+            tile = world.tile_meshes.get(mesh_id)
+            if tile is None or not tile.levels:
+                continue
+            glUniform2f(self._half_size_loc, tile.bb.size[0] / 2, tile.bb.size[1] / 2)
+
+            for level, start, count in plan.ranges:
+                lvl = tile.levels[level]
+                glBindBuffer(GL_ARRAY_BUFFER, lvl.vbo_id)
+                glVertexAttribPointer(
+                    _ATTR_POSITION,
+                    3,
+                    GL_FLOAT,
+                    GL_FALSE,
+                    VERTEX_STRIDE,
+                    ctypes.c_void_p(0),
+                )
+                glVertexAttribPointer(
+                    _ATTR_NORMAL,
+                    3,
+                    GL_FLOAT,
+                    GL_FALSE,
+                    VERTEX_STRIDE,
+                    ctypes.c_void_p(12),
+                )
+                glBindBuffer(GL_ARRAY_BUFFER, draw.instance_vbos[mesh_id])
+                glVertexAttribPointer(
+                    _ATTR_INSTANCE,
+                    4,
+                    GL_FLOAT,
+                    GL_FALSE,
+                    0,
+                    ctypes.c_void_p(start * 16),
+                )
+
+                glDrawArraysInstanced(GL_TRIANGLES, 0, lvl.vertex_count, count)
+
+        glVertexAttribDivisor(_ATTR_INSTANCE, 0)
+        glDisableVertexAttribArray(_ATTR_INSTANCE)
+        glDisableVertexAttribArray(_ATTR_NORMAL)
+        glDisableVertexAttribArray(_ATTR_POSITION)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def _drawGhosts(self, ghosts: list[_LayerDraw], world: World) -> None:
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT | GL_DEPTH_BUFFER_BIT)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDisable(GL_LIGHTING)
+        glDepthMask(GL_FALSE)
+        glColor4f(*GHOST_COLOR)
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        for draw in ghosts:
+            # the floor's revision also moves when a tile (and so its bounds) changes
+            if draw.batches.revision != draw.ghost_key:
+                draw.ghost_key = draw.batches.revision
+                boxes = ghostBoxes(draw.batches.instances, world.tile_meshes)
+                draw.ghost_count = len(boxes)
+                glBindBuffer(GL_ARRAY_BUFFER, draw.ghost_vbo)
+                glBufferData(GL_ARRAY_BUFFER, boxes.nbytes, boxes, GL_DYNAMIC_DRAW)
+            if draw.ghost_count == 0:
+                continue
+            if perf.enabled:
+                perf.frame.count(1, draw.ghost_count // 3)
+            glBindBuffer(GL_ARRAY_BUFFER, draw.ghost_vbo)
+            glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+            glDrawArrays(GL_TRIANGLES, 0, draw.ghost_count)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glPopAttrib()
+
+    def drawRoots(self, world: World) -> None:
+        """
+        Root markers of the floor being edited.
+        """
+        self.sync(world)
+        draw = self.layers.get(world.active_layer)
+        count = len(draw.batches.roots) if draw is not None else 0
+        if count == 0:
+            return
+
+        if perf.enabled:
+            perf.frame.count(1, count // 2)
+
+        glBindBuffer(GL_ARRAY_BUFFER, draw.root_vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+        glDrawArrays(GL_QUADS, 0, count)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _drawObjectsFallback(self, draw: _LayerDraw, world: World) -> None:
+        for mesh_id, plan in draw.plans.items():
+            mesh = world.tile_meshes[mesh_id]
+            for level, start, count in plan.ranges:
+                for x, y, z, rotation in plan.instances[start : start + count].tolist():
+                    glPushMatrix()
+                    glTranslatef(x, y, z)
+                    glRotatef(rotation, 0, 0, 1)
+                    glTranslatef(mesh.bb.size[0] / 2, mesh.bb.size[1] / 2, 0)
+                    mesh.draw(level)
+                    glPopMatrix()
+
+    def _buildProgram(self) -> int:
+        shaders = [
+            self._compileShader(GL_VERTEX_SHADER, _VERTEX_SHADER),
+            self._compileShader(GL_FRAGMENT_SHADER, _FRAGMENT_SHADER),
+        ]
+
+        program = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program, shader)
+        glBindAttribLocation(program, _ATTR_POSITION, "a_position")
+        glBindAttribLocation(program, _ATTR_NORMAL, "a_normal")
+        glBindAttribLocation(program, _ATTR_INSTANCE, "a_instance")
+        glLinkProgram(program)
+        for shader in shaders:
+            glDeleteShader(shader)
+
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            log = glGetProgramInfoLog(program)
+            glDeleteProgram(program)
+            raise RuntimeError(log.decode() if isinstance(log, bytes) else log)
+        return program
+
+    def _compileShader(self, kind, source: str) -> int:
+        shader = glCreateShader(kind)
+        glShaderSource(shader, source.lstrip())  # #version must come first
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            log = glGetShaderInfoLog(shader)
+            glDeleteShader(shader)
+            raise RuntimeError(log.decode() if isinstance(log, bytes) else log)
+        return shader
@@ -0,0 +1,106 @@
+import numpy as np
+
+# Projected bounding-sphere radius (px) below which an instance drops to the
+# next level: full mesh, 25%, 5%, bounding-box proxy.
+LOD_PIXEL_THRESHOLDS = np.array([120.0, 40.0, 12.0])
+
+# Scene-wide triangle budget; thresholds are raised until the frame fits.
+TRIANGLE_BUDGET = 2_000_000
+
+_BUDGET_STEP = 1.5
+_BUDGET_TRIES = 12
+
+
+class LevelPlan:
+    """
+    Instances of one tile type sorted by level, with the contiguous range
+    drawn from each level: ranges is a list of (level, start, count).
+    """
+
+    def __init__(
+        self, instances: np.ndarray, ranges: list[tuple[int, int, int]], triangles: int
+    ):
+        self.instances = instances
+        self.ranges = ranges
+        self.triangles = triangles
+
+
+def screenRadius(
+    instances: np.ndarray, size: np.ndarray, eye: np.ndarray, pixel_scale: float
+) -> np.ndarray:
+    """
+    Projected bounding-sphere radius in pixels for (N, 4) x, y, z, rotation
+    instances of a tile with bounding-box size `size`.
+    """
+    hx, hy, hz = size / 2
+    r = np.radians(instances[:, 3])
+    c, s = np.cos(r), np.sin(r)
+    center = np.column_stack(
+        (
+            instances[:, 0] + c * hx - s * hy,
+            instances[:, 1] + s * hx + c * hy,
+            instances[:, 2] + hz,
+        )
+    )
+    dist = np.maximum(np.linalg.norm(center - eye, axis=1), 1e-3)
+    return np.linalg.norm(size) / 2 / dist * pixel_scale
+
+
+def levelIndex(radius_px: np.ndarray, scale: float, level_count: int) -> np.ndarray:
+    """
+    Map projected radii to indices into TileData.levels, whose last entry
+    is always the bounding-box proxy even when coarser meshes are missing.
+    """
+    wanted = (radius_px[:, None] < LOD_PIXEL_THRESHOLDS[None, :] * scale).sum(axis=1)
+    proxy = level_count - 1
+    return np.where(
+        wanted >= len(LOD_PIXEL_THRESHOLDS),
+        proxy,
+        np.minimum(wanted, max(proxy - 1, 0)),
+    )
+
+
+def planLevels(
+    instances: dict[int, np.ndarray],
+    tiles: dict,
+    eye: np.ndarray,
+    pixel_scale: float,
+    budget: int = TRIANGLE_BUDGET,
+) -> dict[int, LevelPlan]:
+    radii = {}
+    for mesh_id, data in instances.items():
+        tile = tiles.get(mesh_id)
+        if tile is None or not tile.levels:
+            continue
+        radii[mesh_id] = screenRadius(data, tile.bb.size, eye, pixel_scale)
+
+    scale = 1.0
+    for _ in range(_BUDGET_TRIES):
+        levels = {}
+        total = 0
+        for mesh_id, radius in radii.items():
+            tile = tiles[mesh_id]
+            lv = levelIndex(radius, scale, len(tile.levels))
+            per_level = np.array([level.triangles for level in tile.levels])
+            total += int(per_level[lv].sum())
+            levels[mesh_id] = lv
+        if total <= budget:
+            break
+        scale *= _BUDGET_STEP
+
+    plans = {}
+    for mesh_id, lv in levels.items():
+        order = np.argsort(lv, kind='stable')
+        counts = np.bincount(lv, minlength=len(tiles[mesh_id].levels))
+        starts = np.cumsum(counts) - counts
+        ranges = [
+            (int(level), int(starts[level]), int(counts[level]))
+            for level in np.flatnonzero(counts)
+        ]
+        triangles = sum(
+            tiles[mesh_id].levels[level].triangles * count for level, _, count in ranges
+        )
+        plans[mesh_id] = LevelPlan(
+            np.ascontiguousarray(instances[mesh_id][order]), ranges, triangles
+        )
+    return plans
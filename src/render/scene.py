@@ -0,0 +1,22 @@
+from OpenGL.GL import *
+
+
+def initSceneState(clear_color=(0.2, 0.2, 0.2, 1.0)) -> None:
+    """
+    Depth test, colour material and the single directional light shared by
+    the editor view and offscreen map export. Call with the modelview at
+    identity so the light stays fixed relative to the camera.
+    """
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_NORMALIZE)
+    glEnable(GL_COLOR_MATERIAL)
+    glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
+    glShadeModel(GL_SMOOTH)
+    glClearColor(*clear_color)
+
+    # lighting
+    glEnable(GL_LIGHTING)
+    glEnable(GL_LIGHT0)
+    glLightfv(GL_LIGHT0, GL_POSITION, [0.5, 1.0, 0.8, 0.0])
+    glLightfv(GL_LIGHT0, GL_AMBIENT, [0.3, 0.3, 0.3, 1.0])
+    glLightfv(GL_LIGHT0, GL_DIFFUSE, [0.7, 0.7, 0.7, 1.0])
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import struct
+import time
+
+import numpy as np
+
+from ..cachedirs import cacheDir
+from . import meshlogic
+from .meshlogic import ProcessedMesh, WorldDims
+
+MAGIC = b'VRMC'
+VERSION = 2
+
+# magic, version, n_verts, n_faces, raw_faces, max_faces, bb min/max, dims size,
+# dims vol, n_lods
+_HEADER = struct.Struct('<4sH2xIIII6d3qqI')
+_LEVEL = struct.Struct(
+    '<II'
+)  # n_verts, n_faces of each coarser level, after the header
+_DATA_OFFSET = (
+    256  # level 0 vertices start here; faces and coarser levels follow directly
+)
+
+
+class MeshCache:
+    """
+    Processed (decimated) tile meshes stored one file per source STL, in
+    the per-user cache next to the thumbnail pack.
+
+    Entries are keyed on the source file's path, size and mtime. The face
+    budget is stored alongside and checked against meshlogic.faceBudget, so
+    changing the budget formula invalidates old entries. Geometry is read
+    back through np.memmap; the folder is trimmed to max_bytes by evicting
+    the least recently used entries.
+    """
+
+    def __init__(self, folder=None, max_bytes=1024 * 1024 * 1024):
+        self.folder = folder or cacheDir("meshes")
+        self.max_bytes = max_bytes
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _entryPath(self, path: str) -> str | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(
+            self.folder, hashlib.sha256(key.encode()).hexdigest() + ".mesh"
+        )
+
+    def contains(self, path: str) -> bool:
+        entry = self._entryPath(path)
+        return entry is not None and os.path.exists(entry)
+
+    def load(self, path: str) -> ProcessedMesh | None:
+        start = time.perf_counter()
+        entry = self._entryPath(path)
+        if entry is None or not os.path.exists(entry):
+            return None
+
+        try:
+            with open(entry, "rb") as f:
+                raw = f.read(_DATA_OFFSET)
+            magic, version, n_verts, n_faces, raw_faces, max_faces, *rest = (
+                _HEADER.unpack_from(raw)
+            )
+            if magic != MAGIC or version != VERSION:
+                return None
+
+            bounds, size, vol, n_lods = rest[:6], rest[6:9], rest[9], rest[10]
+            dims = WorldDims(size=np.array(size, dtype=int), vol=vol)
+            if meshlogic.faceBudget(dims) != max_faces:
+                return None  # budget formula changed since this entry was written
+            bb = meshlogic.boundingBoxFromCorners(
+                np.array(bounds[:3]), np.array(bounds[3:])
+            )
+
+            levels = [(n_verts, n_faces)] + [
+                _LEVEL.unpack_from(raw, _HEADER.size + i * _LEVEL.size)
+                for i in range(n_lods)
+            ]
+            arrays = []
+            offset = _DATA_OFFSET
+            for lv, lf in levels:
+                vertices = np.memmap(
+                    entry, dtype='<f4', mode='r', offset=offset, shape=(lv, 3)
+                )
+                offset += vertices.nbytes
+                faces = np.memmap(
+                    entry, dtype='<u4', mode='r', offset=offset, shape=(lf, 3)
+                )
+                offset += faces.nbytes
+                arrays.append((vertices, faces))
+        except (OSError, ValueError, struct.error):
+            return None
+
+        try:
+            os.utime(entry)  # mark as recently used
+        except OSError:
+            # trimmed meanwhile or a read-only cache: the arrays are mapped already
+            pass
+        (vertices, faces), *lods = arrays
+        return ProcessedMesh(
+            path,
+            vertices,
+            faces,
+            bb,
+            dims,
+            raw_faces,
+            max_faces,
+            lods,
+            {"import.cache": time.perf_counter() - start},
+        )
+
+    def store(self, result: ProcessedMesh) -> None:
+        entry = self._entryPath(result.path)
+        if entry is None:
+            return
+
+        levels = [
+            (np.ascontiguousarray(v, dtype='<f4'), np.ascontiguousarray(f, dtype='<u4'))
+            for v, f in [(result.vertices, result.faces), *result.lods]
+        ]
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            len(levels[0][0]),
+            len(levels[0][1]),
+            result.raw_faces,
+            result.max_faces,
+            *result.bb.min_corner.tolist(),
+            *result.bb.max_corner.tolist(),
+            *result.dims.size.tolist(),
+            int(result.dims.vol),
+            len(levels) - 1,
+        )
+        header += b''.join(_LEVEL.pack(len(v), len(f)) for v, f in levels[1:])
+
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(header.ljust(_DATA_OFFSET, b'\0'))
+                for vertices, faces in levels:
+                    f.write(vertices.tobytes())
+                    f.write(faces.tobytes())
+            os.replace(tmp, entry)
+        except OSError as e:
+            # read-only or full cache folder, or on Windows a memmap from
+            # load() still holding the entry; the cache is only an
+            # optimization, the caller keeps its result
+            print(f"Mesh cache entry for {result.path} not written: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def trim(self) -> None:
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(".mesh"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                continue  # still mapped by a live mesh
+            total -= size
+
+
+# Worker entry point: process a source STL and write the result to the cache.
+def processCached(path: str, folder: str) -> ProcessedMesh:
+    result = meshlogic.processMesh(path)
+    MeshCache(folder).store(result)
+    return result
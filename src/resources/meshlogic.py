@@ -1,7 +1,23 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 import numpy as np
-import trimesh
+
+from . import stlio
+
+# trimesh is only needed to load and decimate; dims, bounding boxes and tile
+# names stay importable by headless tools that never touch a mesh.
+if TYPE_CHECKING:
+    import trimesh
+
+
+# world units per WorldDims step
+DIMS_UNIT = 25
 
 
 @dataclass
@@ -11,44 +27,76 @@ class WorldDims:
 
     def serialize(self) -> str:
         return 'x'.join(map(str, self.size.tolist()))
-    
+
+
 @dataclass
 class BoundingBox:
     min_corner: np.ndarray  # shape (3,)
     max_corner: np.ndarray  # shape (3,)
-    size: np.ndarray        # shape (3,)
-    center: np.ndarray      # shape (3,)
+    size: np.ndarray  # shape (3,)
+    center: np.ndarray  # shape (3,)
     center_offset: np.ndarray  # shape (3,)
     vertices: np.ndarray  # shape (8, 3)
 
+
 def loadMesh(path: str) -> trimesh.Geometry:
+    import trimesh
+
+    if path.lower().endswith(".stl"):
+        # memory-mapped read and vectorized welding; skips trimesh's
+        # generic loader and its processing pass
+        vertices, faces = stlio.readMesh(path)
+        return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
     return trimesh.load(path, force='mesh')
 
+
+def tileName(path: str, dims: WorldDims) -> str:
+    filename = os.path.basename(path)
+    return f"{filename.replace(' ', '_')} [{dims.serialize()}]"
+
+
 def createDims(bb: BoundingBox) -> WorldDims:
-    size = np.round(bb.size / 25).astype(int)
+    size = np.round(bb.size / DIMS_UNIT).astype(int)
     size = np.maximum(size, 1)  # clamp each dim to at least 1
     volume = np.prod(size)
-    
+
     return WorldDims(size=size, vol=volume)
 
+
 def createBoundingBox(mesh: trimesh.Geometry) -> BoundingBox:
     verts = mesh.vertices
-    min_corner = verts.min(axis=0)
-    max_corner = verts.max(axis=0)
+    return boundingBoxFromCorners(verts.min(axis=0), verts.max(axis=0))
+
+
+def boundingBoxFromCorners(
+    min_corner: np.ndarray, max_corner: np.ndarray
+) -> BoundingBox:
     size = max_corner - min_corner
     center = (min_corner + max_corner) / 2
 
     center_offset = -center
     center_offset[2] = -min_corner[2]
 
-    corners = np.array([
-        [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
-        [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]
-    ], dtype=float)
+    corners = np.array(
+        [
+            [0, 0, 0],
+            [1, 0, 0],
+            [1, 1, 0],
+            [0, 1, 0],
+            [0, 0, 1],
+            [1, 0, 1],
+            [1, 1, 1],
+            [0, 1, 1],
+        ],
+        dtype=float,
+    )
     bbox_vertices = min_corner + corners * (max_corner - min_corner)
     bbox_vertices += center_offset
 
-    return BoundingBox(min_corner, max_corner, size, center, center_offset, bbox_vertices)
+    return BoundingBox(
+        min_corner, max_corner, size, center, center_offset, bbox_vertices
+    )
+
 
 def reduceMesh(mesh: trimesh.Geometry, max_faces: int) -> trimesh.Geometry:
     current_faces = mesh.faces.shape[0]
@@ -56,3 +104,70 @@ def reduceMesh(mesh: trimesh.Geometry, max_faces: int) -> trimesh.Geometry:
         reduction_fraction = 1 - (max_faces / current_faces)
         mesh = mesh.simplify_quadric_decimation(reduction_fraction)
     return mesh
+
+
+# Face fractions of the full-budget mesh for the coarser levels of detail.
+# The bounding-box proxy below the last level is built by TileData itself.
+LOD_FRACTIONS = (0.25, 0.05)
+LOD_MIN_FACES = 12
+
+
+def buildLods(mesh: trimesh.Geometry) -> list[tuple[np.ndarray, np.ndarray]]:
+    lods = []
+    full = mesh.faces.shape[0]
+    for fraction in LOD_FRACTIONS:
+        target = int(full * fraction)
+        if target < LOD_MIN_FACES:
+            break
+        mesh = reduceMesh(mesh, target)
+        lods.append((np.asarray(mesh.vertices), np.asarray(mesh.faces)))
+    return lods
+
+
+def faceBudget(dims: WorldDims) -> int:
+    return min(5000 * (max(round(math.log2(max(dims.vol, 2))), 1)), 25000)
+
+
+@dataclass
+class ProcessedMesh:
+    path: str
+    vertices: np.ndarray  # shape (V, 3)
+    faces: np.ndarray  # shape (F, 3)
+    bb: BoundingBox
+    dims: WorldDims
+    raw_faces: int
+    max_faces: int
+    lods: list[tuple[np.ndarray, np.ndarray]]  # coarser (vertices, faces) levels
+    # seconds per import stage where it ran (often a worker), for perf.stages
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def toMesh(self) -> trimesh.Trimesh:
+        import trimesh
+
+        return trimesh.Trimesh(vertices=self.vertices, faces=self.faces, process=False)
+
+
+# Runs in import worker processes: everything up to (but excluding) GL upload,
+# returning plain arrays so the result pickles cheaply back to the GUI process.
+def processMesh(path: str) -> ProcessedMesh:
+    t0 = time.perf_counter()
+    raw_mesh = loadMesh(path)
+    t1 = time.perf_counter()
+    bb = createBoundingBox(raw_mesh)
+    dims = createDims(bb)
+    max_faces = faceBudget(dims)
+    t2 = time.perf_counter()
+    mesh = reduceMesh(raw_mesh, max_faces)
+    lods = buildLods(mesh)
+    t3 = time.perf_counter()
+    return ProcessedMesh(
+        path,
+        np.asarray(mesh.vertices),
+        np.asarray(mesh.faces),
+        bb,
+        dims,
+        raw_mesh.faces.shape[0],
+        max_faces,
+        lods,
+        {"import.load": t1 - t0, "import.analyze": t2 - t1, "import.reduce": t3 - t2},
+    )
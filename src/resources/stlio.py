@@ -0,0 +1,112 @@
+import os
+import re
+
+import numpy as np
+
+# one binary STL triangle record
+STL_RECORD = np.dtype(
+    [
+        ('normal', '<f4', (3,)),
+        ('vertices', '<f4', (3, 3)),
+        ('attr', '<u2'),
+    ]
+)
+_BINARY_HEADER = 80
+
+_ASCII_VERTEX = re.compile(rb'vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)')
+
+
+def binaryTriangleCount(path: str) -> int | None:
+    """
+    Triangle count if path is a binary STL, None for ASCII. Binary files
+    are recognised by their size matching the declared record count, since
+    some exporters start binary headers with "solid".
+    """
+    size = os.path.getsize(path)
+    if size < _BINARY_HEADER + 4:
+        return None
+    with open(path, "rb") as f:
+        f.seek(_BINARY_HEADER)
+        count = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+    if size == _BINARY_HEADER + 4 + count * STL_RECORD.itemsize:
+        return count
+    return None
+
+
+def _asciiVertices(path: str) -> np.ndarray:
+    with open(path, "rb") as f:
+        text = f.read()
+    return np.array(_ASCII_VERTEX.findall(text), dtype=np.float64).reshape(-1, 3)
+
+
+def readTriangles(path: str) -> np.ndarray:
+    """
+    (F, 3, 3) float32 triangle corners. For binary STLs this is a strided
+    view into a read-only memory map of the file; nothing is copied until
+    the caller touches it.
+    """
+    count = binaryTriangleCount(path)
+    if count is not None:
+        if count == 0:
+            return np.empty((0, 3, 3), dtype=np.float32)
+        records = np.memmap(
+            path, dtype=STL_RECORD, mode='r', offset=_BINARY_HEADER + 4, shape=(count,)
+        )
+        return records['vertices']
+    verts = _asciiVertices(path).astype(np.float32)
+    return verts[: len(verts) // 3 * 3].reshape(-1, 3, 3)
+
+
+def weldVertices(triangles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge bit-identical corners into shared vertices: (vertices (V, 3)
+    float64, faces (F, 3) int64), dropping faces that collapse to a line
+    or point. One pass over the data plus a sort of 12-byte keys.
+    """
+    # always a copy: the triangles may be a read-only memmap view
+    corners = np.array(triangles.reshape(-1, 3), dtype=np.float32)
+    corners += 0.0  # -0.0 -> 0.0 so both weld together
+    keys = corners.view(np.dtype((np.void, 12))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    faces = inverse.reshape(-1, 3).astype(np.int64, copy=False)
+
+    ok = (
+        (faces[:, 0] != faces[:, 1])
+        & (faces[:, 1] != faces[:, 2])
+        & (faces[:, 0] != faces[:, 2])
+    )
+    if not ok.all():
+        faces = faces[ok]
+    return corners[first].astype(np.float64), faces
+
+
+def readMesh(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Welded (vertices, faces) of an STL without going through trimesh.
+    """
+    triangles = readTriangles(path)
+    if len(triangles) == 0:
+        raise ValueError(f"{path} contains no triangles")
+    return weldVertices(triangles)
+
+
+def readBounds(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (min_corner, max_corner) of an STL without building a mesh.
+    """
+    count = binaryTriangleCount(path)
+    if count is not None:
+        if count == 0:
+            raise ValueError(f"{path} contains no triangles")
+        records = np.memmap(
+            path, dtype=STL_RECORD, mode='r', offset=_BINARY_HEADER + 4, shape=(count,)
+        )
+        verts = records['vertices']
+        return verts.min(axis=(0, 1)).astype(np.float64), verts.max(axis=(0, 1)).astype(
+            np.float64
+        )
+
+    verts = _asciiVertices(path)
+    if len(verts) == 0:
+        raise ValueError(f"{path} contains no vertices")
+    return verts.min(axis=0), verts.max(axis=0)
@@ -1,37 +1,84 @@
-import math
+from __future__ import annotations
+
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING
 
-from PyQt5.QtCore import Qt
+import numpy as np
+from PyQt5.QtCore import QEventLoop, Qt, QTimer
+from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import (
     QApplication,
     QProgressDialog,
     QWidget,
 )
 
-from ..world.world import World
-from ..resources import meshlogic
-from ..resources.tilemesh import TileData
-from ..thumbnails.thumbcache import ThumbnailCache
+from .. import perf
 from ..events import event_bus
+from ..resources import meshlogic, stlio
+from ..resources.meshcache import MeshCache, processCached
+from ..resources.tilemeta import TileMetaCache
+from ..thumbnails.thumbcache import ThumbnailCache
+from ..world.world import World
 
-class STLLoader():
+if TYPE_CHECKING:
+    from ..resources.tilemesh import TileData
+    from ..window.worldwidget import WorldWidget
 
-    def __init__(self, world: World):
+
+class STLLoader:
+
+    def __init__(self, world: World, workers: int | None = None):
         self.world = world
 
         self.thumbcache: ThumbnailCache = ThumbnailCache()
+        self.meshcache: MeshCache = MeshCache()
+        self.tilemeta: TileMetaCache = TileMetaCache()
+        self.workers: int = (
+            workers if workers is not None else max((os.cpu_count() or 1) - 1, 1)
+        )
         self._abort_import = False
 
+        # lazy project loading
+        self._lazy_pending: deque[tuple[str, int]] = (
+            deque()
+        )  # cache hits still to register, in priority order
+        self._lazy_futures: dict = {}  # worker future -> (path, tile id)
+        self._lazy_executor: ProcessPoolExecutor | None = None
+        self._lazy_view: WorldWidget | None = None
+        self._lazy_timer = QTimer()
+        self._lazy_timer.setInterval(15)
+        self._lazy_timer.timeout.connect(self._lazyTick)
+        world.addListener(self._onWorldEdit)
+
+    def _onWorldEdit(self, kind: str, *args) -> None:
+        if kind == "reset":
+            self.cancelLazy()
+
     def importPaths(self, parent: QWidget, paths: list[str] | dict[int, str]):
         if not paths:
             return
 
-        total = len(paths) * 4
+        # (path, tile id) in on-disk order; tile ids only come from a project's
+        # tile_meshes
+        if isinstance(paths, dict):
+            jobs = [(path, int(key)) for key, path in paths.items()]
+        else:
+            jobs = []
+            for path in dict.fromkeys(paths):
+                if self.world.getTile(path) is None:  # skip duplicates
+                    jobs.append((path, None))
+        if not jobs:
+            return
+
+        parallel = self.workers > 1 and len(jobs) > 1
         dlg = QProgressDialog(parent)
         dlg.setWindowTitle("Importing tiles...")
         dlg.setLabelText("Starting import...")
         dlg.setMinimum(0)
-        dlg.setMaximum(total)
+        dlg.setMaximum(len(jobs) if parallel else len(jobs) * 4)
         dlg.setWindowModality(Qt.WindowModal)
         dlg.setCancelButtonText("Abort")
         dlg.setAutoClose(False)
@@ -42,25 +89,76 @@ class STLLoader():
 
         def on_abort():
             self._abort_import = True
+
         dlg.canceled.connect(on_abort)
         dlg.finished.connect(on_abort)
         dlg.rejected.connect(on_abort)
 
-        if isinstance(paths, dict):
-            for i, (key, path) in enumerate(paths.items()):
-                if self._abort_import:
-                    break
-                self.importOne(path, dlg, i, int(key))
-                dlg.setValue(i * 4 + 4)
-        else:
-            for i, path in enumerate(paths):
-                if self._abort_import:
-                    break
-                self.importOne(path, dlg, i, None)
-                dlg.setValue(i * 4 + 4)
+        try:
+            if parallel:
+                self._importParallel(jobs, dlg)
+            else:
+                for i, (path, tilei) in enumerate(jobs):
+                    if self._abort_import:
+                        break
+                    self.importOne(path, dlg, i, tilei)
+                    dlg.setValue(i * 4 + 4)
+        finally:
+            dlg.close()
+            self.meshcache.trim()
+            self.thumbcache.flush()
+            self.tilemeta.save()
 
-        dlg.close()
+    def _importParallel(self, jobs: list[tuple[str, int | None]], dlg: QProgressDialog):
+        # Load, analysis and decimation run in worker processes; results are
+        # registered on the GUI thread strictly in job order so tile ids and
+        # sidebar order match a sequential import. Cache hits are
+        # memory-mapped reads and skip the pool entirely.
+        sources = [self.meshcache.load(path) for path, _ in jobs]
+        misses = [path for (path, _), cached in zip(jobs, sources) if cached is None]
 
+        executor = ProcessPoolExecutor(
+            max_workers=max(min(self.workers, len(misses)), 1)
+        )
+        try:
+            futures = {
+                path: executor.submit(processCached, path, self.meshcache.folder)
+                for path in misses
+            }
+            pending = set(futures.values())
+            for i, ((path, tilei), cached) in enumerate(zip(jobs, sources)):
+                if cached is None:
+                    future = futures[path]
+                    while not future.done() and not self._abort_import:
+                        dlg.setLabelText(
+                            f"Processing meshes: "
+                            f"{len(futures) - len(pending)}/{len(futures)} done\n"
+                            f"Waiting for: {os.path.basename(path)}"
+                        )
+                        QApplication.processEvents(QEventLoop.AllEvents, 50)
+                        _, pending = wait(
+                            pending, timeout=0.05, return_when=FIRST_COMPLETED
+                        )
+                    if self._abort_import:
+                        break
+                    try:
+                        cached = future.result()
+                    except (
+                        Exception
+                    ) as e:  # unreadable file or a dead worker: skip just this tile
+                        print(f"Loading {path} failed: {e}")
+                        dlg.setValue(i + 1)
+                        continue
+                else:
+                    dlg.setLabelText(f"Loading cached mesh: {os.path.basename(path)}")
+                    QApplication.processEvents()
+                    if self._abort_import:
+                        break
+
+                self._registerProcessed(cached, tilei)
+                dlg.setValue(i + 1)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def importOne(self, path: str, dlg: QProgressDialog, dlgi: int, tilei: int | None):
         filename = os.path.basename(path)
@@ -68,39 +166,265 @@ class STLLoader():
         if self.world.getTile(path) != None and tilei == None:
             return  # skip duplicates
 
+        cached = self.meshcache.load(path)  # times itself as "import.cache"
+        if cached is not None:
+            if dlg:
+                dlg.setLabelText(f"Loading cached mesh: {filename}")
+            QApplication.processEvents()
+            self._registerProcessed(cached, tilei)
+            return
+
         # Load mesh
-        if (dlg): dlg.setLabelText(f"Loading mesh: {filename}")
+        if dlg:
+            dlg.setLabelText(f"Loading mesh: {filename}")
         QApplication.processEvents()
-        raw_mesh = meshlogic.loadMesh(path)
-        if (dlg): dlg.setValue(dlgi * 4 + 1)
+        with perf.stage("import.load"):
+            raw_mesh = meshlogic.loadMesh(path)
+        if dlg:
+            dlg.setValue(dlgi * 4 + 1)
 
         # Create bounding box
-        if (dlg): dlg.setLabelText(f"Analyzing mesh: {filename}")
+        if dlg:
+            dlg.setLabelText(f"Analyzing mesh: {filename}")
         QApplication.processEvents()
-        bb = meshlogic.createBoundingBox(raw_mesh)
-        dims = meshlogic.createDims(bb)
-        if (dlg): dlg.setValue(dlgi * 4 + 2)
+        with perf.stage("import.analyze"):
+            bb = meshlogic.createBoundingBox(raw_mesh)
+            dims = meshlogic.createDims(bb)
+        if dlg:
+            dlg.setValue(dlgi * 4 + 2)
 
         # Reduce mesh
-        if (dlg): dlg.setLabelText(f"Reducing mesh: {filename}")
+        if dlg:
+            dlg.setLabelText(f"Reducing mesh: {filename}")
         QApplication.processEvents()
-        max_faces = min(5000 * (max(round(math.log2(max(dims.vol, 2))), 1)), 25000)
-        print(f"maxf {filename} [{max_faces} from {raw_mesh.faces.shape[0]}] v: {dims.vol}")
-        mesh = meshlogic.reduceMesh(raw_mesh, max_faces)
-        if (dlg): dlg.setValue(dlgi * 4 + 3)
+        max_faces = meshlogic.faceBudget(dims)
+        perf.log(
+            f"maxf {filename} [{max_faces} from {raw_mesh.faces.shape[0]}]"
+            f" v: {dims.vol}"
+        )
+        with perf.stage("import.reduce"):
+            mesh = meshlogic.reduceMesh(raw_mesh, max_faces)
+            lods = meshlogic.buildLods(mesh)
+        self.meshcache.store(
+            meshlogic.ProcessedMesh(
+                path,
+                np.asarray(mesh.vertices),
+                np.asarray(mesh.faces),
+                bb,
+                dims,
+                raw_mesh.faces.shape[0],
+                max_faces,
+                lods,
+            )
+        )
+        if dlg:
+            dlg.setValue(dlgi * 4 + 3)
 
-        # Create tumbnail
-        if (dlg): dlg.setLabelText(f"Generating thumbnail: {filename}")
+        if dlg:
+            dlg.setLabelText(f"Uploading mesh: {filename}")
         QApplication.processEvents()
-        icon = self.thumbcache.getMeshIcon(mesh, path)
-        if (dlg): dlg.setValue(dlgi * 4 + 4)
+        self._registerMesh(path, mesh, bb, dims, lods, tilei)
+        if dlg:
+            dlg.setValue(dlgi * 4 + 4)
 
-        # Register tile
-        tilename = f"{filename.replace(' ', '_')} [{dims.serialize()}]"
-        tile = TileData(path, tilename, mesh, bb, dims, icon)
-        self._registerTile(tile, tilei)
+    def importLazy(self, paths: dict[int, str]):
+        """
+        Register a project's tiles at once as bounding-box proxies with
+        cached icons. Call loadInBackground() after the world is loaded to
+        swap in the real meshes.
+        """
+        from ..resources.tilemesh import TileData
 
-    def _registerTile(self, tile: TileData, tilei: int | None):
-        self.world.registerTile(tile, tilei)
+        self.cancelLazy()
+        for key, path in paths.items():
+            tilei = int(key)
+            bounds = self.tilemeta.lookup(path)
+            readable = True
+            if bounds is None:
+                try:
+                    bounds = stlio.readBounds(path)
+                except (OSError, ValueError) as e:
+                    print(f"Cannot read {path}: {e}")
+                    bounds = (np.zeros(3), np.ones(3))
+                    readable = False
+                else:
+                    self.tilemeta.store(path, bounds)
+            bb = meshlogic.boundingBoxFromCorners(*bounds)
+            dims = meshlogic.createDims(bb)
+            icon = self.thumbcache.cachedIcon(path) if readable else None
+            if icon is None:
+                icon = self.thumbcache.placeholderIcon(dims.size)
+            self.world.registerTile(
+                TileData(path, meshlogic.tileName(path, dims), None, bb, dims, icon),
+                tilei,
+            )
         event_bus.tilesChanged.emit()
-        
\ No newline at end of file
+
+    def loadInBackground(self, view: WorldWidget):
+        """
+        Load full geometry for every proxy tile: tiles placed on screen
+        first, then other placed ones, then the rest. Cache hits are
+        registered in small time slices on the GUI thread, misses are
+        decimated by worker processes. Uploads go into view's context.
+        """
+        self.cancelLazy()
+        proxies = {
+            tid: tile.filepath
+            for tid, tile in self.world.tile_meshes.items()
+            if not tile.loaded
+        }
+        if not proxies:
+            return
+
+        placed: dict[int, int] = {}
+        seen: dict[int, int] = {}
+        if self.world.objects:
+            ids = self.world.objects.mesh_id
+            pos = self.world.objects.pos
+            shown = view.visibleMask(pos)
+            placed = dict(zip(*np.unique(ids, return_counts=True)))
+            if shown.any():
+                seen = dict(zip(*np.unique(ids[shown], return_counts=True)))
+        order = sorted(
+            proxies, key=lambda tid: (-seen.get(tid, 0), -placed.get(tid, 0), tid)
+        )
+
+        misses = [
+            (proxies[tid], tid)
+            for tid in order
+            if not self.meshcache.contains(proxies[tid])
+        ]
+        self._lazy_pending = deque(
+            (proxies[tid], tid)
+            for tid in order
+            if self.meshcache.contains(proxies[tid])
+        )
+        if misses:
+            self._lazy_executor = ProcessPoolExecutor(
+                max_workers=max(min(self.workers, len(misses)), 1)
+            )
+            # the pool runs submissions first-in first-out, so priority order holds
+            self._lazy_futures = {
+                self._lazy_executor.submit(
+                    processCached, path, self.meshcache.folder
+                ): (path, tid)
+                for path, tid in misses
+            }
+        self._lazy_view = view
+        self._lazy_timer.start()
+
+    def cancelLazy(self):
+        self._lazy_timer.stop()
+        self._lazy_pending.clear()
+        self._lazy_futures = {}
+        if self._lazy_executor is not None:
+            self._lazy_executor.shutdown(wait=False, cancel_futures=True)
+            self._lazy_executor = None
+
+    def _lazyTick(self):
+        deadline = time.perf_counter() + 0.010
+        ready = []
+        for future in [f for f in self._lazy_futures if f.done()]:
+            path, tid = self._lazy_futures.pop(future)
+            try:
+                ready.append((future.result(), tid))
+            except Exception as e:
+                print(f"Loading {path} failed: {e}")
+
+        view = self._lazy_view
+        view.makeCurrent()
+        swapped = len(ready)
+        for result, tid in ready:
+            self._swapIn(result, tid)
+        while self._lazy_pending and time.perf_counter() < deadline:
+            path, tid = self._lazy_pending.popleft()
+            result = self.meshcache.load(path)
+            if result is None:  # evicted meanwhile: decimate it in a worker after all
+                if self._lazy_executor is None:
+                    self._lazy_executor = ProcessPoolExecutor(max_workers=1)
+                self._lazy_futures[
+                    self._lazy_executor.submit(
+                        processCached, path, self.meshcache.folder
+                    )
+                ] = (path, tid)
+                continue
+            self._swapIn(result, tid)
+            swapped += 1
+        if swapped:
+            view.update()
+
+        if not self._lazy_pending and not self._lazy_futures:
+            self.cancelLazy()
+            self.meshcache.trim()
+            self.thumbcache.flush()
+            self.tilemeta.save()
+
+    def _swapIn(self, result: meshlogic.ProcessedMesh, tilei: int):
+        current = self.world.tile_meshes.get(tilei)
+        if current is None or current.loaded or current.filepath != result.path:
+            return  # replaced or removed since the proxy was made
+        self._registerProcessed(result, tilei, notify=False)
+
+    def _registerProcessed(
+        self, result: meshlogic.ProcessedMesh, tilei: int | None, notify: bool = True
+    ):
+        filename = os.path.basename(result.path)
+        if perf.enabled:
+            # stages timed where they ran, usually in a worker process
+            for name, seconds in result.timings.items():
+                perf.stages.add(name, seconds)
+        perf.log(
+            f"maxf {filename} [{result.max_faces} from {result.raw_faces}]"
+            f" v: {result.dims.vol}"
+        )
+        self._registerMesh(
+            result.path,
+            result.toMesh(),
+            result.bb,
+            result.dims,
+            result.lods,
+            tilei,
+            notify,
+        )
+
+    def _registerMesh(
+        self,
+        path: str,
+        mesh,
+        bb: meshlogic.BoundingBox,
+        dims: meshlogic.WorldDims,
+        lods: list,
+        tilei: int | None,
+        notify: bool = True,
+    ):
+        # thumbnails render in the background; a footprint glyph stands in
+        with perf.stage("import.thumbnail"):
+            icon = self.thumbcache.requestIcon(
+                mesh, path, lambda icon: self._setIcon(path, icon)
+            )
+        if icon is None:
+            icon = self.thumbcache.placeholderIcon(dims.size)
+        self.tilemeta.store(path, (bb.min_corner, bb.max_corner))
+
+        from ..resources.tilemesh import TileData  # OpenGL, first needed here
+
+        with perf.stage("import.upload"):
+            tile = TileData(
+                path, meshlogic.tileName(path, dims), mesh, bb, dims, icon, lods
+            )
+        self._registerTile(tile, tilei, notify)
+
+    def _registerTile(self, tile: TileData, tilei: int | None, notify: bool = True):
+        self.world.registerTile(tile, tilei)
+        if notify:
+            event_bus.tilesChanged.emit()
+        elif tilei is not None:
+            event_bus.tileIconChanged.emit(
+                tilei
+            )  # a swapped-in tile may bring its stored icon
+
+    def _setIcon(self, path: str, icon: QIcon):
+        for tid, tile in self.world.tile_meshes.items():
+            if tile.filepath == path:
+                tile.icon = icon
+                event_bus.tileIconChanged.emit(tid)
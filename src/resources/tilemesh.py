@@ -1,50 +1,140 @@
-import trimesh
+from __future__ import annotations
+
+import ctypes
+from typing import TYPE_CHECKING
+
+import numpy as np
 from OpenGL.GL import *
-from OpenGL.GLU import *
 from PyQt5.QtGui import QIcon
 
+if TYPE_CHECKING:
+    import trimesh
+
 from .meshlogic import BoundingBox, WorldDims
 
+# interleaved per-vertex layout: position xyz, normal xyz (float32)
+VERTEX_STRIDE = 6 * 4
+
+# triangles of the 8 BoundingBox.vertices, wound outwards
+BOX_FACES = np.array(
+    [
+        [0, 2, 1],
+        [0, 3, 2],
+        [4, 5, 6],
+        [4, 6, 7],
+        [0, 1, 5],
+        [0, 5, 4],
+        [1, 2, 6],
+        [1, 6, 5],
+        [2, 3, 7],
+        [2, 7, 6],
+        [3, 0, 4],
+        [3, 4, 7],
+    ]
+)
+
+
+class TileLevel:
+    def __init__(self, vbo_id: int, vertex_count: int):
+        self.vbo_id: int = vbo_id
+        self.vertex_count: int = vertex_count
+
+    @property
+    def triangles(self) -> int:
+        return self.vertex_count // 3
+
+
 class TileData:
-    def __init__(self, filepath: str, name: str, mesh: trimesh.Geometry, bb: BoundingBox, dims: WorldDims, icon: QIcon):
+    def __init__(
+        self,
+        filepath: str,
+        name: str,
+        mesh: trimesh.Geometry | None,
+        bb: BoundingBox,
+        dims: WorldDims,
+        icon: QIcon,
+        lods: list[tuple[np.ndarray, np.ndarray]] = (),
+    ):
         self.filepath: str = filepath
         self.name: str = name
-        self.mesh: trimesh.Geometry = mesh
+        self.mesh: trimesh.Geometry | None = mesh
         self.bb: BoundingBox = bb
         self.dims: WorldDims = dims
         self.icon: QIcon = icon
-        self.list_id: int = None
+        # full mesh first, then coarser levels, then the bounding-box proxy;
+        # without a mesh (lazy project loading) only the proxy exists
+        self.levels: list[TileLevel] = []
+
+        self._regGl(lods)
+
+    @property
+    def vbo_id(self) -> int | None:
+        return self.levels[0].vbo_id if self.levels else None
 
-        self._regGl()
+    @property
+    def vertex_count(self) -> int:
+        return self.levels[0].vertex_count if self.levels else 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.mesh is not None
+
+    @property
+    def cpu_bytes(self) -> int:
+        if self.mesh is None:
+            return 0
+        return (
+            np.asarray(self.mesh.vertices).nbytes + np.asarray(self.mesh.faces).nbytes
+        )
+
+    @property
+    def gpu_bytes(self) -> int:
+        return sum(level.vertex_count for level in self.levels) * VERTEX_STRIDE
 
     def dispose(self) -> None:
-        if self.list_id:
-            glDeleteLists(self.list_id, 1)
-            self.list_id = None
-
-    def _regGl(self) -> None:
-        # Extract vertices and faces from (possibly simplified) mesh
-        verts = self.mesh.vertices
-        faces = self.mesh.faces
-        normals = self.mesh.face_normals  # one normal per face
-
-        # Create an OpenGL display list
-        list_id = glGenLists(1)
-        glNewList(list_id, GL_COMPILE)
-        glPushMatrix()
-
-        # Apply precomputed centering translation
-        glTranslatef(*self.bb.center_offset)
-
-        # Draw triangles
-        glBegin(GL_TRIANGLES)
-        for normal, face in zip(normals, faces):
-            glNormal3fv(normal)
-            for idx in face:
-                glVertex3fv(verts[idx])
-        glEnd()
-
-        glPopMatrix()
-        glEndList()
-
-        self.list_id = list_id
\ No newline at end of file
+        for level in self.levels:
+            glDeleteBuffers(1, [level.vbo_id])
+        self.levels = []
+
+    def draw(self, level: int = 0) -> None:
+        lvl = self.levels[min(level, len(self.levels) - 1)]
+        glBindBuffer(GL_ARRAY_BUFFER, lvl.vbo_id)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(12))
+        glDrawArrays(GL_TRIANGLES, 0, lvl.vertex_count)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _regGl(self, lods: list[tuple[np.ndarray, np.ndarray]]) -> None:
+        offset = self.bb.center_offset.astype(np.float32)
+        if self.mesh is not None:
+            self.levels.append(
+                self._upload(np.asarray(self.mesh.vertices) + offset, self.mesh.faces)
+            )
+            for vertices, faces in lods:
+                self.levels.append(self._upload(np.asarray(vertices) + offset, faces))
+        # bb.vertices are already centered
+        self.levels.append(self._upload(self.bb.vertices, BOX_FACES))
+
+    def _upload(self, verts: np.ndarray, faces: np.ndarray) -> TileLevel:
+        tris = np.asarray(verts, dtype=np.float32)[np.asarray(faces)]  # (F,3,3)
+
+        # one normal per face
+        normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals /= np.where(lengths > 0, lengths, 1)
+
+        # Flat triangle soup: 3 vertices per face, each carrying its face normal
+        data = np.empty((len(tris), 3, 6), dtype=np.float32)
+        data[:, :, :3] = tris
+        data[:, :, 3:] = normals[:, None, :]
+
+        vbo_id = int(glGenBuffers(1))
+        glBindBuffer(GL_ARRAY_BUFFER, vbo_id)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        return TileLevel(vbo_id, len(tris) * 3)
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+
+from ..cachedirs import cacheRoot
+from . import meshlogic
+from .meshlogic import WorldDims
+
+
+class TileMetaCache:
+    """
+    Bounding boxes of source STLs keyed on path, size and mtime, so tile
+    names (`filename [XxYxZ]`) can be produced without loading or
+    decimating meshes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cacheRoot(), "tilemeta.json")
+        self._dirty = False
+        try:
+            with open(self.path, "r") as f:
+                self._entries: dict[str, list] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _stat(self, path: str) -> tuple[str, int, int] | None:
+        abspath = os.path.abspath(path)
+        try:
+            st = os.stat(abspath)
+        except OSError:
+            return None
+        return abspath, st.st_size, st.st_mtime_ns
+
+    def lookup(self, path: str) -> tuple[np.ndarray, np.ndarray] | None:
+        stat = self._stat(path)
+        entry = self._entries.get(stat[0]) if stat else None
+        if entry is None or entry[0] != stat[1] or entry[1] != stat[2]:
+            return None
+        return np.array(entry[2]), np.array(entry[3])
+
+    def store(self, path: str, bounds: tuple[np.ndarray, np.ndarray]) -> None:
+        stat = self._stat(path)
+        if stat is None:
+            return
+        self._entries[stat[0]] = [
+            stat[1],
+            stat[2],
+            bounds[0].tolist(),
+            bounds[1].tolist(),
+        ]
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+def boundsDims(bounds: tuple[np.ndarray, np.ndarray]) -> WorldDims:
+    return meshlogic.createDims(meshlogic.boundingBoxFromCorners(*bounds))
+
+
+def tileNameFromBounds(path: str, bounds: tuple[np.ndarray, np.ndarray] | None) -> str:
+    if bounds is None:
+        return f"{os.path.basename(path).replace(' ', '_')} [?]"
+    return meshlogic.tileName(path, boundsDims(bounds))
@@ -0,0 +1,175 @@
+import numpy as np
+
+# Upper bound on candidate pixels handled per batch, keeps peak memory flat
+# for large thumbnails or dense meshes.
+_CHUNK_PIXELS = 1 << 22
+
+# fixed isometric angles
+_ANG_Z, _ANG_X = np.radians(-45), np.radians(35.264)
+_RZ = np.array(
+    [
+        [np.cos(_ANG_Z), -np.sin(_ANG_Z), 0],
+        [np.sin(_ANG_Z), np.cos(_ANG_Z), 0],
+        [0, 0, 1],
+    ]
+)
+_RX = np.array(
+    [
+        [1, 0, 0],
+        [0, np.cos(_ANG_X), -np.sin(_ANG_X)],
+        [0, np.sin(_ANG_X), np.cos(_ANG_X)],
+    ]
+)
+ISO_ROTATION = _RX @ _RZ
+
+_LIGHT = np.array([0.3, 0.5, 0.8]) / np.linalg.norm([0.3, 0.5, 0.8])
+
+
+def render_rgba(vertices: np.ndarray, faces: np.ndarray, size: int = 64) -> np.ndarray:
+    """
+    Rasterize a mesh into a (size, size, 4) uint8 RGBA isometric thumbnail.
+
+    All triangles are projected, shaded and scan-converted in batched NumPy
+    with a z-buffer, so the result no longer depends on face order. Pure
+    NumPy: safe to call from worker processes without Qt.
+    """
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    if len(faces) == 0:
+        return rgba
+
+    # rotate all triangles into view space (F,3,3)
+    tris = np.asarray(vertices, dtype=np.float64)[np.asarray(faces)] @ ISO_ROTATION.T
+
+    # flat shading from the rotated face normals
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths > 0, lengths, 1)[:, None]
+    shade = (150 * np.maximum(normals @ _LIGHT, 0.0) + 50).astype(np.uint8)
+
+    # project & normalize into [2, size-2]
+    xs, ys = tris[:, :, 0], tris[:, :, 1]
+    minx, maxx = xs.min(), xs.max()
+    miny, maxy = ys.min(), ys.max()
+    spanx = maxx - minx or 1e-6
+    spany = maxy - miny or 1e-6
+    px = (xs - minx) / spanx * (size - 4) + 2
+    py = (ys - miny) / spany * (size - 4) + 2
+    pz = tris[:, :, 2]  # larger z is closer to the viewer
+
+    # pixel-center bounding box per triangle
+    x0 = np.clip(np.ceil(px.min(axis=1) - 0.5), 0, size).astype(np.int64)
+    x1 = np.clip(np.floor(px.max(axis=1) - 0.5), -1, size - 1).astype(np.int64)
+    y0 = np.clip(np.ceil(py.min(axis=1) - 0.5), 0, size).astype(np.int64)
+    y1 = np.clip(np.floor(py.max(axis=1) - 0.5), -1, size - 1).astype(np.int64)
+    w = x1 - x0 + 1
+    h = y1 - y0 + 1
+
+    # barycentric denominator; drop degenerate and sub-pixel-miss triangles
+    den = (py[:, 1] - py[:, 2]) * (px[:, 0] - px[:, 2]) + (px[:, 2] - px[:, 1]) * (
+        py[:, 0] - py[:, 2]
+    )
+    keep = np.flatnonzero((w > 0) & (h > 0) & (np.abs(den) > 1e-12))
+    if len(keep) == 0:
+        return rgba
+
+    zbuf = np.full(size * size, -np.inf)
+    color = np.zeros(size * size, dtype=np.uint8)
+
+    counts = w[keep] * h[keep]
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(keep):
+        base = ends[start - 1] if start else 0
+        stop = max(
+            int(np.searchsorted(ends, base + _CHUNK_PIXELS, side='right')), start + 1
+        )
+        _raster_chunk(
+            keep[start:stop],
+            counts[start:stop],
+            px,
+            py,
+            pz,
+            den,
+            x0,
+            y0,
+            w,
+            shade,
+            size,
+            zbuf,
+            color,
+        )
+        start = stop
+
+    covered = np.isfinite(zbuf)
+    rgba.reshape(-1, 4)[covered, :3] = color[covered, None]
+    rgba.reshape(-1, 4)[covered, 3] = 255
+    return rgba
+
+
+def _raster_chunk(tri, counts, px, py, pz, den, x0, y0, w, shade, size, zbuf, color):
+    # expand every triangle into the candidate pixels of its bounding box
+    ti = np.repeat(tri, counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    tw = w[ti]
+    cx = x0[ti] + local % tw + 0.5
+    cy = y0[ti] + local // tw + 0.5
+
+    ax, ay = px[ti, 0], py[ti, 0]
+    bx, by = px[ti, 1], py[ti, 1]
+    qx, qy = px[ti, 2], py[ti, 2]
+    d = den[ti]
+    l0 = ((by - qy) * (cx - qx) + (qx - bx) * (cy - qy)) / d
+    l1 = ((qy - ay) * (cx - qx) + (ax - qx) * (cy - qy)) / d
+    l2 = 1.0 - l0 - l1
+    inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+    if not inside.any():
+        return
+
+    ti, l0, l1, l2 = ti[inside], l0[inside], l1[inside], l2[inside]
+    pix = (cy[inside].astype(np.int64)) * size + cx[inside].astype(np.int64)
+    z = l0 * pz[ti, 0] + l1 * pz[ti, 1] + l2 * pz[ti, 2]
+
+    # nearest fragment per pixel within this chunk, then merge into the z-buffer
+    order = np.lexsort((-z, pix))
+    pix, z, ti = pix[order], z[order], ti[order]
+    first = np.ones(len(pix), dtype=bool)
+    first[1:] = pix[1:] != pix[:-1]
+    pix, z, ti = pix[first], z[first], ti[first]
+
+    closer = z > zbuf[pix]
+    pix = pix[closer]
+    zbuf[pix] = z[closer]
+    color[pix] = shade[ti[closer]]
+
+
+def render_sizes(
+    vertices: np.ndarray, faces: np.ndarray, sizes: list[int]
+) -> list[np.ndarray]:
+    """
+    render_rgba at several sizes; the thumbnail worker entry point.
+    """
+    return [render_rgba(vertices, faces, size) for size in sizes]
+
+
+def footprint_rgba(footprint: np.ndarray, size: int = 64) -> np.ndarray:
+    """
+    (size, size, 4) uint8 RGBA glyph of a tile's (x, y) footprint in grid
+    units: a grey rectangle with a line per unit, shown until the real
+    thumbnail is rendered.
+    """
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    fx, fy = (max(int(v), 1) for v in footprint[:2])
+    cell = (size - 4) / max(fx, fy)
+    w, h = max(round(fx * cell), 1), max(round(fy * cell), 1)
+    x0, y0 = (size - w) // 2, (size - h) // 2
+
+    rgba[y0 : y0 + h, x0 : x0 + w] = (170, 170, 170, 255)
+    for i in range(1, fx):
+        rgba[y0 : y0 + h, x0 + round(i * cell)] = (120, 120, 120, 255)
+    for j in range(1, fy):
+        rgba[y0 + round(j * cell), x0 : x0 + w] = (120, 120, 120, 255)
+
+    # outline
+    rgba[y0, x0 : x0 + w] = rgba[y0 + h - 1, x0 : x0 + w] = (80, 80, 80, 255)
+    rgba[y0 : y0 + h, x0] = rgba[y0 : y0 + h, x0 + w - 1] = (80, 80, 80, 255)
+    return rgba
@@ -1,30 +1,201 @@
-import hashlib
+from __future__ import annotations
+
 import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Callable
 
-import trimesh
+import numpy as np
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon, QPixmap
 
-from .thumbgen import make_thumbnail
+from ..cachedirs import cacheDir
+from .raster import footprint_rgba, render_rgba, render_sizes
+from .thumbgen import rgba_to_qimage
+from .thumbstore import ThumbnailStore
+
+if TYPE_CHECKING:
+    import trimesh
 
 
 class ThumbnailCache:
-    def __init__(self, size=64, folder="./.thumbnails"):
+    """
+    Tile icons from the thumbnail store. Missing thumbnails are rendered
+    by a worker process queue (requestIcon) so imports never wait on
+    icon painting; footprint glyphs stand in until they arrive.
+    """
+
+    def __init__(self, size=64, folder=None, extra_sizes=(32,), workers: int = 1):
         self.size = size
-        self.folder = folder
-        os.makedirs(folder, exist_ok=True)
-
-    def _hash(self, name):
-        return hashlib.sha256(name.encode()).hexdigest()
-
-    def get(self, mesh: trimesh.Geometry, name: str):
-        h = self._hash(name)
-        path = os.path.join(self.folder, h + ".png")
-        if os.path.exists(path):
-            return QPixmap(path)
-        print(f"Generating tumbnail for {name}")
-        pixmap = make_thumbnail(mesh, self.size)
-        pixmap.save(path)
-        return pixmap
-    
+        self.sizes = (size, *[s for s in extra_sizes if s != size])
+        self.folder = folder or cacheDir("thumbnails")
+        os.makedirs(self.folder, exist_ok=True)
+        self.store = ThumbnailStore(os.path.join(self.folder, "thumbs.pack"))
+
+        # background rendering
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        # future -> (executor, name, store key, sizes, vertices, faces, retried)
+        self._jobs: dict[Future, tuple] = {}
+        self._waiting: dict[str, list[Callable[[QIcon], None]]] = (
+            {}
+        )  # name -> on_ready callbacks
+        self._timer = QTimer()
+        self._timer.setInterval(30)
+        self._timer.timeout.connect(self._collect)
+        self._placeholders: dict[tuple[int, int], QIcon] = {}
+
+    def get(
+        self, mesh: trimesh.Geometry, name: str, size: int | None = None
+    ) -> QPixmap:
+        size = size or self.size
+        key = self.store.key(name)
+        rgba = self.store.get(key, size)
+        if rgba is None:
+            print(f"Generating tumbnail for {name} ({size}px)")
+            rgba = render_rgba(mesh.vertices, mesh.faces, size)
+            self.store.put(key, size, rgba)
+        return QPixmap.fromImage(rgba_to_qimage(rgba))
+
     def getMeshIcon(self, mesh: trimesh.Geometry, name: str):
-        return QIcon(self.get(mesh, name))
+        icon = QIcon()
+        for size in self.sizes:
+            icon.addPixmap(self.get(mesh, name, size))
+        return icon
+
+    def cachedIcon(self, name: str) -> QIcon | None:
+        """
+        Icon from stored thumbnails only, or None if any size is missing
+        or the source file can't be read.
+        """
+        try:
+            key = self.store.key(name)
+        except OSError:
+            return None
+        return self._storedIcon(key)
+
+    def _storedIcon(self, key: str) -> QIcon | None:
+        icon = QIcon()
+        for size in self.sizes:
+            rgba = self.store.get(key, size)
+            if rgba is None:
+                return None
+            icon.addPixmap(QPixmap.fromImage(rgba_to_qimage(rgba)))
+        return icon
+
+    def placeholderIcon(self, footprint: np.ndarray) -> QIcon:
+        """
+        Glyph of an (x, y) footprint in grid units (WorldDims.size), shared
+        by all tiles of that footprint.
+        """
+        key = (int(footprint[0]), int(footprint[1]))
+        icon = self._placeholders.get(key)
+        if icon is None:
+            icon = self._placeholders[key] = QIcon()
+            for size in self.sizes:
+                icon.addPixmap(
+                    QPixmap.fromImage(rgba_to_qimage(footprint_rgba(footprint, size)))
+                )
+        return icon
+
+    def requestIcon(
+        self, mesh: trimesh.Geometry, name: str, on_ready: Callable[[QIcon], None]
+    ) -> QIcon | None:
+        """
+        The stored icon, or None after queueing the missing sizes for a
+        worker; on_ready(icon) is then called on the GUI thread once they
+        are rendered. Requests for a name already queued share its job.
+        Also None, with nothing queued, when the source file is gone.
+        """
+        icon = self.cachedIcon(name)
+        if icon is not None:
+            return icon
+        if name in self._waiting:
+            self._waiting[name].append(on_ready)
+            return None
+
+        try:
+            key = self.store.key(name)
+        except OSError:
+            return None  # source gone: the caller keeps its placeholder
+        missing = [size for size in self.sizes if self.store.get(key, size) is None]
+        self._waiting[name] = [on_ready]
+        self._submit(
+            name,
+            key,
+            missing,
+            np.asarray(mesh.vertices),
+            np.asarray(mesh.faces),
+            retried=False,
+        )
+        return None
+
+    def _submit(
+        self,
+        name: str,
+        key: str,
+        sizes: list[int],
+        vertices: np.ndarray,
+        faces: np.ndarray,
+        retried: bool,
+    ) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            future = self._executor.submit(render_sizes, vertices, faces, sizes)
+        except BrokenProcessPool:
+            self._resetExecutor()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(render_sizes, vertices, faces, sizes)
+        self._jobs[future] = (
+            self._executor,
+            name,
+            key,
+            sizes,
+            vertices,
+            faces,
+            retried,
+        )
+        self._timer.start()
+
+    def _resetExecutor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _collect(self):
+        for future in [f for f in self._jobs if f.done()]:
+            executor, name, key, sizes, vertices, faces, retried = self._jobs.pop(
+                future
+            )
+            try:
+                rendered = future.result()
+            except BrokenProcessPool as e:
+                # a worker died: later requests need a fresh pool, and this job
+                # gets one more try
+                if executor is self._executor:  # not yet replaced by another failed job
+                    self._resetExecutor()
+                if not retried:
+                    self._submit(name, key, sizes, vertices, faces, retried=True)
+                    continue
+                print(f"Thumbnail for {name} failed: {e}")
+                self._waiting.pop(name, None)  # the next requestIcon retries
+                continue
+            except Exception as e:
+                print(f"Thumbnail for {name} failed: {e}")
+                self._waiting.pop(name, None)  # the next requestIcon retries
+                continue
+            callbacks = self._waiting.pop(name, [])
+            for size, rgba in zip(sizes, rendered):
+                self.store.put(key, size, rgba)
+            icon = self._storedIcon(key)
+            for on_ready in callbacks:
+                on_ready(icon)
+
+        if not self._jobs:
+            self._timer.stop()
+            self.flush()
+
+    def flush(self):
+        self.store.compact()
+        self.store.save()
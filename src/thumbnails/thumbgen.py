@@ -1,7 +1,14 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import numpy as np
-import trimesh
-from PyQt5.QtCore import QPointF, Qt
-from PyQt5.QtGui import QColor, QImage, QPainter, QPixmap, QPolygonF
+from PyQt5.QtGui import QImage, QPixmap
+
+from .raster import render_rgba
+
+if TYPE_CHECKING:
+    import trimesh
 
 
 def make_thumbnail(mesh: trimesh.Trimesh, size=64) -> QPixmap:
@@ -12,60 +19,12 @@ def make_thumbnail(mesh: trimesh.Trimesh, size=64) -> QPixmap:
     - mesh: a trimesh.Trimesh instance
     - size: output pixmap width/height in pixels
     """
-    # fixed isometric angles
-    ang_z, ang_x = -45, 35.264
-    Rz = np.array([
-        [ np.cos(np.radians(ang_z)), -np.sin(np.radians(ang_z)), 0 ],
-        [ np.sin(np.radians(ang_z)),  np.cos(np.radians(ang_z)), 0 ],
-        [ 0,                          0,                          1 ]
-    ])
-    Rx = np.array([
-        [1, 0,                           0],
-        [0, np.cos(np.radians(ang_x)), -np.sin(np.radians(ang_x))],
-        [0, np.sin(np.radians(ang_x)),  np.cos(np.radians(ang_x))]
-    ])
-    R = Rx @ Rz
-
-    # get triangles [n_faces, 3,3] and normals [n_faces,3]
-    tris = mesh.vertices[mesh.faces]         # (F,3,3)
-    norms = mesh.face_normals                # (F,3)
-
-    # rotate all verts & normals
-    tris_rot = tris @ R.T                    # (F,3,3)
-    norms_rot = norms @ R.T                  # (F,3)
-
-    # flatten for bounding box
-    pts = tris_rot.reshape(-1, 3)
-    xs, ys = pts[:,0], pts[:,1]
-    minx, maxx = xs.min(), xs.max()
-    miny, maxy = ys.min(), ys.max()
-    spanx = maxx - minx or 1e-6
-    spany = maxy - miny or 1e-6
-
-    # prepare image
-    img = QImage(size, size, QImage.Format_ARGB32)
-    img.fill(Qt.transparent)
-    painter = QPainter(img)
-    painter.setPen(Qt.NoPen)
-
-    # simple shading
-    light = np.array([0.3,0.5,0.8])
-    light /= np.linalg.norm(light)
-
-    # draw each triangle
-    for n, tri in zip(norms_rot, tris_rot):
-        brightness = max(0.0, float(np.dot(n, light)))
-        val = int(150 * brightness + 50)
-        color = QColor(val, val, val, 200)
-        painter.setBrush(color)
+    rgba = render_rgba(mesh.vertices, mesh.faces, size)
+    return QPixmap.fromImage(rgba_to_qimage(rgba))
 
-        poly = QPolygonF()
-        for vx, vy, vz in tri:
-            # project & normalize into [2, size-2]
-            nx = (vx - minx) / spanx * (size - 4) + 2
-            ny = (vy - miny) / spany * (size - 4) + 2
-            poly.append(QPointF(nx, ny))
-        painter.drawPolygon(poly)
 
-    painter.end()
-    return QPixmap.fromImage(img)
+def rgba_to_qimage(rgba: np.ndarray) -> QImage:
+    h, w = rgba.shape[:2]
+    rgba = np.ascontiguousarray(rgba)
+    # copy() detaches the image from the numpy buffer
+    return QImage(rgba.data, w, h, w * 4, QImage.Format_RGBA8888).copy()
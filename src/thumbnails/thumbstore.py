@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'VRTS'
+VERSION = 1
+
+# magic, version, index length
+_HEADER = struct.Struct('<4sH2xI')
+
+_DAY = 24 * 60 * 60
+
+
+def contentKey(path: str) -> str:
+    """
+    Key for a source file: hash of its bytes plus its size.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+            size += len(chunk)
+    return f"{h.hexdigest()}-{size}"
+
+
+class ThumbnailStore:
+    """
+    All thumbnails in one packed file: a JSON index followed by one RGBA
+    atlas per icon size, shaped (count, size, size, 4).
+
+    The file is loaded with a single read and atlas rows are NumPy views
+    into it. New icons stay in memory until save(), which rewrites the pack
+    with only referenced rows, so compaction happens as part of saving.
+    """
+
+    def __init__(self, path: str, max_age_days: int = 90):
+        self.path = path
+        self.max_age_days = max_age_days
+
+        self._atlases: dict[int, np.ndarray] = {}  # size -> (N, size, size, 4)
+        self._pending: dict[int, list[np.ndarray]] = (
+            {}
+        )  # size -> rows appended after load
+        self._entries: dict[str, dict] = (
+            {}
+        )  # key -> {"slots": {size: row}, "used": day}
+        self._memo: dict[str, list] = {}  # abspath -> [size, mtime_ns, key]
+        self._dirty = False
+
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            magic, version, index_len = _HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return
+            index = json.loads(data[_HEADER.size : _HEADER.size + index_len])
+        except (OSError, ValueError, struct.error):
+            return
+
+        base = _HEADER.size + index_len
+        for size_str, info in index["atlases"].items():
+            size = int(size_str)
+            self._atlases[size] = np.frombuffer(
+                data,
+                dtype=np.uint8,
+                count=info["count"] * size * size * 4,
+                offset=base + info["offset"],
+            ).reshape(-1, size, size, 4)
+        self._entries = index["entries"]
+        self._memo = index["memo"]
+
+    def key(self, path: str) -> str:
+        abspath = os.path.abspath(path)
+        st = os.stat(abspath)
+        memo = self._memo.get(abspath)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        key = contentKey(abspath)
+        self._memo[abspath] = [st.st_size, st.st_mtime_ns, key]
+        self._dirty = True
+        return key
+
+    def get(self, key: str, size: int) -> np.ndarray | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        row = entry["slots"].get(str(size))
+        if row is None:
+            return None
+
+        today = int(time.time() // _DAY)
+        if entry["used"] != today:
+            entry["used"] = today
+            self._dirty = True
+
+        atlas = self._atlases.get(size)
+        loaded = len(atlas) if atlas is not None else 0
+        return atlas[row] if row < loaded else self._pending[size][row - loaded]
+
+    def put(self, key: str, size: int, rgba: np.ndarray) -> None:
+        atlas = self._atlases.get(size)
+        pending = self._pending.setdefault(size, [])
+        row = (len(atlas) if atlas is not None else 0) + len(pending)
+        pending.append(np.ascontiguousarray(rgba, dtype=np.uint8))
+
+        entry = self._entries.setdefault(
+            key, {"slots": {}, "used": int(time.time() // _DAY)}
+        )
+        entry["slots"][str(size)] = row
+        self._dirty = True
+
+    def compact(self, live_keys: set[str] | None = None) -> None:
+        """
+        Drop entries not in live_keys (if given) or unused for max_age_days,
+        and memo records for files that no longer exist. Takes effect on save().
+        """
+        oldest = int(time.time() // _DAY) - self.max_age_days
+        dead = [
+            key
+            for key, entry in self._entries.items()
+            if (live_keys is not None and key not in live_keys)
+            or entry["used"] < oldest
+        ]
+        for key in dead:
+            del self._entries[key]
+        gone = [path for path in self._memo if not os.path.exists(path)]
+        for path in gone:
+            del self._memo[path]
+        if dead or gone:
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        sizes = set(self._atlases) | set(self._pending)
+        atlases: dict[int, np.ndarray] = {}
+        for size in sizes:
+            atlas = self._atlases.get(size)
+            loaded = len(atlas) if atlas is not None else 0
+            rows = []
+            for entry in self._entries.values():
+                row = entry["slots"].get(str(size))
+                if row is None:
+                    continue
+                entry["slots"][str(size)] = len(rows)
+                rows.append(
+                    atlas[row] if row < loaded else self._pending[size][row - loaded]
+                )
+            if rows:
+                atlases[size] = np.stack(rows)
+
+        index_atlases = {}
+        offset = 0
+        for size, atlas in atlases.items():
+            index_atlases[str(size)] = {"offset": offset, "count": len(atlas)}
+            offset += atlas.nbytes
+        index = json.dumps(
+            {
+                "atlases": index_atlases,
+                "entries": self._entries,
+                "memo": self._memo,
+            }
+        ).encode()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(index)))
+            f.write(index)
+            for atlas in atlases.values():
+                f.write(atlas.tobytes())
+        os.replace(tmp, self.path)
+
+        self._atlases = atlases
+        self._pending.clear()
+        self._dirty = False
@@ -0,0 +1,23 @@
+import importlib
+import threading
+
+# imported on first mesh import; loading them early hides most of the wait
+WARM_MODULES = ("trimesh", "fast_simplification", f"{__package__}.resources.tilemesh")
+
+
+def _warm(modules: tuple[str, ...]) -> None:
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def warmInBackground(modules: tuple[str, ...] = WARM_MODULES) -> threading.Thread:
+    """
+    Import heavy modules on a daemon thread. A first use on the GUI thread
+    simply waits for the import lock instead of importing twice.
+    """
+    thread = threading.Thread(target=_warm, args=(modules,), name="warmup", daemon=True)
+    thread.start()
+    return thread
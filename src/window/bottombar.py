@@ -1,5 +1,5 @@
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QWidget, QPushButton, QHBoxLayout
+from PyQt5.QtWidgets import QButtonGroup, QHBoxLayout, QLabel, QPushButton, QWidget
 
 from ..appstate import AppState
 from ..resources.icons import IconAtlas
@@ -47,11 +47,46 @@ class BottomBar(QWidget):
         self.deleteButton.setCheckable(True)
         self.deleteButton.setFixedSize(24, 24)
 
+        # placement tools: single cell, dragged line, dragged rectangle
+        self.toolButtons = QButtonGroup(self)
+        self.toolButtons.setExclusive(True)
+        for tool, label, tip in (
+            ("point", "•", "Place or delete one tile per click"),
+            ("line", "─", "Drag to fill a straight line"),
+            ("rect", "▭", "Drag to fill a rectangle"),
+        ):
+            button = QPushButton(label, self)
+            button.setToolTip(tip)
+            button.setCheckable(True)
+            button.setChecked(tool == self.state.world.place_tool)
+            button.setFixedSize(24, 24)
+            button.setProperty("tool", tool)
+            self.toolButtons.addButton(button)
+
+        # floor being edited
+        self.floorDownButton = QPushButton("▼", self)
+        self.floorDownButton.setToolTip("Edit the floor below (PgDown)")
+        self.floorDownButton.setFixedSize(24, 24)
+        self.floorLabel = QLabel(self)
+        self.floorLabel.setAlignment(Qt.AlignCenter)
+        self.floorLabel.setFixedWidth(56)
+        self.floorUpButton = QPushButton("▲", self)
+        self.floorUpButton.setToolTip("Edit the floor above (PgUp)")
+        self.floorUpButton.setFixedSize(24, 24)
+        self._updateFloorLabel()
+
         layout = QHBoxLayout(self)
         layout.setContentsMargins(1, 1, 1, 1)
         layout.setSpacing(3)
 
         layout.addStretch()  # push buttons to right
+        layout.addWidget(self.floorDownButton)
+        layout.addWidget(self.floorLabel)
+        layout.addWidget(self.floorUpButton)
+        layout.addSpacing(8)
+        for button in self.toolButtons.buttons():
+            layout.addWidget(button)
+        layout.addSpacing(8)
         layout.addWidget(self.showGridButton)
         layout.addWidget(self.growGridButton)
         layout.addWidget(self.shrinkGridButton)
@@ -74,13 +109,16 @@ class BottomBar(QWidget):
             QPushButton:pressed {
                 background-color: #707070;
             }
-        """)        
-        
+        """)
+
         self.showGridButton.clicked.connect(self._toggleShowGrid)
         self.growGridButton.clicked.connect(self._growGrid)
         self.shrinkGridButton.clicked.connect(self._shrinkGrid)
         self.deleteButton.clicked.connect(self._toggleDelete)
-
+        self.toolButtons.buttonClicked.connect(self._selectTool)
+        self.floorUpButton.clicked.connect(lambda: self.state.view.changeFloor(1))
+        self.floorDownButton.clicked.connect(lambda: self.state.view.changeFloor(-1))
+        self.state.world.addListener(self._onWorldEdit)
 
     def _toggleShowGrid(self):
         self.state.world.grid_shown = self.showGridButton.isChecked()
@@ -93,9 +131,21 @@ class BottomBar(QWidget):
     def _shrinkGrid(self):
         self.state.world.shrinkGrid()
         self.state.view.update()
-    
+
+    def _onWorldEdit(self, kind, *args):
+        if kind in ("floor", "load", "reset"):
+            self._updateFloorLabel()
+
+    def _updateFloorLabel(self):
+        self.floorLabel.setText(f"Floor {self.state.world.active_layer}")
+
+    def _selectTool(self, button):
+        self.state.world.place_tool = button.property("tool")
+        self.state.view.resetCursor()
+        self.state.view.update()
+
     def _toggleDelete(self):
         # flip delete mode on/off
         self.state.world.delete_mode = self.deleteButton.isChecked()
         # force redraw so user sees immediate effect
-        self.state.view.update()
\ No newline at end of file
+        self.state.view.update()
@@ -0,0 +1,22 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QLabel
+
+
+class LoadingView(QLabel):
+    """
+    Stand-in for the world view while OpenGL is imported.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__("Loading 3D view...", parent)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: #333333; color: #A0A0A0;")
+
+    def resetCursor(self):
+        pass
+
+    def updateCursorGood(self):
+        pass
+
+    def changeFloor(self, step: int):
+        pass
@@ -1,9 +1,11 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout
+from PyQt5.QtWidgets import QHBoxLayout, QMainWindow, QVBoxLayout, QWidget
 
-from .sidebar import Sidebar
-from ..appstate import AppState
-from .menubar import MenuBar
+from ..appstate import AppState, createView
+from ..warmup import warmInBackground
 from .bottombar import BottomBar
+from .menubar import MenuBar
+from .sidebar import Sidebar
+
 
 class MainWindow(QMainWindow):
     def __init__(self, state: AppState):
@@ -20,10 +22,28 @@ class MainWindow(QMainWindow):
         main_layout.setSpacing(0)
         main_layout.addWidget(Sidebar(self.state))
         main_layout.addWidget(self.state.view, 1)
+        self._main_layout = main_layout
 
         layout = QVBoxLayout(central)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
         layout.addWidget(MenuBar(self.state))
         layout.addLayout(main_layout)
-        layout.addWidget(BottomBar(self.state))
\ No newline at end of file
+        layout.addWidget(BottomBar(self.state))
+
+    def loadView(self):
+        """
+        Swap the placeholder for the OpenGL world view. Called once the
+        window is visible so startup only pays for Qt.
+        """
+        placeholder = self.state.view
+        view = createView(self.state)
+        self._main_layout.replaceWidget(placeholder, view)
+        placeholder.deleteLater()
+        view.show()
+        warmInBackground()
+
+    # Override
+    def closeEvent(self, event):
+        self.state.journal.close()
+        super().closeEvent(event)
@@ -1,14 +1,35 @@
+import os
 import subprocess
 import sys
-from PyQt5.QtWidgets import QMenu, QMenuBar, QFileDialog, QMessageBox
 
-import json
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import (
+    QActionGroup,
+    QApplication,
+    QFileDialog,
+    QInputDialog,
+    QMenu,
+    QMenuBar,
+    QMessageBox,
+    QProgressDialog,
+)
 
-from ..world.world import WorldSerial
-from ..world.worldobject import WorldObject
-from ..world.worldcamera import WorldCamera
 from ..appstate import AppState
+from ..controllers.mapexport import DEFAULT_SCALE, exportMap
 from ..events import event_bus
+from ..world.projectfile import (
+    BINARY_EXT,
+    fromSerial,
+    readProject,
+    toSerial,
+    writeProject,
+)
+from ..world.world import LAYER_GHOST, LAYER_HIDDEN, LAYER_SHOWN
+
+PROJECT_OPEN_FILTER = f"Project Files (*.json *{BINARY_EXT})"
+PROJECT_SAVE_FILTER = f"Binary Project (*{BINARY_EXT});;JSON Project (*.json)"
+
 
 class MenuBar(QMenuBar):
     def __init__(self, state: AppState):
@@ -35,26 +56,109 @@ class MenuBar(QMenuBar):
         file_menu.addSeparator()
 
         self.action_load = file_menu.addAction("Open project")
-        
+
         file_menu.addSeparator()
 
         self.action_save = file_menu.addAction("Save")
         self.action_save_as = file_menu.addAction("Save As")
 
+        file_menu.addSeparator()
+
+        self.action_export_map = file_menu.addAction("Export Map...")
+
         # Connect file menu
         self.action_new.triggered.connect(self.new_project)
         self.action_save.triggered.connect(self.save_project)
         self.action_save_as.triggered.connect(self.save_as_project)
         self.action_load.triggered.connect(self.load_project)
+        self.action_export_map.triggered.connect(self.export_map)
+
+        # edit menu
+        edit_menu = QMenu("Edit", self)
+        self.addMenu(edit_menu)
+
+        self.action_undo = edit_menu.addAction("Undo")
+        self.action_undo.setShortcut(QKeySequence.Undo)
+        self.action_redo = edit_menu.addAction("Redo")
+        self.action_redo.setShortcuts(
+            [QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")]
+        )
+
+        self.action_undo.triggered.connect(self.undo)
+        self.action_redo.triggered.connect(self.redo)
+        edit_menu.aboutToShow.connect(self._update_edit_actions)
+        edit_menu.aboutToHide.connect(
+            self._enable_edit_actions
+        )  # keep the shortcuts live
+
+        # floors menu, filled from the world each time it opens
+        self.floors_menu = QMenu("Floors", self)
+        self.addMenu(self.floors_menu)
+        self.floors_menu.aboutToShow.connect(self._fill_floors_menu)
+
+        # offer crash recovery once the view can upload meshes, then start journaling
+        event_bus.viewReady.connect(self._on_view_ready)
 
     def new_project(self):
-        if self._return_unsaved(): return
+        if self._return_unsaved():
+            return
 
         self._current_filepath = None
         self.state.world.resetWorld()
         event_bus.tilesChanged.emit()
         self.state.view.update()
-        
+
+    def undo(self):
+        if self.state.history.undo():
+            self._after_history_step()
+
+    def redo(self):
+        if self.state.history.redo():
+            self._after_history_step()
+
+    def _after_history_step(self):
+        self.state.view.updateCursorGood()
+        self.state.view.update()
+
+    def _update_edit_actions(self):
+        self.action_undo.setEnabled(self.state.history.canUndo())
+        self.action_redo.setEnabled(self.state.history.canRedo())
+
+    def _enable_edit_actions(self):
+        self.action_undo.setEnabled(True)
+        self.action_redo.setEnabled(True)
+
+    def _fill_floors_menu(self):
+        world = self.state.world
+        self.floors_menu.clear()
+        up = self.floors_menu.addAction("Floor up\tPgUp")
+        up.triggered.connect(lambda: self.state.view.changeFloor(1))
+        down = self.floors_menu.addAction("Floor down\tPgDown")
+        down.triggered.connect(lambda: self.state.view.changeFloor(-1))
+
+        for layer in reversed(world.layerIds()):
+            self.floors_menu.addSeparator()
+            title = f"Floor {layer}" + (
+                " (editing)" if layer == world.active_layer else ""
+            )
+            floor_menu = self.floors_menu.addMenu(title)
+            modes = QActionGroup(floor_menu)
+            for mode, label in (
+                (LAYER_SHOWN, "Shown"),
+                (LAYER_GHOST, "Ghost"),
+                (LAYER_HIDDEN, "Hidden"),
+            ):
+                action = floor_menu.addAction(label)
+                action.setCheckable(True)
+                action.setChecked(world.layerMode(layer) == mode)
+                action.triggered.connect(
+                    lambda _, l=layer, m=mode: self._set_floor_mode(l, m)
+                )
+                modes.addAction(action)
+
+    def _set_floor_mode(self, layer: int, mode: str):
+        self.state.world.setLayerMode(layer, mode)
+        self.state.view.update()
 
     def save_project(self):
         if not self._current_filepath:
@@ -63,72 +167,145 @@ class MenuBar(QMenuBar):
         self._save_to_file(self._current_filepath)
 
     def save_as_project(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Project As", "", "Project Files (*.json)")
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Save Project As", "", PROJECT_SAVE_FILTER
+        )
         if not path:
             return
+        # writeProject picks the format from the extension; not every
+        # platform dialog adds it
+        if not os.path.splitext(path)[1]:
+            path += BINARY_EXT if BINARY_EXT in selected else ".json"
         self._current_filepath = path
         self._save_to_file(path)
 
     def load_project(self):
-        if self._return_unsaved(): return
+        if self._return_unsaved():
+            return
 
-        path, _ = QFileDialog.getOpenFileName(self, "Load Project", "", "Project Files (*.json)")
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load Project", "", PROJECT_OPEN_FILTER
+        )
         if not path:
             return
         self._load_from_file(path)
         self._current_filepath = path
-    
+
+    def export_map(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Map", "dungeon_map.png", "PNG Image (*.png)"
+        )
+        if not path:
+            return
+        scale, ok = QInputDialog.getDouble(
+            self, "Export Map", "Pixels per world unit:", DEFAULT_SCALE, 0.05, 64.0, 2
+        )
+        if not ok:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Export Map",
+            "Also write a zoomable tile pyramid next to the image?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+        pyramid = (
+            os.path.splitext(path)[0] + "_tiles" if reply == QMessageBox.Yes else None
+        )
+
+        dlg = QProgressDialog("Rendering map...", "Abort", 0, 1, self)
+        dlg.setWindowTitle("Export Map")
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.show()
+
+        def on_progress(done, total):
+            dlg.setMaximum(total)
+            dlg.setValue(done)
+            QApplication.processEvents()
+            return not dlg.wasCanceled()
+
+        view = self.state.view
+        view.makeCurrent()
+        try:
+            size = exportMap(
+                self.state.world,
+                view.renderer,
+                path,
+                scale,
+                pyramid=pyramid,
+                progress=on_progress,
+            )
+        except Exception as e:
+            QMessageBox.warning(self, "Export Failed", f"Could not export map:\n{e}")
+            return
+        finally:
+            view.doneCurrent()
+            dlg.close()
+        if size is None and not dlg.wasCanceled():
+            QMessageBox.information(self, "Export Map", "Nothing has been placed yet.")
 
     def _save_to_file(self, path):
-        import json
-
-        serial = self.state.world.serializeWorld()
-        # Serialize as dict
-        data = {
-            "tile_meshes": serial.tile_meshes,
-            "objects": [obj.to_dict() for obj in serial.objects],
-            "camera": serial.camera.to_dict(),
-            "grid_size": serial.grid_size,
-            "grid_shown": serial.grid_shown,
-            "tile_id_counter": serial.tile_id_counter,
-        }
+        data = fromSerial(self.state.world.serializeWorld())
 
         try:
-            with open(path, "w") as f:
-                json.dump(data, f, indent=2)
+            writeProject(path, data)
         except Exception as e:
             QMessageBox.warning(self, "Save Failed", f"Could not save project:\n{e}")
+            return
+        self.state.journal.rebase(path)
 
     def _load_from_file(self, path):
         try:
-            with open(path, "r") as f:
-                data = json.load(f)
+            serial = toSerial(readProject(path))
         except Exception as e:
             QMessageBox.warning(self, "Load Failed", f"Could not load project:\n{e}")
             return
 
-        objects = [WorldObject.from_dict(d) for d in data.get("objects", [])]
+        self._apply_serial(serial)
+        self.state.journal.rebase(path)
 
-        serial = WorldSerial(
-            tile_meshes=data.get("tile_meshes", {}),
-            objects=objects,
-            camera=WorldCamera.from_dict(data.get("camera", WorldCamera())),
-            grid_size=data.get("grid_size", 50),
-            grid_shown=data.get("grid_shown", True),
-            tile_id_counter=data.get("tile_id_counter", 0),
-        )
-        
+    def _apply_serial(self, serial):
+        self.state.view.makeCurrent()  # tile meshes upload into the view's context
         self.state.world.resetWorld()
-        self.state.stlloader.importPaths(self, serial.tile_meshes)
+        # proxies first so the project opens at once; meshes stream in after
+        self.state.stlloader.importLazy(serial.tile_meshes)
         self.state.world.loadWorld(serial)
+        self.state.stlloader.loadInBackground(self.state.view)
         self.state.view.update()
 
+    def _on_view_ready(self):
+        event_bus.viewReady.disconnect(self._on_view_ready)
+        # not from inside initializeGL: recovery may open dialogs
+        QTimer.singleShot(0, self._recover_autosave)
+
+    def _recover_autosave(self):
+        journal = self.state.journal
+        recovered = None
+        if journal.hasRecovery():
+            reply = QMessageBox.question(
+                self,
+                "Recover Project",
+                "The previous session ended with unsaved changes. Recover them?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.Yes,
+            )
+            if reply == QMessageBox.Yes:
+                try:
+                    recovered = journal.recover()
+                    self._apply_serial(toSerial(recovered))
+                except Exception as e:
+                    QMessageBox.warning(
+                        self, "Recovery Failed", f"Could not recover project:\n{e}"
+                    )
+                    recovered = None
+        journal.start(recovered)
+
     def _return_unsaved(self):
         reply = QMessageBox.question(
             self,
             "New Project",
             "There may be unsaved changes in the current project, continue?",
             QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
+            QMessageBox.No,
         )
-        return reply != QMessageBox.Yes
\ No newline at end of file
+        return reply != QMessageBox.Yes
@@ -1,19 +1,19 @@
-
 from PyQt5.QtCore import Qt
-
 from PyQt5.QtWidgets import (
     QFileDialog,
     QListWidgetItem,
+    QMessageBox,
     QPushButton,
     QVBoxLayout,
     QWidget,
 )
 
+from src.controllers.exporter import count_mesh_ids
+
 from ..appstate import AppState
-from .toggelistwidget import ToggleListWidget
 from ..events import event_bus
-from src.controllers.exporter import count_tiles
-from PyQt5.QtWidgets import QMessageBox
+from .toggelistwidget import ToggleListWidget
+
 
 class Sidebar(QWidget):
     def __init__(self, state: AppState):
@@ -44,14 +44,27 @@ class Sidebar(QWidget):
 
         # Connect global events
         event_bus.tilesChanged.connect(self._onTilesChanged)
+        event_bus.tileIconChanged.connect(self._onTileIconChanged)
 
     def _onTilesChanged(self):
         self.lst_tiles.clear()
         for i, (key, tile) in enumerate(self.state.world.tile_meshes.items()):
             item = QListWidgetItem(tile.icon, tile.name)
-            item.setData(Qt.UserRole, key) 
+            item.setData(Qt.UserRole, key)
             self.lst_tiles.addItem(item)
-        
+
+    def _onTileIconChanged(self, tile_id):
+        # swap the icon in place; rebuilding would drop the selection and
+        # scroll position
+        tile = self.state.world.tile_meshes.get(tile_id)
+        if tile is None:
+            return
+        for row in range(self.lst_tiles.count()):
+            item = self.lst_tiles.item(row)
+            if item.data(Qt.UserRole) == tile_id:
+                item.setIcon(tile.icon)
+                break
+
     def _select(self, idx):
         item = self.lst_tiles.item(idx)
         tile_id = item.data(Qt.UserRole)
@@ -64,20 +77,22 @@ class Sidebar(QWidget):
         self.state.view.update()
 
     def _import(self):
-        paths, _ = QFileDialog.getOpenFileNames(self, "Pick STL-Files", "", "STL Files (*.stl)")
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Pick STL-Files", "", "STL Files (*.stl)"
+        )
         self.state.stlloader.importPaths(self, paths)
 
     def _export(self):
-        # Build a list of “placed” tiles for counting:
-        placed = [
-           { 'tile': self.state.world.tile_meshes[obj.mesh_id] }
-            for obj in self.state.world.objects
-        ]
-        counts = count_tiles(placed)
+        # count straight from the mesh_id column
+        world = self.state.world
+        counts = count_mesh_ids(
+            world.objects.mesh_id,
+            {tid: tile.name for tid, tile in world.tile_meshes.items()},
+        )
 
         # Format and show a simple summary dialog
         if counts:
             msg = "\n".join(f"{name}: {cnt}" for name, cnt in counts.items())
         else:
             msg = "No tiles placed yet."
-        QMessageBox.information(self, "Tile Counts", msg)
\ No newline at end of file
+        QMessageBox.information(self, "Tile Counts", msg)
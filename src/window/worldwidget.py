@@ -1,30 +1,43 @@
 import numpy as np
+from OpenGL.error import GLError
 from OpenGL.GL import *
-from OpenGL.GLU import *
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QVector3D
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QColor, QFont, QOpenGLFramebufferObject, QPainter, QVector3D
 from PyQt5.QtWidgets import QOpenGLWidget
 
+from .. import perf
 from ..events import event_bus
+from ..render.camera import CameraFrame
+from ..render.instancing import InstanceRenderer
+from ..render.scene import initSceneState
 from ..world.world import World
 
+
 class WorldWidget(QOpenGLWidget):
     def __init__(self, world: World, parent=None):
         super().__init__(parent)
-        
+
         # widget properties
         self.setMouseTracking(True)
 
         # common
         self.world = world
-        
+
         # cursor
         self.resetCursor()
 
-        # caching matrices
-        self._viewport = None
-        self._proj     = None
-        self._mv       = None
+        # camera, recomputed only when it or the widget size changes
+        self._frame: CameraFrame | None = None
+        self._frame_key = None
+        self._eye = np.zeros(3)
+        self._pixel_scale = 1.0
+        self._viewport = (0, 0, 1, 1)
+
+        # static scene cache
+        self._scene_fbo: QOpenGLFramebufferObject | None = None
+        self._scene_key = None
+        self._scene_cache_ok = True
+        self._blit_depth = True
 
         # listeners
         event_bus.keyPressed.connect(self._onGlobalKeyPress)
@@ -33,125 +46,137 @@ class WorldWidget(QOpenGLWidget):
         self.cursor_pos = None
         self.cursor_rotation = 0
         self.cursor_good = False
-        self.cursor_mode = None   # 'pan' or 'orbit'
+        self.cursor_mode = None  # 'pan' or 'orbit'
         self.last_mouse = None
+        self.drag_start = None  # grid cell where a line/rect drag began
+        self.drag_end = None
 
     def _onGlobalKeyPress(self, key):
         if key == Qt.Key_R:
             self.cursor_rotation = (self.cursor_rotation + 90) % 360
+            self.updateCursorGood()
+            self.update()
+        elif key in (Qt.Key_PageUp, Qt.Key_PageDown):
+            self.changeFloor(1 if key == Qt.Key_PageUp else -1)
+        elif key == Qt.Key_F3:
+            perf.setEnabled(not perf.enabled)
             self.update()
-    
+        elif key == Qt.Key_F4 and perf.enabled:
+            if perf.capturing():
+                print(f"Profile written to {perf.stopCapture()}")
+            else:
+                perf.startCapture()
+            self.update()
+
+    def changeFloor(self, step: int):
+        self.world.setActiveLayer(self.world.active_layer + step)
+        self.drag_start = self.drag_end = None
+        if self.cursor_pos is not None:
+            self.cursor_pos = [
+                self.cursor_pos[0],
+                self.cursor_pos[1],
+                self.world.layerZ(self.world.active_layer),
+            ]
+        self.updateCursorGood()
+        self.update()
+
+    def _cameraFrame(self) -> CameraFrame:
+        cam = self.world.camera
+        dpr = self.devicePixelRatioF()
+        key = (
+            cam.pan.x(),
+            cam.pan.y(),
+            cam.dist,
+            cam.azim,
+            cam.elev,
+            self.width(),
+            self.height(),
+            dpr,
+        )
+        if key != self._frame_key:
+            self._frame_key = key
+            self._frame = CameraFrame(
+                cam, self.width(), self.height(), round(self.height() * dpr)
+            )
+        return self._frame
+
     def _updateCursorPosition(self, cursor_x, cursor_y):
-        vp, proj, mv = self._viewport, self._proj, self._mv
-        real_y = vp[3] - cursor_y
-        x0,y0,z0 = gluUnProject(cursor_x, real_y, 0.0, mv, proj, vp)
-        x1,y1,z1 = gluUnProject(cursor_x, real_y, 1.0, mv, proj, vp)
-        t = -z0 / (z1 - z0)
-        wx = x0 + t*(x1 - x0)
-        wy = y0 + t*(y1 - y0)
-        wz = 0.0
-
-        self.cursor_pos = [wx, wy, wz]
-    
+        # pick on the floor being edited
+        z = self.world.layerZ(self.world.active_layer)
+        self.cursor_pos = self._cameraFrame().pickPlane(cursor_x, cursor_y, z)
+        if self.drag_start is not None and self.cursor_pos is not None:
+            self.drag_end = self.world.toGrid(self.cursor_pos)
+        self.updateCursorGood()
+
+    def updateCursorGood(self):
+        self.cursor_good = self.cursor_pos is not None and self.world.canPlace(
+            self.cursor_pos, self.cursor_rotation
+        )
+
+    def visibleMask(self, points: np.ndarray) -> np.ndarray:
+        """
+        Which world positions are currently on screen (with a small border).
+        """
+        return self._cameraFrame().visible(points, margin=0.1)
+
     def _updateMatrices(self):
+        frame = self._cameraFrame()
+        glMatrixMode(GL_PROJECTION)
+        glLoadMatrixd(frame.projection.T)
         glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
-
-        phi = np.radians(self.world.camera.elev)
-        th  = np.radians(self.world.camera.azim)
-        cx = self.world.camera.pan.x() + self.world.camera.dist * np.cos(phi) * np.cos(th)
-        cy = self.world.camera.pan.y() + self.world.camera.dist * np.cos(phi) * np.sin(th)
-        cz =                  self.world.camera.dist * np.sin(phi)
-        gluLookAt(cx, cy, cz,
-                  self.world.camera.pan.x(), self.world.camera.pan.y(), 0.0,
-                  0, 0, 1)
-
-        # cache matrices and viewport
-        self._viewport = glGetIntegerv(GL_VIEWPORT)
-        self._proj     = glGetDoublev(GL_PROJECTION_MATRIX)
-        self._mv       = glGetDoublev(GL_MODELVIEW_MATRIX)
+        glLoadMatrixd(frame.view.T)
+
+        self._eye = frame.eye
+        self._pixel_scale = frame.pixel_scale
+        dpr = self.devicePixelRatioF()
+        self._viewport = (0, 0, round(self.width() * dpr), round(self.height() * dpr))
 
     # Override
     def initializeGL(self):
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_NORMALIZE)
-        glEnable(GL_COLOR_MATERIAL)
-        glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)
-        glShadeModel(GL_SMOOTH)
-        glClearColor(0.2,0.2,0.2,1.0)
-
-        # lighting
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
-        glLightfv(GL_LIGHT0, GL_POSITION, [0.5,1.0,0.8,0.0])
-        glLightfv(GL_LIGHT0, GL_AMBIENT,  [0.3,0.3,0.3,1.0])
-        glLightfv(GL_LIGHT0, GL_DIFFUSE,  [0.7,0.7,0.7,1.0])
+        initSceneState()
+        self._scene_fbo = None  # a new context cannot use the old buffer
+        self._scene_key = None
 
-        # grid on Z=0 (XY-plane)
+        # grid on Z=0 (XY-plane), lifted to the active floor when drawn
         self.grid_list = glGenLists(1)
         glNewList(self.grid_list, GL_COMPILE)
         glDisable(GL_LIGHTING)
-        glColor3f(0.3,0.3,0.3)
+        glColor3f(0.3, 0.3, 0.3)
         glBegin(GL_LINES)
         gridSize = 100
         gridSquareSize = 1
-        for i in range(-gridSquareSize * gridSize, gridSquareSize * gridSize + 1, gridSquareSize):
+        for i in range(
+            -gridSquareSize * gridSize, gridSquareSize * gridSize + 1, gridSquareSize
+        ):
             # horizontal lines
-            glVertex3f(-gridSquareSize * gridSize, i, 0); glVertex3f(gridSquareSize * gridSize, i, 0)
+            glVertex3f(-gridSquareSize * gridSize, i, 0)
+            glVertex3f(gridSquareSize * gridSize, i, 0)
             # vertical lines
-            glVertex3f(i, -gridSquareSize * gridSize, 0); glVertex3f(i, gridSquareSize * gridSize, 0)
+            glVertex3f(i, -gridSquareSize * gridSize, 0)
+            glVertex3f(i, gridSquareSize * gridSize, 0)
         glEnd()
         glEnable(GL_LIGHTING)
         glEndList()
 
-    # Override
-    def resizeGL(self, w, h):
-        glViewport(0, 0, w, h)
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, w/max(h,1), 0.1, 2000.0)
-        glMatrixMode(GL_MODELVIEW)
+        self.renderer = InstanceRenderer()
+        event_bus.viewReady.emit()
 
     # Override
     def paintGL(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        if perf.enabled:
+            perf.frame.begin()
         self._updateMatrices()
 
-        # draw grid
-        if self.world.grid_shown:
-            glPushMatrix()
-            glScalef(1.0 * self.world.grid_size, 1.0 * self.world.grid_size, 1)
-            glCallList(self.grid_list)
-            glPopMatrix()
-
-        # draw world objects
-        glColor3f(0.5,0.5,0.5)
-        for obj in self.world.objects:
-            glPushMatrix()
-            x, y, z = obj.pos
-            mesh = self.world.tile_meshes[obj.mesh_id]
-            glTranslatef(x, y, z)
-            glRotatef(obj.rotation, 0, 0, 1)
-            glTranslatef(mesh.bb.size[0] / 2, mesh.bb.size[1] / 2, 0)
-            glCallList(mesh.list_id)
-            glPopMatrix()
-
-        # draw world object roots
-        glDisable(GL_LIGHTING)
-        glColor3f(0.2, 1, 1)
-        for obj in self.world.objects:
-            glPushMatrix()
-            x, y, z = obj.pos
-            glTranslatef(x, y, z)
-            glBegin(GL_QUADS)
-            size = 5
-            glVertex3f(-size/2, -size/2, -0.1)
-            glVertex3f(size/2, -size/2, -0.1)
-            glVertex3f(size/2, size/2, -0.1)
-            glVertex3f(-size/2, size/2, -0.1)
-            glEnd()
-            glPopMatrix()
-        glEnable(GL_LIGHTING)
+        # the grid and placed objects only change with the camera or world;
+        # cursor motion composites the cached frame and redraws the overlay
+        key = self._sceneKey()
+        if self._scene_fbo is None or key != self._scene_key:
+            self._renderScene(key)
+        if self._scene_fbo is None:
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            self._drawScene()
+        else:
+            self._blitScene()
 
         if self.cursor_pos is not None:
             glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT | GL_DEPTH_BUFFER_BIT)
@@ -170,19 +195,34 @@ class WorldWidget(QOpenGLWidget):
             if self.world.selected_mesh is not None:
                 # draw mesh cursor
                 ghost_tile = self.world.tile_meshes[self.world.selected_mesh]
-                # ox, oy, oz = self.world.toGridObject(ghost_tile.bb.size, rotation=round(self.cursor_rotation / 90))
-                # glTranslatef(-ox, -oy, 0)
                 glRotatef(self.cursor_rotation, 0, 0, 1)
                 glTranslatef(ghost_tile.bb.size[0] / 2, ghost_tile.bb.size[1] / 2, 0)
 
                 # draw ghost mesh
                 glColor4f(1, 1, 1, 0.4)
-                glCallList(ghost_tile.list_id)
+                ghost_tile.draw()
+                if perf.enabled:
+                    perf.frame.count(
+                        1, ghost_tile.levels[0].triangles if ghost_tile.levels else 0, 1
+                    )
 
                 # draw bounding box
                 glColor4f(0, 1, 0, 0.8) if self.cursor_good else glColor4f(1, 0, 0, 0.8)
                 corners = ghost_tile.bb.vertices
-                edges = [(0,1),(1,2),(2,3),(3,0),(4,5),(5,6),(6,7),(7,4),(0,4),(1,5),(2,6),(3,7)]
+                edges = [
+                    (0, 1),
+                    (1, 2),
+                    (2, 3),
+                    (3, 0),
+                    (4, 5),
+                    (5, 6),
+                    (6, 7),
+                    (7, 4),
+                    (0, 4),
+                    (1, 5),
+                    (2, 6),
+                    (3, 7),
+                ]
 
                 glBegin(GL_LINES)
                 for a, b in edges:
@@ -190,23 +230,6 @@ class WorldWidget(QOpenGLWidget):
                     glVertex3f(*corners[b])
                 glEnd()
 
-                # draw dims box
-                # half = ghost_tile.dims.size / 2 * 25
-                # z = -0.0001
-                # corners = [
-                #     (-half[0], -half[1], z),
-                #     ( half[0], -half[1], z),
-                #     ( half[0],  half[1], z),
-                #     (-half[0],  half[1], z),
-                # ]
-                # glColor4f(0, 0, 1, 0.5)  # greenish, semi-transparent
-
-                # glBegin(GL_QUADS)
-                # for x, y, z in corners:
-                #     glVertex3f(x, y, z)
-                # glEnd()
-
-
             else:
                 # draw empty cursor
                 glColor4f(1, 1, 1, 0.3)
@@ -221,7 +244,7 @@ class WorldWidget(QOpenGLWidget):
                 glVertex3f(size, size, 0)
                 glVertex3f(0, size, 0)
                 glEnd()
-                
+
                 # draw corner triangle
                 glColor4f(1, 1, 1, 0.3)
                 glBegin(GL_TRIANGLES)
@@ -234,24 +257,199 @@ class WorldWidget(QOpenGLWidget):
             glEnable(GL_LIGHTING)
             glPopAttrib()
 
+        if self.drag_start is not None:
+            self._drawDragArea()
+
+        if perf.enabled:
+            perf.frame.end()
+            self._drawHud()
+
+    def _dragCells(self) -> list[list[int]]:
+        if self.world.place_tool == "line":
+            return self.world.cellsOnLine(self.drag_start, self.drag_end)
+        return self.world.cellsInRect(self.drag_start, self.drag_end)
+
+    def _drawDragArea(self):
+        # either tool covers a rectangle; cells come sorted, so the first and
+        # last are its corners
+        cells = self._dragCells()
+        g = self.world.grid_size
+        x0, y0 = cells[0][0], cells[0][1]
+        x1, y1 = cells[-1][0] + g, cells[-1][1] + g
+        z = self.drag_start[2]
+
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glEnable(GL_BLEND)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_LIGHTING)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        r, gr, b = (1, 0.2, 0.2) if self.world.delete_mode else (1, 1, 1)
+        glColor4f(r, gr, b, 0.15)
+        glBegin(GL_QUADS)
+        for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1)):
+            glVertex3f(x, y, z)
+        glEnd()
+        glColor4f(r, gr, b, 0.8)
+        glBegin(GL_LINE_LOOP)
+        for x, y in ((x0, y0), (x1, y0), (x1, y1), (x0, y1)):
+            glVertex3f(x, y, z)
+        glEnd()
+        glPopAttrib()
+
+    def _applyDrag(self):
+        cells = self._dragCells()
+        if self.world.delete_mode:
+            if self.world.place_tool == "rect":
+                doomed = self.world.objectsInRect(self.drag_start, self.drag_end)
+            else:
+                doomed = list(
+                    {
+                        id(o): o for c in cells for o in self.world.objectsInCell(c)
+                    }.values()
+                )
+            self.world.removeObjects(doomed)
+        else:
+            self.world.placeObjects(cells, self.cursor_rotation)
+
+    def _sceneKey(self):
+        cam = self.world.camera
+        return (
+            self.world.revision,
+            self.world.grid_size,
+            self.world.grid_shown,
+            self.world.active_layer,
+            tuple(sorted(self.world.layer_modes.items())),
+            cam.pan.x(),
+            cam.pan.y(),
+            cam.pan.z(),
+            cam.dist,
+            cam.azim,
+            cam.elev,
+            int(self._viewport[2]),
+            int(self._viewport[3]),
+        )
+
+    def invalidateScene(self):
+        """
+        Force the cached static scene to be redrawn on the next paint.
+        """
+        self._scene_key = None
+
+    def _renderScene(self, key):
+        w, h = key[-2:]
+        if not self._scene_cache_ok:
+            return
+        if self._scene_fbo is None or self._scene_fbo.size() != QSize(w, h):
+            self._scene_fbo = None  # delete the old buffer while the context is current
+            fbo = QOpenGLFramebufferObject(
+                QSize(w, h), QOpenGLFramebufferObject.CombinedDepthStencil
+            )
+            if not fbo.isValid() or not bool(glBlitFramebuffer):
+                print("Scene caching disabled: offscreen framebuffers unavailable")
+                self._scene_cache_ok = False
+                return
+            self._scene_fbo = fbo
+        self._scene_fbo.bind()
+
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        self._drawScene()
+        glBindFramebuffer(GL_FRAMEBUFFER, self.defaultFramebufferObject())
+        self._scene_key = key
+
+    def _blitScene(self):
+        w, h = self._scene_key[-2:]
+        target = self.defaultFramebufferObject()
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self._scene_fbo.handle())
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+        if self._blit_depth:
+            try:
+                glBlitFramebuffer(
+                    0,
+                    0,
+                    w,
+                    h,
+                    0,
+                    0,
+                    w,
+                    h,
+                    GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT,
+                    GL_NEAREST,
+                )
+            except GLError:
+                # depth formats differ from the widget's buffer; the overlay
+                # ignores depth anyway
+                self._blit_depth = False
+        if not self._blit_depth:
+            glBlitFramebuffer(0, 0, w, h, 0, 0, w, h, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+
+    def _drawScene(self):
+        # draw grid
+        if self.world.grid_shown:
+            if perf.enabled:
+                perf.frame.count(1, 0)
+            glPushMatrix()
+            glTranslatef(0, 0, self.world.layerZ(self.world.active_layer))
+            glScalef(1.0 * self.world.grid_size, 1.0 * self.world.grid_size, 1)
+            glCallList(self.grid_list)
+            glPopMatrix()
+
+        # draw world objects
+        glColor3f(0.5, 0.5, 0.5)
+        self.renderer.drawObjects(self.world, self._eye, self._pixel_scale)
+
+        # draw root markers of the active floor
+        glDisable(GL_LIGHTING)
+        glColor3f(0.2, 1, 1)
+        self.renderer.drawRoots(self.world)
+        glEnable(GL_LIGHTING)
+
+    def _drawHud(self):
+        # QPainter changes GL state behind our back; keep ours intact
+        glPushAttrib(GL_ALL_ATTRIB_BITS)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+
+        painter = QPainter(self)
+        painter.setFont(QFont("Consolas", 9))
+        lines = perf.hudLines(self.world)
+        metrics = painter.fontMetrics()
+        height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines)
+        painter.fillRect(
+            4, 4, width + 12, height * len(lines) + 8, QColor(0, 0, 0, 160)
+        )
+        painter.setPen(QColor(220, 255, 220))
+        for i, line in enumerate(lines):
+            painter.drawText(10, 8 + metrics.ascent() + i * height, line)
+        painter.end()
+
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopMatrix()
+        glPopAttrib()
+
     # Override
     def mousePressEvent(self, ev):
         self.last_mouse = ev.pos()
         if ev.button() == Qt.LeftButton:
             if not self.cursor_pos:
                 return
-            if self.world.delete_mode:
-                # compute grid cell under cursor
-                grid_pos = self.world.toGrid(self.cursor_pos)
-                # remove the first object found at that cell
-                for obj in list(self.world.objects):
-                    if obj.pos == grid_pos:
-                        self.world.objects.remove(obj)
-                        break
+            if self.world.place_tool != "point":
+                # line/rect: apply the whole area on release
+                self.drag_start = self.drag_end = self.world.toGrid(self.cursor_pos)
                 self.update()
+                return
+            if self.world.delete_mode:
+                # remove the first object found in the grid cell under the cursor
+                self.world.removeAt(self.cursor_pos)
             else:
                 self.world.placeObject(self.cursor_pos, self.cursor_rotation)
-                self.update()
+            self.updateCursorGood()
+            self.update()
         elif ev.button() == Qt.MiddleButton:
             self.cursor_mode = 'orbit'
         elif ev.button() == Qt.RightButton:
@@ -260,6 +458,11 @@ class WorldWidget(QOpenGLWidget):
     # Override
     def mouseReleaseEvent(self, ev):
         self.cursor_mode = None
+        if ev.button() == Qt.LeftButton and self.drag_start is not None:
+            self._applyDrag()
+            self.drag_start = self.drag_end = None
+            self.updateCursorGood()
+            self.update()
 
     # Override
     def mouseMoveEvent(self, ev):
@@ -270,10 +473,10 @@ class WorldWidget(QOpenGLWidget):
             # calculate camera axes
             phi = np.radians(self.world.camera.elev)
             th = np.radians(self.world.camera.azim)
-            forward = np.array([np.cos(phi)*np.cos(th),
-                                np.cos(phi)*np.sin(th),
-                                np.sin(phi)])
-            right = np.cross(forward, [0,0,1])
+            forward = np.array(
+                [np.cos(phi) * np.cos(th), np.cos(phi) * np.sin(th), np.sin(phi)]
+            )
+            right = np.cross(forward, [0, 0, 1])
             right /= np.linalg.norm(right)
             # compute true up in world XY-plane
             up = np.cross(right, forward)
@@ -284,8 +487,10 @@ class WorldWidget(QOpenGLWidget):
 
         elif self.cursor_mode == 'orbit':
             self.world.camera.azim += dx * 0.3
-            self.world.camera.elev = max(-89, min(89, self.world.camera.elev + dy * 0.3))
-        
+            self.world.camera.elev = max(
+                -89, min(89, self.world.camera.elev + dy * 0.3)
+            )
+
         self._updateCursorPosition(ev.x(), ev.y())
         self.last_mouse = ev.pos()
         self.update()
@@ -300,7 +505,5 @@ class WorldWidget(QOpenGLWidget):
     def wheelEvent(self, ev):
         self.world.camera.dist *= 0.9 if ev.angleDelta().y() > 0 else 1.1
 
-        self.makeCurrent() # Force enable GL context
-        self._updateMatrices()
         self._updateCursorPosition(ev.x(), ev.y())
         self.update()
@@ -0,0 +1,136 @@
+import struct
+from collections import deque
+
+from .world import World
+from .worldobject import WorldObject
+
+UNDO_PLACE = 1  # objects were placed; undo removes them
+UNDO_REMOVE = 2  # objects were removed; undo puts them back
+UNDO_GRID = 3  # grid size changed
+
+_OBJECT = struct.Struct('<i3dh')  # mesh_id, pos, rotation
+_GRID = struct.Struct('<dd')  # old size, new size
+
+# bookkeeping per step on top of its payload: deque slot, tuple, bytes header
+_STEP_OVERHEAD = 8 + 56 + 33
+
+
+def _packObjects(objs: list[WorldObject]) -> bytes:
+    return b"".join(_OBJECT.pack(obj.mesh_id, *obj.pos, obj.rotation) for obj in objs)
+
+
+def _unpackObjects(payload: bytes) -> list[tuple]:
+    return list(_OBJECT.iter_unpack(payload))
+
+
+def _number(v: float) -> int | float:
+    # values are stored as doubles; give integral ones back as ints like toGrid
+    return int(v) if v.is_integer() else v
+
+
+class EditHistory:
+    """
+    Undo/redo as a bounded ring of compact deltas.
+
+    Every world edit is packed into a (kind, bytes) step of about 30 bytes
+    per touched object; no object references or world copies are kept, so
+    10k single-tile steps fit in a little over 1 MB. Undoing replays the
+    inverse through World's bulk methods and costs the size of the step.
+    The oldest steps are dropped once max_bytes or max_steps is exceeded.
+    Opening or resetting a project clears the history.
+    """
+
+    def __init__(
+        self, world: World, max_bytes: int = 8 * 1024 * 1024, max_steps: int = 10000
+    ):
+        self.world = world
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+
+        self._undo: deque[tuple[int, bytes]] = deque()
+        self._redo: list[tuple[int, bytes]] = []
+        self._bytes = 0
+        self._replaying = False
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def canUndo(self) -> bool:
+        return bool(self._undo)
+
+    def canRedo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    def onWorldEdit(self, kind: str, *args) -> None:
+        if self._replaying:
+            return
+        if kind == "place":
+            self._push(UNDO_PLACE, _packObjects(args[:1]))
+        elif kind == "placeMany":
+            self._push(UNDO_PLACE, _packObjects(args[0]))
+        elif kind == "remove":
+            self._push(UNDO_REMOVE, _packObjects(args[:1]))
+        elif kind == "removeMany":
+            self._push(UNDO_REMOVE, _packObjects(args[0]))
+        elif kind == "grid":
+            self._push(UNDO_GRID, _GRID.pack(*args))
+        elif kind in ("reset", "load"):
+            self.clear()
+
+    def _push(self, kind: int, payload: bytes) -> None:
+        self._redo.clear()
+        self._undo.append((kind, payload))
+        self._bytes += len(payload) + _STEP_OVERHEAD
+        while self._undo and (
+            self._bytes > self.max_bytes or len(self._undo) > self.max_steps
+        ):
+            _, dropped = self._undo.popleft()
+            self._bytes -= len(dropped) + _STEP_OVERHEAD
+
+    def undo(self) -> bool:
+        if not self._undo:
+            return False
+        step = self._undo.pop()
+        self._bytes -= len(step[1]) + _STEP_OVERHEAD
+        self._apply(step, inverse=True)
+        self._redo.append(step)
+        return True
+
+    def redo(self) -> bool:
+        if not self._redo:
+            return False
+        step = self._redo.pop()
+        self._apply(step, inverse=False)
+        self._undo.append(step)
+        self._bytes += len(step[1]) + _STEP_OVERHEAD
+        return True
+
+    def _apply(self, step: tuple[int, bytes], inverse: bool) -> None:
+        kind, payload = step
+        self._replaying = True
+        try:
+            if kind == UNDO_GRID:
+                old, new = _GRID.unpack(payload)
+                self.world.setGridSize(_number(old if inverse else new))
+                return
+            records = _unpackObjects(payload)
+            if (kind == UNDO_PLACE) == inverse:
+                self.world.removeObjects(self.world.findObjects(records))
+            else:
+                self.world.insertObjects([self._makeObject(rec) for rec in records])
+        finally:
+            self._replaying = False
+
+    @staticmethod
+    def _makeObject(record: tuple) -> WorldObject:
+        mesh_id, x, y, z, rotation = record
+        obj = WorldObject(mesh_id)
+        obj.pos = [_number(x), _number(y), _number(z)]
+        obj.rotation = rotation
+        return obj
@@ -0,0 +1,331 @@
+import os
+import queue
+import struct
+import threading
+from collections import Counter
+
+import numpy as np
+
+from ..cachedirs import cacheDir
+from .projectfile import BINARY_EXT, ProjectData, readProject, writeProject
+
+OP_RESET = 1
+OP_BASELINE = 2
+OP_TILE = 3
+OP_PLACE = 4
+OP_REMOVE = 5
+OP_GRID = 6
+OP_SNAPSHOT = 7  # like OP_BASELINE, but the file is an autosave, not a saved project
+
+_OP = struct.Struct('<B')
+_OBJECT = struct.Struct('<i3fh')  # mesh_id, pos, rotation
+_GRID = struct.Struct('<d')
+_TILE = struct.Struct('<iH')  # tile id, path length
+_PATH = struct.Struct('<H')  # path length
+
+_STOP = object()
+
+
+def _fsyncFile(path: str) -> None:
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def encodeRecord(op: int, *args) -> bytes:
+    if op in (OP_PLACE, OP_REMOVE):
+        return _OP.pack(op) + _OBJECT.pack(*args)
+    if op == OP_GRID:
+        return _OP.pack(op) + _GRID.pack(*args)
+    if op == OP_TILE:
+        tile_id, path = args
+        raw = path.encode()
+        return _OP.pack(op) + _TILE.pack(tile_id, len(raw)) + raw
+    if op in (OP_BASELINE, OP_SNAPSHOT):
+        raw = args[0].encode()
+        return _OP.pack(op) + _PATH.pack(len(raw)) + raw
+    return _OP.pack(op)
+
+
+def iterRecords(buf: bytes):
+    """
+    Yield (op, args) from a journal buffer, stopping at a torn final record.
+    """
+    i = 0
+    while i < len(buf):
+        op = buf[i]
+        i += 1
+        try:
+            if op in (OP_PLACE, OP_REMOVE):
+                mesh_id, x, y, z, rotation = _OBJECT.unpack_from(buf, i)
+                i += _OBJECT.size
+                yield op, (mesh_id, x, y, z, rotation)
+            elif op == OP_GRID:
+                yield op, _GRID.unpack_from(buf, i)
+                i += _GRID.size
+            elif op == OP_TILE:
+                tile_id, n = _TILE.unpack_from(buf, i)
+                i += _TILE.size
+                if i + n > len(buf):
+                    return
+                yield op, (tile_id, buf[i : i + n].decode())
+                i += n
+            elif op in (OP_BASELINE, OP_SNAPSHOT):
+                (n,) = _PATH.unpack_from(buf, i)
+                i += _PATH.size
+                if i + n > len(buf):
+                    return
+                yield op, (buf[i : i + n].decode(),)
+                i += n
+            elif op == OP_RESET:
+                yield op, ()
+            else:
+                return
+        except struct.error:
+            return
+
+
+class ShadowState:
+    """
+    Project contents rebuilt from journal records. Objects are a multiset
+    keyed on (mesh_id, x, y, z, rotation) so every record applies in O(1).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.header: dict = {
+            "tile_meshes": {},
+            "grid_size": 50,
+            "grid_shown": True,
+            "tile_id_counter": 0,
+        }
+        self.objects: Counter = Counter()
+
+    def baseline(self, data: ProjectData) -> None:
+        self.reset()
+        self.header.update(data.header)
+        self.header["tile_meshes"] = {
+            str(k): v for k, v in self.header.get("tile_meshes", {}).items()
+        }
+        for mesh_id, (x, y, z), rotation in zip(
+            data.mesh_id.tolist(), data.pos.tolist(), data.rotation.tolist()
+        ):
+            self.objects[(mesh_id, x, y, z, rotation)] += 1
+
+    def apply(self, op: int, args: tuple) -> None:
+        if op == OP_PLACE:
+            self.objects[args] += 1
+        elif op == OP_REMOVE:
+            if self.objects[args] > 1:
+                self.objects[args] -= 1
+            else:
+                self.objects.pop(args, None)
+        elif op == OP_GRID:
+            self.header["grid_size"] = args[0]
+        elif op == OP_TILE:
+            tile_id, path = args
+            self.header["tile_meshes"][str(tile_id)] = path
+            self.header["tile_id_counter"] = max(
+                self.header.get("tile_id_counter", 0), tile_id + 1
+            )
+        elif op == OP_RESET:
+            self.reset()
+        elif op in (OP_BASELINE, OP_SNAPSHOT):
+            try:
+                self.baseline(readProject(args[0]))
+            except (OSError, ValueError) as e:
+                print(f"Journal baseline {args[0]} unreadable: {e}")
+                self.reset()
+
+    def toProject(self) -> ProjectData:
+        rows = list(self.objects.elements())
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return ProjectData(
+            header=dict(self.header),
+            mesh_id=table[:, 0].astype(np.int32),
+            pos=table[:, 1:4].astype(np.float32),
+            rotation=table[:, 4].astype(np.int16),
+        )
+
+
+class Journal:
+    """
+    Append-only log of world edits with background autosave.
+
+    World listeners encode each edit into a few bytes and queue it; a writer
+    thread appends batches to the journal file, mirrors them into a
+    ShadowState and, every compact_every records, writes that state as a
+    binary snapshot and restarts the journal from it. The GUI thread never
+    serializes the world.
+    """
+
+    def __init__(self, folder=None, flush_interval=1.0, compact_every=5000):
+        self.folder = folder or cacheDir("autosave")
+        self.journal_path = os.path.join(self.folder, "journal.bin")
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        # edits not covered by a saved or opened project file (GUI side)
+        self.edits_since_baseline = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._snapshot_flip = 0
+
+    def _writeSnapshot(self, data: ProjectData) -> str:
+        # alternate between two files so the snapshot the journal still
+        # points at is never overwritten before the journal is truncated
+        self._snapshot_flip ^= 1
+        path = os.path.join(self.folder, f"snapshot{self._snapshot_flip}{BINARY_EXT}")
+        writeProject(path + ".tmp", data, binary=True)
+        _fsyncFile(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return path
+
+    def _replaceJournal(self, records: bytes) -> None:
+        # the live journal is swapped whole, so a crash leaves the old or the new one
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _readJournal(self) -> bytes:
+        try:
+            with open(self.journal_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return b''
+
+    def hasRecovery(self) -> bool:
+        edits = 0
+        for op, _ in iterRecords(self._readJournal()):
+            edits = (
+                0 if op in (OP_RESET, OP_BASELINE) else edits + 1
+            )  # snapshots hold unsaved work
+        return edits > 0
+
+    def recover(self) -> ProjectData:
+        state = ShadowState()
+        for op, args in iterRecords(self._readJournal()):
+            state.apply(op, args)
+        return state.toProject()
+
+    def start(self, baseline: ProjectData | None = None) -> None:
+        """
+        Begin a fresh journal, optionally from recovered contents.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        state = ShadowState()
+        if baseline is not None:
+            path = self._writeSnapshot(baseline)
+            state.baseline(baseline)
+            first = encodeRecord(OP_SNAPSHOT, path)
+            self.edits_since_baseline = 1  # recovered work is still unsaved
+        else:
+            first = encodeRecord(OP_RESET)
+            self.edits_since_baseline = 0
+
+        self._replaceJournal(first)
+        clean = first if baseline is None else None
+        self._thread = threading.Thread(
+            target=self._run, args=(state, clean), name="journal", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if self.edits_since_baseline == 0:
+            # nothing to recover: the last saved or opened file is current
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+
+    def rebase(self, path: str) -> None:
+        """
+        Mark the world as equal to the project file at path.
+        """
+        self._put(encodeRecord(OP_BASELINE, os.path.abspath(path)))
+        self.edits_since_baseline = 0
+
+    def onWorldEdit(self, kind: str, *args) -> None:
+        if kind == "place" or kind == "remove":
+            obj = args[0]
+            op = OP_PLACE if kind == "place" else OP_REMOVE
+            self._put(encodeRecord(op, obj.mesh_id, *obj.pos, obj.rotation))
+        elif kind == "placeMany" or kind == "removeMany":
+            op = OP_PLACE if kind == "placeMany" else OP_REMOVE
+            for obj in args[0]:
+                self._put(encodeRecord(op, obj.mesh_id, *obj.pos, obj.rotation))
+            self.edits_since_baseline += len(args[0])
+            return
+        elif kind == "grid":
+            self._put(encodeRecord(OP_GRID, args[1]))
+        elif kind == "tile":
+            tile_id, tile = args
+            self._put(encodeRecord(OP_TILE, tile_id, tile.filepath))
+        elif kind == "reset":
+            self._put(encodeRecord(OP_RESET))
+            self.edits_since_baseline = 0
+            return
+        else:
+            # "load" is followed by rebase() from whoever read the file;
+            # "tileMesh" changes no file
+            return
+        self.edits_since_baseline += 1
+
+    def _put(self, record: bytes) -> None:
+        if self._thread is not None:
+            self._queue.put(record)
+
+    def _run(self, state: ShadowState, clean: bytes | None) -> None:
+        # clean: the last OP_RESET/OP_BASELINE record while no edit followed it
+        since_compact = 0
+        f = open(self.journal_path, "ab")
+        try:
+            stop = False
+            while not stop:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in batch:
+                    batch = batch[: batch.index(_STOP)]
+                    stop = True
+
+                data = b''.join(batch)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                for op, args in iterRecords(data):
+                    state.apply(op, args)
+                    clean = (
+                        encodeRecord(op, *args)
+                        if op in (OP_RESET, OP_BASELINE)
+                        else None
+                    )
+
+                since_compact += len(batch)
+                if since_compact >= self.compact_every:
+                    path = self._writeSnapshot(state.toProject())
+                    # a compaction right after a save or open must not look
+                    # like unsaved work
+                    f.close()
+                    self._replaceJournal(
+                        encodeRecord(OP_SNAPSHOT, path) + (clean or b'')
+                    )
+                    f = open(self.journal_path, "ab")
+                    since_compact = 0
+        finally:
+            f.close()
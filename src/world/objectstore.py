@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .worldobject import WorldObject
+
+_MIN_CAPACITY = 64
+
+
+class ObjectStore:
+    """
+    Placed objects as contiguous typed columns (mesh_id, pos, rotation)
+    with amortized growth and swap-remove deletes, so renderers, counters
+    and savers work on whole arrays.
+
+    Iterating or indexing yields WorldObject handles: __slots__ views that
+    are created on first access and keep their identity while the object
+    is stored. A removed handle is detached with its last values, so
+    listeners can still read what was removed.
+    """
+
+    def __init__(self, capacity: int = 0):
+        capacity = max(capacity, _MIN_CAPACITY)
+        self._count = 0
+        self._mesh_id = np.zeros(capacity, dtype=np.int32)
+        self._pos = np.zeros((capacity, 3), dtype=np.float64)
+        self._rotation = np.zeros(capacity, dtype=np.int16)
+        self._handles: list[WorldObject | None] = []  # by slot, filled lazily
+
+    @classmethod
+    def fromColumns(
+        cls, mesh_id: np.ndarray, pos: np.ndarray, rotation: np.ndarray
+    ) -> ObjectStore:
+        store = cls(len(mesh_id))
+        store._count = n = len(mesh_id)
+        store._mesh_id[:n] = mesh_id
+        store._pos[:n] = np.asarray(pos).reshape(-1, 3)
+        store._rotation[:n] = rotation
+        store._handles = [None] * n
+        return store
+
+    @classmethod
+    def fromObjects(cls, objects: Iterable[WorldObject]) -> ObjectStore:
+        objects = list(objects)
+        return cls.fromColumns(
+            np.fromiter(
+                (o.mesh_id for o in objects), dtype=np.int32, count=len(objects)
+            ),
+            np.array([o.pos for o in objects], dtype=np.float64).reshape(-1, 3),
+            np.fromiter(
+                (o.rotation for o in objects), dtype=np.int16, count=len(objects)
+            ),
+        )
+
+    # columns, trimmed to the stored objects; views, not copies
+
+    @property
+    def mesh_id(self) -> np.ndarray:
+        return self._mesh_id[: self._count]
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self._pos[: self._count]
+
+    @property
+    def rotation(self) -> np.ndarray:
+        return self._rotation[: self._count]
+
+    @property
+    def nbytes(self) -> int:
+        return self._mesh_id.nbytes + self._pos.nbytes + self._rotation.nbytes
+
+    def copy(self) -> ObjectStore:
+        return ObjectStore.fromColumns(self.mesh_id, self.pos, self.rotation)
+
+    # sequence of handles
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, slot: int) -> WorldObject:
+        if slot < 0:
+            slot += self._count
+        if not 0 <= slot < self._count:
+            raise IndexError(slot)
+        obj = self._handles[slot]
+        if obj is None:
+            obj = self._handles[slot] = WorldObject.attached(self, slot)
+        return obj
+
+    def __contains__(self, obj: WorldObject) -> bool:
+        return obj._store is self
+
+    def __iter__(self) -> Iterator[WorldObject]:
+        for slot in range(self._count):
+            yield self[slot]
+
+    # edits
+
+    def _reserve(self, extra: int) -> None:
+        need = self._count + extra
+        capacity = len(self._mesh_id)
+        if need <= capacity:
+            return
+        capacity = max(need, capacity * 2)
+        for name in ("_mesh_id", "_pos", "_rotation"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[: self._count] = old[: self._count]
+            setattr(self, name, grown)
+
+    def add(self, obj: WorldObject) -> None:
+        """
+        Store a detached object; it becomes a handle into the columns.
+        """
+        self.extend([obj])
+
+    def extend(self, objs: list[WorldObject]) -> None:
+        self._reserve(len(objs))
+        for obj in objs:
+            slot = self._count
+            self._mesh_id[slot] = obj.mesh_id
+            self._pos[slot] = obj.pos
+            self._rotation[slot] = obj.rotation
+            self._count += 1
+            obj._attach(self, slot)
+            self._handles.append(obj)
+
+    def remove(self, obj: WorldObject) -> None:
+        """
+        Swap-remove: the last object moves into obj's slot. O(1).
+        """
+        if obj._store is not self:
+            raise ValueError("object is not in this store")
+        slot = obj._slot
+        obj._detach()
+
+        last = self._count - 1
+        if slot != last:
+            self._mesh_id[slot] = self._mesh_id[last]
+            self._pos[slot] = self._pos[last]
+            self._rotation[slot] = self._rotation[last]
+            moved = self._handles[last]
+            self._handles[slot] = moved
+            if moved is not None:
+                moved._slot = slot
+        self._handles.pop()
+        self._count = last
+
+    def clear(self) -> None:
+        for obj in self._handles:
+            if obj is not None:
+                obj._detach()
+        self._handles = []
+        self._count = 0
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .objectstore import ObjectStore
+
+# Cell edge in world units: the finest grid reachable by halving the
+# default 50 (growGrid/shrinkGrid), which also divides the 25 unit
+# footprint steps, so footprints rasterize exactly.
+OCCUPANCY_QUANTUM = 6.25
+
+# cells per chunk edge; chunks are allocated only where tiles are placed
+CHUNK_CELLS = 64
+
+# chunks rasterized per pass in rebuild()
+_REBUILD_BATCH = 256
+
+
+def footprintRect(
+    pos: list[float], size: np.ndarray, rotation: int
+) -> tuple[float, float, float, float]:
+    """
+    (xmin, ymin, xmax, ymax) covered by a tile whose footprint [0, sx] x
+    [0, sy] is rotated by a multiple of 90 degrees about its root pos,
+    matching how objects and the ghost cursor are drawn.
+    """
+    sx, sy = float(size[0]), float(size[1])
+    x, y = pos[0], pos[1]
+    quarter = round(rotation / 90) % 4
+    if quarter == 0:
+        return x, y, x + sx, y + sy
+    if quarter == 1:
+        return x - sy, y, x, y + sx
+    if quarter == 2:
+        return x - sx, y - sy, x, y
+    return x, y - sx, x + sy, y
+
+
+class OccupancyGrid:
+    """
+    Sparse per-layer raster of placed tile footprints. Each cell counts
+    the tiles covering it, so placing and removing are symmetric and
+    overlap tests cost the footprint's area rather than the object count.
+    Layers are keyed on the root z: tiles only collide with tiles on the
+    same floor.
+    """
+
+    def __init__(self, quantum: float = OCCUPANCY_QUANTUM):
+        self.quantum = quantum
+        self._chunks: dict[tuple[int, int, int], np.ndarray] = (
+            {}
+        )  # (layer, cx, cy) -> uint16 counts
+
+    def clear(self) -> None:
+        self._chunks.clear()
+
+    def _cells(
+        self, pos: list[float], size: np.ndarray, rotation: int
+    ) -> tuple[int, int, int, int, int]:
+        q = self.quantum
+        x0, y0, x1, y1 = footprintRect(pos, size, rotation)
+        return (
+            round(pos[2] / q),
+            math.floor(x0 / q + 1e-6),
+            math.floor(y0 / q + 1e-6),
+            math.ceil(x1 / q - 1e-6),
+            math.ceil(y1 / q - 1e-6),
+        )
+
+    def _spans(self, x0: int, y0: int, x1: int, y1: int):
+        # (chunk x, chunk y, slice into the chunk) for every chunk the cell rect touches
+        n = CHUNK_CELLS
+        for cx in range(x0 // n, (x1 - 1) // n + 1):
+            sx = slice(max(x0 - cx * n, 0), min(x1 - cx * n, n))
+            for cy in range(y0 // n, (y1 - 1) // n + 1):
+                yield cx, cy, (sx, slice(max(y0 - cy * n, 0), min(y1 - cy * n, n)))
+
+    def add(self, pos: list[float], size: np.ndarray, rotation: int) -> None:
+        self._addCells(*self._cells(pos, size, rotation))
+
+    def remove(self, pos: list[float], size: np.ndarray, rotation: int) -> None:
+        layer, x0, y0, x1, y1 = self._cells(pos, size, rotation)
+        for cx, cy, cells in self._spans(x0, y0, x1, y1):
+            chunk = self._chunks.get((layer, cx, cy))
+            if chunk is None:
+                continue
+            view = chunk[cells]
+            view[view > 0] -= 1
+            if not chunk.any():
+                del self._chunks[(layer, cx, cy)]
+
+    def overlaps(self, pos: list[float], size: np.ndarray, rotation: int) -> bool:
+        """
+        True if a footprint at pos would cover any occupied cell.
+        """
+        layer, x0, y0, x1, y1 = self._cells(pos, size, rotation)
+        for cx, cy, cells in self._spans(x0, y0, x1, y1):
+            chunk = self._chunks.get((layer, cx, cy))
+            if chunk is not None and chunk[cells].any():
+                return True
+        return False
+
+    def rebuild(self, objects: ObjectStore, sizes: dict[int, np.ndarray]) -> None:
+        """
+        Rasterize every stored object from the columns: footprints are cut
+        into per-chunk pieces and summed through difference arrays instead
+        of a slice add per object.
+        """
+        self._chunks.clear()
+        if not sizes or not len(objects):
+            return
+        ids = np.fromiter(sizes, dtype=np.int64, count=len(sizes))
+        table = np.array([sizes[i] for i in ids.tolist()], dtype=np.float64).reshape(
+            -1, 2
+        )
+        order = np.argsort(ids)
+        where = np.searchsorted(ids, objects.mesh_id, sorter=order)
+        where = order[np.minimum(where, len(ids) - 1)]
+        known = ids[where] == objects.mesh_id
+        if not known.any():
+            return
+
+        pos = objects.pos[known]
+        sx, sy = table[where[known]].T
+        quarter = np.round(objects.rotation[known] / 90).astype(np.int64) % 4
+        x, y = pos[:, 0], pos[:, 1]
+        # footprintRect, vectorized
+        xmin = np.choose(quarter, (x, x - sy, x - sx, x))
+        ymin = np.choose(quarter, (y, y, y - sy, y - sx))
+        xmax = np.choose(quarter, (x + sx, x, x, x + sy))
+        ymax = np.choose(quarter, (y + sy, y + sx, y, y))
+
+        q = self.quantum
+        layer = np.round(pos[:, 2] / q).astype(np.int64)
+        x0 = np.floor(xmin / q + 1e-6).astype(np.int64)
+        y0 = np.floor(ymin / q + 1e-6).astype(np.int64)
+        x1 = np.ceil(xmax / q - 1e-6).astype(np.int64)
+        y1 = np.ceil(ymax / q - 1e-6).astype(np.int64)
+
+        # split each footprint into its per-chunk pieces
+        n = CHUNK_CELLS
+        cx0, cy0 = x0 // n, y0 // n
+        nx, ny = (x1 - 1) // n - cx0 + 1, (y1 - 1) // n - cy0 + 1
+        pieces = nx * ny
+        src = np.repeat(np.arange(len(x0)), pieces)
+        k = np.arange(len(src)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        cx = cx0[src] + k // ny[src]
+        cy = cy0[src] + k % ny[src]
+        lx0 = np.clip(x0[src] - cx * n, 0, n)
+        lx1 = np.clip(x1[src] - cx * n, 0, n)
+        ly0 = np.clip(y0[src] - cy * n, 0, n)
+        ly1 = np.clip(y1[src] - cy * n, 0, n)
+
+        # chunk keys packed into one integer for a fast unique
+        lz = layer[src]
+        base = lz.min(), cx.min(), cy.min()
+        span_x, span_y = cx.max() - base[1] + 1, cy.max() - base[2] + 1
+        packed = ((lz - base[0]) * span_x + (cx - base[1])) * span_y + (cy - base[2])
+        packed_keys, chunk = np.unique(packed, return_inverse=True)
+        keys = np.column_stack(
+            (
+                packed_keys // (span_x * span_y) + base[0],
+                packed_keys // span_y % span_x + base[1],
+                packed_keys % span_y + base[2],
+            )
+        )
+        order = np.argsort(chunk, kind='stable')
+        bounds = np.searchsorted(
+            chunk[order], np.arange(0, len(keys) + _REBUILD_BATCH, _REBUILD_BATCH)
+        )
+        # one difference array per chunk, summed in batches to bound memory
+        e = n + 1
+        for b, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            sel = order[lo:hi]
+            local = chunk[sel] - b * _REBUILD_BATCH
+            count = min(_REBUILD_BATCH, len(keys) - b * _REBUILD_BATCH)
+            flat = np.concatenate(
+                (
+                    local * e * e + lx0[sel] * e + ly0[sel],
+                    local * e * e + lx1[sel] * e + ly1[sel],
+                    local * e * e + lx1[sel] * e + ly0[sel],
+                    local * e * e + lx0[sel] * e + ly1[sel],
+                )
+            )
+            weights = np.repeat(np.array([1, 1, -1, -1], dtype=np.float64), len(sel))
+            diff = np.bincount(flat, weights, minlength=count * e * e).reshape(
+                count, e, e
+            )
+            counts = diff.cumsum(axis=1).cumsum(axis=2)[:, :n, :n].astype(np.uint16)
+            for i, key in enumerate(
+                keys[b * _REBUILD_BATCH : b * _REBUILD_BATCH + count].tolist()
+            ):
+                self._chunks[tuple(key)] = counts[i]
+
+    def _addCells(self, layer: int, x0: int, y0: int, x1: int, y1: int) -> None:
+        for cx, cy, cells in self._spans(x0, y0, x1, y1):
+            chunk = self._chunks.get((layer, cx, cy))
+            if chunk is None:
+                chunk = self._chunks[(layer, cx, cy)] = np.zeros(
+                    (CHUNK_CELLS, CHUNK_CELLS), dtype=np.uint16
+                )
+            chunk[cells] += 1
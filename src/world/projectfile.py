@@ -0,0 +1,206 @@
+import argparse
+import json
+import struct
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+MAGIC = b'VRDP'
+VERSION = 1
+BINARY_EXT = ".dbp"
+
+FLAG_COMPRESSED = 0x1
+
+# magic, version, flags, object count, header length
+_HEADER = struct.Struct('<4sHHII')
+
+
+@dataclass
+class ProjectData:
+    """
+    On-disk project contents, independent of Qt and GL: a small header
+    (tile paths, camera, grid) plus the placed objects as typed columns.
+    """
+
+    header: dict = field(default_factory=dict)
+    mesh_id: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    pos: np.ndarray = field(default_factory=lambda: np.empty((0, 3), dtype=np.float32))
+    rotation: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))
+
+    def __len__(self) -> int:
+        return len(self.mesh_id)
+
+
+def isBinaryProject(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def readProject(path: str) -> ProjectData:
+    if isBinaryProject(path):
+        return _readBinary(path)
+    return _readJson(path)
+
+
+def writeProject(
+    path: str, data: ProjectData, binary: bool | None = None, compress: bool = True
+) -> None:
+    """
+    Write data as a binary project when binary is True (default: when the
+    path ends in BINARY_EXT), otherwise as the classic JSON format.
+    """
+    if binary is None:
+        binary = path.lower().endswith(BINARY_EXT)
+    if binary:
+        _writeBinary(path, data, compress)
+    else:
+        _writeJson(path, data)
+
+
+def _readBinary(path: str) -> ProjectData:
+    with open(path, "rb") as f:
+        raw = f.read()
+    # truncated or corrupt files surface as ValueError, like the JSON reader
+    try:
+        magic, version, flags, count, header_len = _HEADER.unpack_from(raw)
+    except struct.error as e:
+        raise ValueError(f"Truncated project file: {e}") from e
+    if magic != MAGIC or version > VERSION:
+        raise ValueError(f"Unsupported project file version {version}")
+
+    start = _HEADER.size
+    header = json.loads(raw[start : start + header_len])
+    body = raw[start + header_len :]
+    if flags & FLAG_COMPRESSED:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt project body: {e}") from e
+
+    mesh_id = np.frombuffer(body, dtype='<i4', count=count, offset=0)
+    pos = np.frombuffer(
+        body, dtype='<f4', count=count * 3, offset=mesh_id.nbytes
+    ).reshape(count, 3)
+    rotation = np.frombuffer(
+        body, dtype='<i2', count=count, offset=mesh_id.nbytes + pos.nbytes
+    )
+    return ProjectData(header, mesh_id, pos, rotation)
+
+
+def _writeBinary(path: str, data: ProjectData, compress: bool) -> None:
+    header = json.dumps(data.header).encode()
+    body = b''.join(
+        (
+            np.ascontiguousarray(data.mesh_id, dtype='<i4').tobytes(),
+            np.ascontiguousarray(data.pos, dtype='<f4').tobytes(),
+            np.ascontiguousarray(data.rotation, dtype='<i2').tobytes(),
+        )
+    )
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_COMPRESSED
+
+    with open(path, "wb") as f:
+        f.write(
+            _HEADER.pack(MAGIC, VERSION, flags, len(data), len(header)) + header + body
+        )
+
+
+def _readJson(path: str) -> ProjectData:
+    with open(path, "r") as f:
+        raw = json.load(f)
+
+    objects = raw.pop("objects", [])
+    data = ProjectData(header=raw)
+    data.mesh_id = np.fromiter(
+        (o["mesh_id"] for o in objects), dtype=np.int32, count=len(objects)
+    )
+    data.pos = np.array([o["pos"] for o in objects], dtype=np.float32).reshape(-1, 3)
+    data.rotation = np.fromiter(
+        (o["rotation"] for o in objects), dtype=np.int16, count=len(objects)
+    )
+    return data
+
+
+def _writeJson(path: str, data: ProjectData) -> None:
+    # plain Python numbers; whole values stay ints like the original format
+    pos = [
+        [int(v) if v.is_integer() else v for v in p]
+        for p in data.pos.astype(float).tolist()
+    ]
+    raw = dict(data.header)
+    raw["objects"] = [
+        {"mesh_id": m, "pos": p, "rotation": r}
+        for m, p, r in zip(data.mesh_id.tolist(), pos, data.rotation.tolist())
+    ]
+    with open(path, "w") as f:
+        json.dump(raw, f, indent=2)
+
+
+def fromSerial(serial) -> ProjectData:
+    # imported here so the file format itself stays usable without Qt/GL
+    from .objectstore import ObjectStore
+
+    objects = serial.objects
+    if not isinstance(objects, ObjectStore):
+        objects = ObjectStore.fromObjects(objects)
+    return ProjectData(
+        header={
+            "tile_meshes": serial.tile_meshes,
+            "camera": serial.camera.to_dict(),
+            "grid_size": serial.grid_size,
+            "grid_shown": serial.grid_shown,
+            "tile_id_counter": serial.tile_id_counter,
+            "layer_height": serial.layer_height,
+            "active_layer": serial.active_layer,
+            "layer_modes": {str(k): v for k, v in serial.layer_modes.items()},
+        },
+        mesh_id=objects.mesh_id.astype(np.int32),
+        pos=objects.pos.astype(np.float32),
+        rotation=objects.rotation.astype(np.int16),
+    )
+
+
+def toSerial(data: ProjectData):
+    # imported here so the file format itself stays usable without Qt/GL
+    from .objectstore import ObjectStore
+    from .world import LAYER_HEIGHT, WorldSerial
+    from .worldcamera import WorldCamera
+
+    objects = ObjectStore.fromColumns(data.mesh_id, data.pos, data.rotation)
+
+    header = data.header
+    camera = header.get("camera")
+    return WorldSerial(
+        tile_meshes={int(k): v for k, v in header.get("tile_meshes", {}).items()},
+        objects=objects,
+        camera=WorldCamera.from_dict(camera) if camera else WorldCamera(),
+        grid_size=header.get("grid_size", 50),
+        grid_shown=header.get("grid_shown", True),
+        tile_id_counter=header.get("tile_id_counter", 0),
+        layer_height=header.get("layer_height", LAYER_HEIGHT),
+        active_layer=header.get("active_layer", 0),
+        layer_modes={int(k): v for k, v in header.get("layer_modes", {}).items()},
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert dungeon projects between JSON and binary formats."
+    )
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument(
+        "--no-compress", action="store_true", help="write the binary body uncompressed"
+    )
+    args = parser.parse_args(argv)
+
+    data = readProject(args.source)
+    writeProject(args.target, data, compress=not args.no_compress)
+    print(f"{args.source} -> {args.target} ({len(data)} objects)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .worldobject import WorldObject
+
+if TYPE_CHECKING:
+    from .objectstore import ObjectStore
+
+# Bucket edge in world units. Fixed rather than tied to World.grid_size so
+# growing or shrinking the grid never forces a rebuild; a cell query just
+# touches ceil(grid_size / INDEX_CELL_SIZE)^2 buckets.
+INDEX_CELL_SIZE = 50.0
+
+_EPS = 1e-6
+
+
+class SpatialIndex:
+    """
+    Spatial hash of placed objects keyed on their root position.
+    """
+
+    def __init__(self, cell_size: float = INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self._buckets: dict[tuple[int, int, int], list[WorldObject]] = {}
+
+    def _key(self, pos: list[float]) -> tuple[int, int, int]:
+        cs = self.cell_size
+        return (
+            math.floor(pos[0] / cs + _EPS),
+            math.floor(pos[1] / cs + _EPS),
+            math.floor(pos[2] / cs + _EPS),
+        )
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def rebuild(self, objects: ObjectStore) -> None:
+        # bucket keys straight from the position column
+        self._buckets.clear()
+        keys = np.floor(objects.pos / self.cell_size + _EPS).astype(np.int64)
+        buckets = self._buckets
+        for key, obj in zip(map(tuple, keys.tolist()), objects):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [obj]
+            else:
+                bucket.append(obj)
+
+    def insert(self, obj: WorldObject) -> None:
+        self._buckets.setdefault(self._key(obj.pos), []).append(obj)
+
+    def remove(self, obj: WorldObject) -> bool:
+        key = self._key(obj.pos)
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return False
+        for i, other in enumerate(bucket):
+            if other is obj:
+                del bucket[i]
+                if not bucket:
+                    del self._buckets[key]
+                return True
+        return False
+
+    def queryBox(
+        self, min_corner: list[float], max_corner: list[float]
+    ) -> list[WorldObject]:
+        """
+        Objects whose root lies in [min_corner, max_corner) on every axis.
+        """
+        lo = [c - _EPS for c in min_corner]
+        hi = [c - _EPS for c in max_corner]
+        kx0, ky0, kz0 = self._key(lo)
+        kx1, ky1, kz1 = self._key(hi)
+
+        found = []
+        for kx in range(kx0, kx1 + 1):
+            for ky in range(ky0, ky1 + 1):
+                for kz in range(kz0, kz1 + 1):
+                    for obj in self._buckets.get((kx, ky, kz), ()):
+                        p = obj.pos
+                        if (
+                            lo[0] <= p[0] < hi[0]
+                            and lo[1] <= p[1] < hi[1]
+                            and lo[2] <= p[2] < hi[2]
+                        ):
+                            found.append(obj)
+        return found
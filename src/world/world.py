@@ -1,36 +1,84 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
 
 import numpy as np
-from ..resources.tilemesh import TileData
-from .worldobject import WorldObject
+
+from ..resources.meshlogic import DIMS_UNIT
+from .objectstore import ObjectStore
+from .occupancy import OccupancyGrid
+from .spatialindex import SpatialIndex
 from .worldcamera import WorldCamera
+from .worldobject import WorldObject
+
+# TileData pulls in OpenGL; the world model itself never touches GL
+if TYPE_CHECKING:
+    from ..resources.tilemesh import TileData
 
 MAX_WORLD_GRID_SIZE = 500
 MIN_WORLD_GRID_SIZE = 5
 
+# floors: object roots are snapped to multiples of the layer height
+LAYER_HEIGHT = 100
+LAYER_SHOWN = "shown"
+LAYER_GHOST = "ghost"  # drawn as translucent boxes
+LAYER_HIDDEN = "hidden"
+
+
 @dataclass
 class WorldSerial:
     tile_meshes: dict[int, str] = field(default_factory=dict)  # mesh file paths
-    objects: list[WorldObject] = field(default_factory=list)
+    objects: list[WorldObject] | ObjectStore = field(default_factory=list)
     camera: WorldCamera = WorldCamera()
     grid_size: int = 50
     grid_shown: bool = True
     tile_id_counter: int = 0
+    layer_height: float = LAYER_HEIGHT
+    active_layer: int = 0
+    layer_modes: dict[int, str] = field(default_factory=dict)
 
 
-class World():
+class World:
     def __init__(self):
         self.tile_meshes: dict[int, TileData] = {}
-        self.objects: list[WorldObject] = []
+        self.objects: ObjectStore = ObjectStore()  # sequence of WorldObject handles
         self.selected_objects: list[WorldObject] = []
         self.camera: WorldCamera = WorldCamera()
         self.selected_mesh: int = None
         self.grid_size: int = 50
         self.grid_shown: bool = True
-# when True, left‐click will delete instead of place
+        # when True, left‐click will delete instead of place
         self.delete_mode: bool = False
-        
+        # "point" places per click, "line" and "rect" fill the dragged area
+        self.place_tool: str = "point"
+        # bumped whenever placed objects or tile meshes change
+        self.revision: int = 0
+
+        # floors; layers without an entry in layer_modes are shown
+        self.layer_height: float = LAYER_HEIGHT
+        self.active_layer: int = 0
+        self.layer_modes: dict[int, str] = {}
+        self._layer_revisions: dict[int, int] = {}  # bumped by edits on that floor
+        self._layers_base = 0  # bumped by changes to every floor
+        self._layer_ids: tuple[int, list[int]] = (-1, [])
+
         self._tile_id_counter = 0
+        self._index = SpatialIndex()
+        self._occupancy = OccupancyGrid()
+        self._listeners: list[Callable[..., None]] = []
+
+    # Listeners are called as fn(kind, *args) after each edit:
+    # ("place", obj), ("remove", obj), ("placeMany", objs), ("removeMany", objs),
+    # ("grid", old_size, new_size), ("tile", tile_id, tile),
+    # ("tileMesh", tile_id, tile), ("floor", old_layer, new_layer),
+    # ("reset",), ("load",)
+    def addListener(self, fn: Callable[..., None]) -> None:
+        self._listeners.append(fn)
+
+    def _notify(self, kind: str, *args) -> None:
+        for fn in self._listeners:
+            fn(kind, *args)
 
     # Assumes world has been reset and required meshes loaded
     def loadWorld(self, serial: WorldSerial) -> None:
@@ -38,9 +86,25 @@ class World():
         self.grid_size = serial.grid_size
         self.grid_shown = serial.grid_shown
         self.camera = serial.camera
+        self.layer_height = serial.layer_height
+        self.active_layer = serial.active_layer
+        self.layer_modes = dict(serial.layer_modes)
 
         # Filter objects: keep only those whose tile mesh exists
-        self.objects = [obj for obj in serial.objects if obj.mesh_id in self.tile_meshes]
+        objects = serial.objects
+        if not isinstance(objects, ObjectStore):
+            objects = ObjectStore.fromObjects(objects)
+        keep = np.isin(
+            objects.mesh_id,
+            np.fromiter(self.tile_meshes, dtype=np.int64, count=len(self.tile_meshes)),
+        )
+        self.objects.clear()
+        self.objects = ObjectStore.fromColumns(
+            objects.mesh_id[keep], objects.pos[keep], objects.rotation[keep]
+        )
+        self._reindex()
+        self.revision += 1
+        self._notify("load")
 
     def resetWorld(self) -> None:
         for tile in self.tile_meshes.values():
@@ -53,30 +117,53 @@ class World():
         self.selected_mesh = None
         self.grid_size: int = 50
         self.grid_shown: bool = True
+        self.layer_height = LAYER_HEIGHT
+        self.active_layer = 0
+        self.layer_modes = {}
 
         self._tile_id_counter = 0
+        self._reindex()
+        self.revision += 1
+        self._notify("reset")
 
     def serializeWorld(self) -> WorldSerial:
         tile_paths = {tid: tile.filepath for tid, tile in self.tile_meshes.items()}
         return WorldSerial(
             tile_meshes=tile_paths,
-            objects=list(self.objects),
+            objects=self.objects.copy(),
             camera=self.camera,
             grid_size=self.grid_size,
             grid_shown=self.grid_shown,
             tile_id_counter=self._tile_id_counter,
+            layer_height=self.layer_height,
+            active_layer=self.active_layer,
+            layer_modes=dict(self.layer_modes),
         )
 
     def registerTile(self, tile: TileData, tileIndex: int | None) -> None:
+        prev = None
         if tileIndex is None:
-            self.tile_meshes[self._tile_id_counter] = tile
-            self._tile_id_counter += 1
+            tileIndex = self._tile_id_counter
         else:
             prev = self.tile_meshes.get(tileIndex)
             if prev != None:
                 prev.dispose()
-            self.tile_meshes[tileIndex] = tile
-            self._tile_id_counter = max(self._tile_id_counter, tileIndex + 1)
+        self.tile_meshes[tileIndex] = tile
+        self._tile_id_counter = max(self._tile_id_counter, tileIndex + 1)
+        if (
+            prev is not None
+            and not np.array_equal(prev.dims.size, tile.dims.size)
+            and self.objects
+        ):
+            self._occupancy.rebuild(self.objects, self._footprintSizes())
+        self._layers_base += 1
+        self.revision += 1
+        if prev is not None and prev.filepath == tile.filepath:
+            # same file, new geometry (a proxy's mesh swapped in): the project
+            # is unchanged
+            self._notify("tileMesh", tileIndex, tile)
+        else:
+            self._notify("tile", tileIndex, tile)
 
     def getTile(self, path: str):
         for tile in self.tile_meshes.values():
@@ -84,40 +171,279 @@ class World():
                 return tile
         return None
 
-    def placeObject(self, position: list[int], rotation: int) -> None:
-        if self.selected_mesh is None or self.selected_mesh >= len(self.tile_meshes):
-            return
+    def placeObject(self, position: list[int], rotation: int) -> WorldObject | None:
+        if self.selected_mesh is None or self.selected_mesh not in self.tile_meshes:
+            return None
         obj = WorldObject(self.selected_mesh)
         obj.pos = self.toGrid(position)
-        # ox, oy, oz = self.toGridObject(obj.mesh.bb.size, rotation=round(rotation / 90))
-        # obj.pos[0] -= ox
-        # obj.pos[1] -= oy
         obj.rotation = rotation
-        self.objects.append(obj)
 
-    def toGrid(self, position: list[int]) -> list[int]:
-        h_grid = self.grid_size / 2
-        return [round((position[0] - h_grid) / self.grid_size) * self.grid_size,
-                round((position[1] - h_grid) / self.grid_size) * self.grid_size,
-                round((position[2] - h_grid) / self.grid_size) * self.grid_size]
+        # refuse exact duplicates stacked on the same cell
+        for other in self.objectsInCell(obj.pos):
+            if (
+                other.mesh_id == obj.mesh_id
+                and other.pos == obj.pos
+                and other.rotation == obj.rotation
+            ):
+                return None
+
+        self.objects.add(obj)
+        self._index.insert(obj)
+        self._occupancy.add(obj.pos, self.footprintSize(obj.mesh_id), obj.rotation)
+        self._touchLayers([obj.pos[2]])
+        self.revision += 1
+        self._notify("place", obj)
+        return obj
+
+    def removeObject(self, obj: WorldObject) -> None:
+        # swap-remove: O(1) regardless of world size; obj keeps its values
+        self.objects.remove(obj)
+        self._index.remove(obj)
+        self._occupancy.remove(obj.pos, self.footprintSize(obj.mesh_id), obj.rotation)
+        self._touchLayers([obj.pos[2]])
+        self.revision += 1
+        self._notify("remove", obj)
+
+    def placeObjects(self, cells: list[list[int]], rotation: int) -> list[WorldObject]:
+        """
+        Place the selected tile at every grid position in cells, skipping
+        ones whose footprint overlaps a placed tile or an earlier cell of
+        the batch. One revision bump and one notification for the lot.
+        """
+        if self.selected_mesh is None or self.selected_mesh not in self.tile_meshes:
+            return []
+        mesh_id = self.selected_mesh
+        size = self.footprintSize(mesh_id)
+
+        placed = []
+        for cell in cells:
+            if self._occupancy.overlaps(cell, size, rotation):
+                continue
+            obj = WorldObject(mesh_id)
+            obj.pos = list(cell)
+            obj.rotation = rotation
+            self._occupancy.add(
+                obj.pos, size, rotation
+            )  # later cells must see this one
+            placed.append(obj)
+        self.insertObjects(placed, occupied=True)
+        return placed
+
+    def insertObjects(self, objs: list[WorldObject], occupied: bool = False) -> None:
+        """
+        Add ready-made objects as they are, without grid snapping or
+        overlap checks (undo uses this to restore removed tiles).
+        """
+        objs = [obj for obj in objs if obj.mesh_id in self.tile_meshes]
+        if not objs:
+            return
+        self.objects.extend(objs)
+        for obj in objs:
+            self._index.insert(obj)
+            if not occupied:
+                self._occupancy.add(
+                    obj.pos, self.footprintSize(obj.mesh_id), obj.rotation
+                )
+        self._touchLayers([obj.pos[2] for obj in objs])
+        self.revision += 1
+        self._notify("placeMany", objs)
+
+    def removeObjects(self, objs: list[WorldObject]) -> None:
+        """
+        Remove many objects (each a swap-remove, so the cost follows the
+        batch, not the world) with one revision bump and one notification.
+        """
+        doomed = list({id(obj): obj for obj in objs if obj in self.objects}.values())
+        if not doomed:
+            return
+        for obj in doomed:
+            self.objects.remove(obj)
+            self._index.remove(obj)
+            self._occupancy.remove(
+                obj.pos, self.footprintSize(obj.mesh_id), obj.rotation
+            )
+        self._touchLayers([obj.pos[2] for obj in doomed])
+        self.revision += 1
+        self._notify("removeMany", doomed)
 
-    def toGridObject(self, size: list[int], rotation: int = 0) -> list[int]:
-        h_size = size / 2
-        
-        t_min_world_size = MIN_WORLD_GRID_SIZE / 3
+    def findObjects(self, records: list[tuple]) -> list[WorldObject]:
+        """
+        Placed objects matching (mesh_id, x, y, z, rotation) records, one
+        per record.
+        """
+        found = []
+        taken = set()
+        for mesh_id, x, y, z, rotation in records:
+            for obj in self._index.queryBox([x, y, z], [x + 1e-3, y + 1e-3, z + 1e-3]):
+                if (
+                    id(obj) not in taken
+                    and obj.mesh_id == mesh_id
+                    and obj.rotation == rotation
+                    and obj.pos[0] == x
+                    and obj.pos[1] == y
+                    and obj.pos[2] == z
+                ):
+                    taken.add(id(obj))
+                    found.append(obj)
+                    break
+        return found
 
-        return [round((h_size[0 if rotation % 2 == 0 else 1] - t_min_world_size) / self.grid_size) * self.grid_size * (1 if rotation % 2 == 0 else -1),
-                round((h_size[1 if rotation <= 1 else 0] - t_min_world_size) / self.grid_size) * self.grid_size * (1 if rotation <= 1 else -1),
-                round((h_size[2] - t_min_world_size) / self.grid_size) * self.grid_size]
+    def removeAt(self, position: list[int]) -> WorldObject | None:
+        found = self.objectsInCell(self.toGrid(position))
+        if not found:
+            return None
+        self.removeObject(found[0])
+        return found[0]
+
+    def objectsInCell(self, grid_pos: list[int]) -> list[WorldObject]:
+        """
+        Objects rooted in the grid cell starting at grid_pos (see toGrid),
+        on grid_pos's floor.
+        """
+        g = self.grid_size
+        z0, z1 = self._floorSpan(grid_pos[2])
+        return self._index.queryBox(
+            [grid_pos[0], grid_pos[1], z0], [grid_pos[0] + g, grid_pos[1] + g, z1]
+        )
+
+    def objectsInRect(
+        self, corner_a: list[int], corner_b: list[int]
+    ) -> list[WorldObject]:
+        """
+        Objects rooted in any grid cell of the rectangle spanned by two
+        grid positions (both inclusive), on corner_a's floor.
+        """
+        g = self.grid_size
+        z0, z1 = self._floorSpan(corner_a[2])
+        lo = [min(corner_a[0], corner_b[0]), min(corner_a[1], corner_b[1]), z0]
+        hi = [max(corner_a[0], corner_b[0]) + g, max(corner_a[1], corner_b[1]) + g, z1]
+        return self._index.queryBox(lo, hi)
+
+    def footprintSize(self, mesh_id: int) -> np.ndarray:
+        """
+        (x, y) footprint of a tile in world units, snapped to WorldDims.
+        """
+        return self.tile_meshes[mesh_id].dims.size[:2] * DIMS_UNIT
+
+    def _footprintSizes(self) -> dict[int, np.ndarray]:
+        return {tid: self.footprintSize(tid) for tid in self.tile_meshes}
+
+    def canPlace(
+        self, position: list[int], rotation: int, mesh_id: int | None = None
+    ) -> bool:
+        """
+        Whether a tile (the selected one by default) placed at position
+        with rotation would stay clear of every placed footprint on its
+        floor.
+        """
+        mesh_id = self.selected_mesh if mesh_id is None else mesh_id
+        if mesh_id is None or mesh_id not in self.tile_meshes:
+            return False
+        return not self._occupancy.overlaps(
+            self.toGrid(position), self.footprintSize(mesh_id), rotation
+        )
+
+    def cellsInRect(self, corner_a: list[int], corner_b: list[int]) -> list[list[int]]:
+        """
+        Grid positions of every cell in the rectangle spanned by two grid
+        positions (both inclusive), on corner_a's floor.
+        """
+        g = self.grid_size
+        x0, y0 = min(corner_a[0], corner_b[0]), min(corner_a[1], corner_b[1])
+        nx = round(abs(corner_b[0] - corner_a[0]) / g) + 1
+        ny = round(abs(corner_b[1] - corner_a[1]) / g) + 1
+        z = corner_a[2]
+        # same value types as toGrid, so saved positions stay integral
+        return [[x0 + i * g, y0 + j * g, z] for i in range(nx) for j in range(ny)]
+
+    def cellsOnLine(self, start: list[int], end: list[int]) -> list[list[int]]:
+        """
+        Grid positions from start towards end along whichever horizontal
+        axis end is further along, so walls drag out straight.
+        """
+        if abs(end[0] - start[0]) >= abs(end[1] - start[1]):
+            return self.cellsInRect(start, [end[0], start[1], start[2]])
+        return self.cellsInRect(start, [start[0], end[1], start[2]])
+
+    # floors
+
+    def layerOf(self, z: float) -> int:
+        return round(z / self.layer_height)
+
+    def layerZ(self, layer: int) -> float:
+        return layer * self.layer_height
+
+    def layerIds(self) -> list[int]:
+        """
+        Floors holding objects plus the active one, bottom to top.
+        """
+        revision, ids = self._layer_ids
+        if revision != self.revision:
+            ids = (
+                np.unique(np.round(self.objects.pos[:, 2] / self.layer_height))
+                .astype(int)
+                .tolist()
+            )
+            self._layer_ids = (self.revision, ids)
+        return sorted(set(ids) | {self.active_layer})
+
+    def layerRevision(self, layer: int) -> tuple[int, int]:
+        return (self._layers_base, self._layer_revisions.get(layer, 0))
+
+    def layerMode(self, layer: int) -> str:
+        return self.layer_modes.get(layer, LAYER_SHOWN)
+
+    def setActiveLayer(self, layer: int) -> None:
+        """
+        Switch the floor that placing, deleting and picking work on.
+        """
+        old = self.active_layer
+        if layer == old:
+            return
+        self.active_layer = layer
+        self._notify("floor", old, layer)
+
+    def setLayerMode(self, layer: int, mode: str) -> None:
+        if mode == LAYER_SHOWN:
+            self.layer_modes.pop(layer, None)
+        else:
+            self.layer_modes[layer] = mode
+
+    def _floorSpan(self, z: float) -> tuple[float, float]:
+        # root heights that layerOf() maps to z's floor
+        z = self.layerZ(self.layerOf(z))
+        return z - self.layer_height / 2, z + self.layer_height / 2
+
+    def _touchLayers(self, zs: list[float]) -> None:
+        for layer in {self.layerOf(z) for z in zs}:
+            self._layer_revisions[layer] = self._layer_revisions.get(layer, 0) + 1
+
+    def _reindex(self) -> None:
+        self._layers_base += 1
+        self._index.rebuild(self.objects)
+        self._occupancy.rebuild(self.objects, self._footprintSizes())
+
+    def toGrid(self, position: list[int]) -> list[int]:
+        # x and y snap to the cell containing the position, z to the nearest floor
+        h_grid = self.grid_size / 2
+        return [
+            round((position[0] - h_grid) / self.grid_size) * self.grid_size,
+            round((position[1] - h_grid) / self.grid_size) * self.grid_size,
+            self.layerZ(self.layerOf(position[2])),
+        ]
 
     def growGrid(self) -> None:
         nextSize = self.grid_size * 2
-        if (nextSize - 0.00001 > MAX_WORLD_GRID_SIZE):
+        if nextSize - 0.00001 > MAX_WORLD_GRID_SIZE:
             return
-        self.grid_size = nextSize
+        self.setGridSize(nextSize)
 
     def shrinkGrid(self) -> None:
         nextSize = self.grid_size / 2
-        if (nextSize + 0.00001 < MIN_WORLD_GRID_SIZE):
+        if nextSize + 0.00001 < MIN_WORLD_GRID_SIZE:
             return
-        self.grid_size = nextSize
+        self.setGridSize(nextSize)
+
+    def setGridSize(self, size: float) -> None:
+        prev, self.grid_size = self.grid_size, size
+        self._notify("grid", prev, size)
@@ -1,8 +1,78 @@
-class WorldObject():
+class WorldObject:
+    """
+    A placed tile. A new object holds its own values; once stored in a
+    World it is a handle onto the ObjectStore columns, and detached again
+    (keeping its last values) when removed.
+    """
+
+    __slots__ = ("_store", "_slot", "_mesh_id", "_pos", "_rotation")
+
     def __init__(self, id: int):
-        self.mesh_id: int = id
-        self.pos: list[int] = [0, 0, 0]
-        self.rotation: int = 0
+        self._store = None
+        self._slot: int = -1
+        self._mesh_id: int = id
+        self._pos: list[int] = [0, 0, 0]
+        self._rotation: int = 0
+
+    @staticmethod
+    def attached(store, slot: int) -> "WorldObject":
+        obj = WorldObject.__new__(WorldObject)
+        obj._store = store
+        obj._slot = slot
+        obj._mesh_id = obj._pos = obj._rotation = None
+        return obj
+
+    def _attach(self, store, slot: int) -> None:
+        self._store = store
+        self._slot = slot
+        self._mesh_id = self._pos = self._rotation = None
+
+    def _detach(self) -> None:
+        store, slot = self._store, self._slot
+        self._mesh_id = int(store._mesh_id[slot])
+        self._pos = _plain(store._pos[slot].tolist())
+        self._rotation = int(store._rotation[slot])
+        self._store = None
+        self._slot = -1
+
+    @property
+    def mesh_id(self) -> int:
+        if self._store is None:
+            return self._mesh_id
+        return int(self._store._mesh_id[self._slot])
+
+    @mesh_id.setter
+    def mesh_id(self, value: int) -> None:
+        if self._store is None:
+            self._mesh_id = value
+        else:
+            self._store._mesh_id[self._slot] = value
+
+    @property
+    def pos(self) -> list[int]:
+        if self._store is None:
+            return self._pos
+        return _plain(self._store._pos[self._slot].tolist())
+
+    @pos.setter
+    def pos(self, value: list[int]) -> None:
+        if self._store is None:
+            self._pos = value
+        else:
+            self._store._pos[self._slot] = value
+
+    @property
+    def rotation(self) -> int:
+        if self._store is None:
+            return self._rotation
+        return int(self._store._rotation[self._slot])
+
+    @rotation.setter
+    def rotation(self, value: int) -> None:
+        if self._store is None:
+            self._rotation = value
+        else:
+            self._store._rotation[self._slot] = value
 
     def move(self, newPosition: list[int]) -> None:
         self.pos = newPosition
@@ -11,11 +81,7 @@ class WorldObject():
         self.rotation = newRotation
 
     def to_dict(self) -> dict:
-        return {
-            "mesh_id": self.mesh_id,
-            "pos": self.pos,
-            "rotation": self.rotation
-        }
+        return {"mesh_id": self.mesh_id, "pos": self.pos, "rotation": self.rotation}
 
     @staticmethod
     def from_dict(data: dict) -> "WorldObject":
@@ -24,3 +90,7 @@ class WorldObject():
         obj.rotation = data["rotation"]
         return obj
 
+
+def _plain(pos: list[float]) -> list[int]:
+    # columns hold doubles; whole values read back as ints like World.toGrid
+    return [int(v) if v.is_integer() else v for v in pos]